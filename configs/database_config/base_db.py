@@ -1,7 +1,7 @@
 """Base Database Connector - Interface chung cho tất cả database connectors"""
 
 from abc import ABC, abstractmethod
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from datetime import datetime
 
 
@@ -13,8 +13,13 @@ class BaseDatabaseConnector(ABC):
     - connect(): Tạo connection
     - query(): Query dữ liệu
     - close(): Đóng connection
+
+    `thread_safe = True` nếu 1 connector dùng chung được cho nhiều thread query
+    đồng thời; nếu không DatabaseManager mở mỗi thread 1 connector riêng.
     """
 
+    thread_safe = False
+
     def __init__(self, logger):
         """
         Initialize base connector
@@ -58,6 +63,93 @@ class BaseDatabaseConnector(ABC):
         """
         pass
 
+    def query_many(
+        self, config: Dict[str, Any], symbols: List[str]
+    ) -> Dict[str, Any]:
+        """
+        Query timestamp mới nhất/cũ nhất của nhiều symbol cùng lúc
+
+        Mặc định query từng symbol; subclass override bằng 1 query gộp
+        (GROUP BY / $group).
+
+        Args:
+            config: Dict chứa query parameters (như `query`, bắt buộc symbol_column)
+            symbols: Danh sách symbol
+
+        Returns:
+            Dict {symbol: datetime | Exception}; symbol không có dữ liệu không có trong dict
+        """
+        results = {}
+        for symbol in symbols:
+            try:
+                results[symbol] = self.query(config, symbol)
+            except ValueError as e:
+                if "không trả về kết quả" not in str(e):
+                    results[symbol] = e
+        return results
+
+    def query_union(
+        self, probes: List[Tuple[Any, Dict[str, Any], Optional[str]]]
+    ) -> Dict[Any, Any]:
+        """
+        Query timestamp của nhiều nguồn (cùng database) trong 1 round trip
+
+        Mặc định query từng probe; subclass override bằng 1 query gộp
+        (scalar subquery / $unionWith) và gọi lại hàm này khi query gộp lỗi.
+
+        Args:
+            probes: List (key, query config như `query`, symbol)
+
+        Returns:
+            Dict {key: datetime | Exception}; probe không có dữ liệu không có trong dict
+
+        Raises:
+            ConnectionError: Mất kết nối (áp dụng cho tất cả probe)
+        """
+        results = {}
+        for key, config, symbol in probes:
+            try:
+                results[key] = self.query(config, symbol)
+            except ConnectionError:
+                raise
+            except Exception as e:
+                self.recover_after_error()
+                if "không trả về kết quả" not in str(e):
+                    results[key] = e
+        return results
+
+    def recover_after_error(self) -> None:
+        """
+        Đưa connection về trạng thái dùng được sau 1 query lỗi
+        (vd PostgreSQL: rollback transaction bị abort)
+        """
+
+    @staticmethod
+    def convert_values(values: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Convert giá trị thô của query_many sang datetime (lỗi convert của 1 symbol
+        được giữ lại dưới dạng ValueError, không làm hỏng các symbol khác)
+
+        Args:
+            values: Dict {symbol/key: giá trị thô}, giá trị None bị bỏ qua
+
+        Returns:
+            Dict {symbol/key: datetime | ValueError}
+        """
+        from utils.convert_datetime_util import ConvertDatetimeUtil
+
+        results = {}
+        for symbol, value in values.items():
+            if value is None:
+                continue
+            try:
+                results[symbol] = ConvertDatetimeUtil.convert_str_to_datetime(value)
+            except ValueError as e:
+                results[symbol] = ValueError(
+                    f"Không thể convert {type(value)} ({value}) thành datetime: {e}"
+                )
+        return results
+
     @abstractmethod
     def close(self) -> None:
         """
@@ -86,6 +178,17 @@ class BaseDatabaseConnector(ABC):
         """
         return self.connection is not None
 
+    def ping(self) -> bool:
+        """
+        Keepalive cho connector đang rảnh trong pool
+
+        Subclasses có thể override để gửi 1 query nhẹ tới server
+
+        Returns:
+            True nếu connector còn dùng được, False nếu không
+        """
+        return self.is_connected()
+
     def validate_config(self, config: Dict[str, Any], required_fields: list) -> None:
         """
         Validate config có đủ required fields không
@@ -0,0 +1,205 @@
+"""Connection Pool - Pool connector dùng chung toàn process cho 1 connection profile + database"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from configs.database_config.base_db import BaseDatabaseConnector
+
+
+class ConnectionPool:
+    """
+    Pool connector của 1 (profile, loại database, database)
+
+    - Connector `thread_safe` (vd MongoDB - MongoClient có pool riêng): 1 connector
+      dùng chung cho mọi thread
+    - Connector khác (vd psycopg2 - 1 connection chạy 1 query 1 lúc): tối đa
+      `max_size` connector; checkout lấy connector rảnh hoặc mở mới, hết chỗ thì
+      chờ tối đa `checkout_timeout` giây; checkin trả lại để tái sử dụng
+    - `keepalive`: ping các connector rảnh quá lâu, bỏ connector đã chết
+
+    Sử dụng:
+        pool = ConnectionPool(name, open_connector, thread_safe=False, max_size=4)
+        with pool.checkout() as connector:
+            connector.query(...)
+    """
+
+    def __init__(
+        self,
+        name: str,
+        open_connector: Callable[[], BaseDatabaseConnector],
+        thread_safe: bool,
+        max_size: int,
+        checkout_timeout: float,
+        logger,
+    ):
+        """
+        Args:
+            name: Tên pool để log (không chứa credentials)
+            open_connector: Hàm tạo connector mới đã kết nối
+            thread_safe: Connector dùng chung được cho nhiều thread
+            max_size: Số connector tối đa (bỏ qua nếu thread_safe)
+            checkout_timeout: Số giây tối đa chờ connector rảnh
+            logger: Logger instance
+        """
+        self.name = name
+        self.open_connector = open_connector
+        self.thread_safe = thread_safe
+        self.max_size = max(1, int(max_size))
+        self.checkout_timeout = checkout_timeout
+        self.logger = logger
+        self._condition = threading.Condition()
+        self._shared: Optional[BaseDatabaseConnector] = None
+        # (connector, thời điểm trả về pool)
+        self._idle: List[Tuple[BaseDatabaseConnector, float]] = []
+        self._size = 0
+        self._in_use = 0
+        self._opened = 0
+        self._waits = 0
+        # Pool đã close: connector trả về (checkin) bị đóng thay vì vào lại _idle
+        self._closed = False
+
+    @contextmanager
+    def checkout(self):
+        """Context manager: mượn 1 connector, trả lại pool khi xong"""
+        if self.thread_safe:
+            yield self._get_shared()
+            return
+
+        connector = self._acquire()
+        try:
+            yield connector
+        finally:
+            self._release(connector)
+
+    def _get_shared(self) -> BaseDatabaseConnector:
+        """Connector dùng chung (mở lại nếu đã mất kết nối)"""
+        with self._condition:
+            if self._closed:
+                raise ConnectionError(f"Pool {self.name} đã đóng")
+            connector = self._shared
+            if connector is not None and not connector.is_connected():
+                self.logger.info(f"Connection {self.name} đã bị đóng, đang reconnect...")
+                connector.close()
+                connector = None
+            if connector is None:
+                connector = self.open_connector()
+                self._shared = connector
+                self._opened += 1
+            return connector
+
+    def _acquire(self) -> BaseDatabaseConnector:
+        """Lấy connector rảnh, mở mới nếu pool chưa đầy, hoặc chờ connector được trả"""
+        deadline = time.monotonic() + self.checkout_timeout
+        with self._condition:
+            while not self._idle and self._size >= self.max_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise ConnectionError(
+                        f"Hết connection trong pool {self.name} "
+                        f"({self.max_size} đang dùng) sau {self.checkout_timeout:.0f}s"
+                    )
+                self._waits += 1
+                self._condition.wait(remaining)
+            connector = self._idle.pop()[0] if self._idle else None
+            if connector is None:
+                # Giữ chỗ trước khi mở (ngoài lock) để không vượt max_size
+                self._size += 1
+            self._in_use += 1
+
+        if connector is not None and not connector.is_connected():
+            self.logger.info(f"Connection {self.name} đã bị đóng, đang reconnect...")
+            connector.close()
+            connector = None
+        if connector is None:
+            try:
+                connector = self.open_connector()
+            except BaseException:
+                with self._condition:
+                    self._size -= 1
+                    self._in_use -= 1
+                    self._condition.notify()
+                raise
+            with self._condition:
+                self._opened += 1
+        return connector
+
+    def _release(self, connector: BaseDatabaseConnector) -> None:
+        """Trả connector về pool (đóng luôn nếu pool đã close)"""
+        with self._condition:
+            self._in_use -= 1
+            closed = self._closed
+            if closed:
+                self._size -= 1
+            else:
+                self._idle.append((connector, time.monotonic()))
+            self._condition.notify()
+        if closed:
+            self._close_connector(connector)
+
+    def _close_connector(self, connector: BaseDatabaseConnector) -> None:
+        try:
+            connector.close()
+        except Exception as e:
+            self.logger.error(f"Lỗi đóng kết nối {self.name}: {str(e)}")
+
+    def keepalive(self, idle_seconds: float) -> None:
+        """
+        Ping các connector rảnh lâu hơn `idle_seconds` (connector dùng chung
+        `thread_safe` tự quản lý kết nối, bỏ qua); connector ping lỗi bị đóng và
+        bỏ khỏi pool, checkout sau sẽ mở mới
+
+        Args:
+            idle_seconds: Thời gian rảnh tối thiểu để ping
+        """
+        now = time.monotonic()
+        with self._condition:
+            stale = [c for c, released in self._idle if now - released >= idle_seconds]
+            if not stale:
+                return
+            # Coi như đang dùng trong lúc ping để không bị checkout
+            self._idle = [
+                (c, released) for c, released in self._idle if now - released < idle_seconds
+            ]
+            self._in_use += len(stale)
+
+        for connector in stale:
+            alive = connector.ping()
+            if alive:
+                self._release(connector)
+                continue
+            connector.close()
+            with self._condition:
+                self._in_use -= 1
+                self._size -= 1
+                self._condition.notify()
+            self.logger.info(f"Keepalive: bỏ connection đã chết của pool {self.name}")
+
+    def close(self) -> None:
+        """Đóng tất cả connector rảnh (connector đang dùng được đóng khi trả lại)"""
+        with self._condition:
+            self._closed = True
+            connectors = [connector for connector, _ in self._idle]
+            if self._shared is not None:
+                connectors.append(self._shared)
+            self._idle.clear()
+            self._shared = None
+            self._size = self._in_use
+        for connector in connectors:
+            self._close_connector(connector)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Số connector đang mở/đang dùng, số lần mở mới và số lần phải chờ"""
+        with self._condition:
+            if self.thread_safe:
+                size = 1 if self._shared is not None else 0
+            else:
+                size = self._size
+            return {
+                "size": size,
+                "max_size": 1 if self.thread_safe else self.max_size,
+                "in_use": self._in_use,
+                "opened": self._opened,
+                "waits": self._waits,
+            }
@@ -1,9 +1,14 @@
 """Database Manager - Quản lý tập trung tất cả database connections"""
 
-from typing import Any, Dict, Optional
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
 from datetime import datetime
 from configs.logging_config import LoggerConfig
 from configs.database_config.base_db import BaseDatabaseConnector
+from configs.database_config.connection_pool import ConnectionPool
 from configs.database_config.mongo_config import MongoDBConnector
 from configs.database_config.postgres_config import PostgreSQLConnector
 
@@ -12,19 +17,24 @@ class DatabaseManager:
     """
     Database Manager - Quản lý tất cả database connections
 
-    - Connection pooling (tái sử dụng connections)
+    - Connection pooling dùng chung toàn process (mọi instance DatabaseManager:
+      CheckDatabase, SymbolResolverUtil...): 1 pool cho mỗi (profile, loại
+      database, database) - xem ConnectionPool; MongoDB dùng chung 1 MongoClient
+      cho mỗi host + credentials
     - Tự động reload config từ common_config.json
     - Factory pattern để tạo connectors
+    - Query async: chạy trong thread pool riêng của từng connection profile
+      (`user_connect`), mỗi thread checkout 1 connector từ pool
 
     Sử dụng:
         manager = DatabaseManager()
 
         # Query database
         latest_time = manager.query("db_name", db_config, symbol="BTC")
+        latest_time = await manager.query_async("db_name", db_config, symbol="BTC")
 
-        # Đóng connections
-        manager.close("db_name")  # Đóng 1 database cụ thể
-        manager.close()  # Đóng tất cả
+        # Đóng tất cả connections (dùng chung toàn process)
+        manager.close()
     """
 
     CONNECTOR_REGISTRY = {
@@ -33,12 +43,25 @@ class DatabaseManager:
         # Thêm: "mysql", hoặc các cái database khác ở đây : MySQLConnector,
     }
 
+    DEFAULT_POOL_CONFIG = {
+        "max_size": 4,
+        "checkout_timeout": 30,
+        "mongo_max_pool_size": 20,
+        "keepalive_interval": 0,
+    }
+
+    # Dùng chung giữa các instance
+    _pools: Dict[tuple, ConnectionPool] = {}
+    _executors: Dict[str, ThreadPoolExecutor] = {}
+    _lock = threading.Lock()
+    # Event dừng thread keepalive (None = chưa chạy)
+    _keepalive_stop: Optional[threading.Event] = None
+
     def __init__(self):
         """
         Initialize Database Manager
         """
         self.logger = LoggerConfig.logger_config("DatabaseManager")
-        self.connectors: Dict[str, BaseDatabaseConnector] = {}
 
     def _get_connection_config(
         self, db_type: str, db_config: Dict[str, Any]
@@ -138,6 +161,7 @@ class DatabaseManager:
                 "username": mongo_config.get("username"),
                 "password": mongo_config.get("password"),
                 "auth_source": mongo_config.get("auth_source", "admin"),
+                "max_pool_size": int(self.get_pool_config()["mongo_max_pool_size"]),
             }
 
         # Thêm các database khác ở đây theo format chung
@@ -172,38 +196,42 @@ class DatabaseManager:
 
         return connector_class(self.logger)
 
-    def connect(self, db_name: str, db_config: Dict[str, Any]) -> BaseDatabaseConnector:
+    @staticmethod
+    def _get_db_type(db_name: str, db_config: Dict[str, Any]) -> str:
+        """database.type của config (raise ValueError nếu thiếu)"""
+        db_cfg = db_config.get("database", {})
+        db_type = (
+            db_cfg.get("type") if isinstance(db_cfg, dict) else db_config.get("db_type")
+        )
+
+        if not db_type:
+            raise ValueError(f"Thiếu database.type cho database: {db_name}")
+        return db_type
+
+    @staticmethod
+    def _get_user_connect(db_config: Dict[str, Any]) -> str:
+        """Connection profile (database.user_connect) của config"""
+        db_cfg = db_config.get("database", {})
+        return (
+            db_cfg.get("user_connect", "duc_le_connect")
+            if isinstance(db_cfg, dict)
+            else "duc_le_connect"
+        )
+
+    def _open_connector(
+        self, db_name: str, db_config: Dict[str, Any]
+    ) -> BaseDatabaseConnector:
         """
-        Tạo hoặc lấy existing connector
+        Tạo connector mới và kết nối (không cache)
 
         Args:
             db_name: Tên database (unique identifier)
             db_config: Config từ data_sources_config.json
 
         Returns:
-            BaseDatabaseConnector instance
-
-        Raises:
-            ValueError: Nếu thiếu database.type
-            ConnectionError: Nếu không thể kết nối
+            BaseDatabaseConnector đã kết nối
         """
-        # Reuse existing connector nếu còn connected
-        if db_name in self.connectors:
-            connector = self.connectors[db_name]
-            if connector.is_connected():
-                return connector
-            else:
-                # Connection đã bị đóng, log và reconnect
-                self.logger.info(f"Connection {db_name} đã bị đóng, đang reconnect...")
-
-        # Extract database type
-        db_cfg = db_config.get("database", {})
-        db_type = (
-            db_cfg.get("type") if isinstance(db_cfg, dict) else db_config.get("db_type")
-        )
-
-        if not db_type:
-            raise ValueError(f"Thiếu database.type cho database: {db_name}")
+        db_type = self._get_db_type(db_name, db_config)
 
         try:
             # Create new connector
@@ -215,16 +243,8 @@ class DatabaseManager:
             # Connect
             connector.connect(connection_config)
 
-            # Cache connector
-            self.connectors[db_name] = connector
-
             # Extract user_connect để log
-            db_cfg = db_config.get("database", {})
-            user_connect = (
-                db_cfg.get("user_connect", "duc_le_connect")
-                if isinstance(db_cfg, dict)
-                else "duc_le_connect"
-            )
+            user_connect = self._get_user_connect(db_config)
             db_host = connection_config.get("host", "N/A")
             db_database = connection_config.get("database", "N/A")
 
@@ -245,12 +265,155 @@ class DatabaseManager:
             self.logger.error(f"Lỗi kết nối database {db_name}: {str(e)}")
             raise
 
+    @staticmethod
+    def get_pool_config() -> dict:
+        """MONITOR_CONFIG.database.pool (đã merge default)"""
+        from utils.load_config_util import LoadConfigUtil
+
+        common_config = LoadConfigUtil.load_json_to_variable("common_config.json")
+        config = dict(DatabaseManager.DEFAULT_POOL_CONFIG)
+        config.update(
+            common_config.get("MONITOR_CONFIG", {}).get("database", {}).get("pool", {})
+        )
+        return config
+
+    def _get_pool(self, db_name: str, db_config: Dict[str, Any]) -> ConnectionPool:
+        """
+        Pool của (profile, loại database, database) - tạo lần đầu dùng
+
+        Args:
+            db_name: Tên nguồn (chỉ dùng để log/báo lỗi)
+            db_config: Config từ data_sources_config.json
+        """
+        db_type = self._get_db_type(db_name, db_config)
+        key = self.pool_key(db_config)
+        with self._lock:
+            pool = self._pools.get(key)
+            if pool is None:
+                connector_class = self.CONNECTOR_REGISTRY.get(db_type)
+                pool_config = self.get_pool_config()
+                name = "/".join(str(part) for part in key)
+                pool = ConnectionPool(
+                    name,
+                    lambda: self._open_connector(name, db_config),
+                    thread_safe=getattr(connector_class, "thread_safe", False),
+                    max_size=int(pool_config["max_size"]),
+                    checkout_timeout=float(pool_config["checkout_timeout"]),
+                    logger=self.logger,
+                )
+                self._pools[key] = pool
+                self._start_keepalive(pool_config)
+            return pool
+
+    def _start_keepalive(self, pool_config: dict) -> None:
+        """
+        Chạy thread keepalive nếu `pool.keepalive_interval` > 0 (gọi khi giữ `_lock`)
+
+        Args:
+            pool_config: MONITOR_CONFIG.database.pool đã merge default
+        """
+        interval = float(pool_config.get("keepalive_interval") or 0)
+        if interval <= 0 or DatabaseManager._keepalive_stop is not None:
+            return
+        stop = threading.Event()
+        DatabaseManager._keepalive_stop = stop
+        threading.Thread(
+            target=self._keepalive_loop,
+            args=(stop, interval),
+            name="db-keepalive",
+            daemon=True,
+        ).start()
+        self.logger.info(f"Bật keepalive connection database mỗi {interval:.0f}s")
+
+    def _keepalive_loop(self, stop: threading.Event, interval: float) -> None:
+        """Mỗi `interval` giây ping các connection rảnh lâu hơn `interval` của mọi pool"""
+        while not stop.wait(interval):
+            with self._lock:
+                pools = list(self._pools.values())
+            for pool in pools:
+                try:
+                    pool.keepalive(interval)
+                except Exception as e:
+                    self.logger.error(f"Lỗi keepalive pool {pool.name}: {str(e)}")
+
+    @contextmanager
+    def _checkout(self, db_name: str, db_config: Dict[str, Any]):
+        """
+        Context manager: mượn 1 connector từ pool dùng chung để query (an toàn
+        khi gọi từ nhiều thread)
+
+        Args:
+            db_name: Tên nguồn
+            db_config: Config từ data_sources_config.json
+        """
+        with self._get_pool(db_name, db_config).checkout() as connector:
+            yield connector
+
+    def _get_executor(self, user_connect: str) -> ThreadPoolExecutor:
+        """
+        Thread pool của connection profile (MONITOR_CONFIG.database.max_workers,
+        mặc định 4 thread/profile)
+        """
+        with self._lock:
+            executor = self._executors.get(user_connect)
+            if executor is None:
+                from utils.load_config_util import LoadConfigUtil
+
+                common_config = LoadConfigUtil.load_json_to_variable(
+                    "common_config.json"
+                )
+                database_config = common_config.get("MONITOR_CONFIG", {}).get(
+                    "database", {}
+                )
+                max_workers = max(1, int(database_config.get("max_workers", 4)))
+                executor = ThreadPoolExecutor(
+                    max_workers=max_workers,
+                    thread_name_prefix=f"db-{user_connect}",
+                )
+                self._executors[user_connect] = executor
+                self.logger.info(
+                    f"Tạo thread pool {max_workers} thread cho profile '{user_connect}'"
+                )
+            return executor
+
+    @staticmethod
+    def _request_key(kind: str, db_config: Dict[str, Any], *extra) -> tuple:
+        """
+        Key chuẩn hóa của 1 request để gộp qua SingleFlightUtil:
+        profile + database + collection/table + filter
+
+        Args:
+            kind: Loại request ("db_query", "db_distinct")
+            db_config: Config từ data_sources_config.json
+            *extra: Các tham số filter còn lại
+
+        Returns:
+            Tuple key
+        """
+        db_cfg = db_config.get("database", {})
+        if not isinstance(db_cfg, dict):
+            db_cfg = {}
+        return (
+            kind,
+            db_cfg.get("user_connect", "duc_le_connect"),
+            db_cfg.get("type"),
+            db_cfg.get("database"),
+            db_cfg.get("collection_name")
+            or db_cfg.get("table")
+            or db_config.get("collection_name")
+            or db_config.get("table")
+            or db_config.get("table_name"),
+        ) + extra
+
     def query(
         self, db_name: str, db_config: Dict[str, Any], symbol: Optional[str] = None
     ) -> datetime:
         """
         Query database để lấy timestamp mới nhất/cũ nhất
 
+        Các query giống nhau (cùng profile, collection/table, cột và symbol) đang
+        chạy đồng thời - kể cả từ các nguồn khác tên - chỉ chạy 1 lần.
+
         Args:
             db_name: Tên database
             db_config: Config từ data_sources_config.json
@@ -263,9 +426,218 @@ class DatabaseManager:
             ConnectionError: Nếu không thể kết nối
             ValueError: Nếu query không có kết quả
         """
-        # Get or create connector
-        connector = self.connect(db_name, db_config)
+        from utils.single_flight_util import SingleFlightUtil
+
+        return SingleFlightUtil.do(
+            self._query_key("db_query", db_config, symbol),
+            lambda: self._query(db_name, db_config, symbol),
+        )
+
+    async def query_async(
+        self,
+        db_name: str,
+        db_config: Dict[str, Any],
+        symbol: Optional[str] = None,
+        rank: int = 1,
+    ) -> datetime:
+        """
+        Như `query` nhưng chạy trong thread pool của connection profile,
+        không block event loop (các query của nhiều nguồn chạy song song)
+
+        Chỉ query thật (caller mở flight) chiếm slot bulkhead của profile; caller
+        chờ chung flight hoặc trúng micro-TTL không tốn slot/token.
+
+        Args:
+            db_name: Tên database
+            db_config: Config từ data_sources_config.json
+            symbol: Optional symbol để filter
+            rank: Priority rank của nguồn (cho bulkhead)
+
+        Returns:
+            datetime object
+        """
+        from utils.single_flight_util import SingleFlightUtil
+
+        return await SingleFlightUtil.do_async(
+            self._query_key("db_query", db_config, symbol),
+            lambda: self._run_async(
+                db_config, rank, self._query, db_name, db_config, symbol
+            ),
+        )
+
+    def query_many(
+        self, db_name: str, db_config: Dict[str, Any], symbols: List[str]
+    ) -> Dict[str, Any]:
+        """
+        Query timestamp của nhiều symbol bằng 1 query gộp (GROUP BY / $group)
+
+        Args:
+            db_name: Tên database
+            db_config: Config từ data_sources_config.json (cần symbols.column)
+            symbols: Danh sách symbol
+
+        Returns:
+            Dict {symbol: datetime | ValueError}; symbol không có dữ liệu không có trong dict
+        """
+        from utils.single_flight_util import SingleFlightUtil
+
+        return SingleFlightUtil.do(
+            self._query_key("db_query_many", db_config, tuple(sorted(symbols))),
+            lambda: self._query_many(db_name, db_config, symbols),
+        )
+
+    async def query_many_async(
+        self,
+        db_name: str,
+        db_config: Dict[str, Any],
+        symbols: List[str],
+        rank: int = 1,
+    ) -> Dict[str, Any]:
+        """
+        Như `query_many` nhưng chạy trong thread pool của connection profile
+        (slot bulkhead chỉ do caller mở flight giữ, xem `query_async`)
+        """
+        from utils.single_flight_util import SingleFlightUtil
 
+        return await SingleFlightUtil.do_async(
+            self._query_key("db_query_many", db_config, tuple(sorted(symbols))),
+            lambda: self._run_async(
+                db_config, rank, self._query_many, db_name, db_config, symbols
+            ),
+        )
+
+    @staticmethod
+    def get_union_config():
+        """
+        MONITOR_CONFIG.database.union: gộp probe của nhiều nguồn cùng profile +
+        database thành 1 query
+
+        Returns:
+            DatabaseBatchConfig (size, window), None nếu không bật
+        """
+        from utils.load_config_util import LoadConfigUtil
+        from utils.source_config_util import DatabaseBatchConfig
+
+        common_config = LoadConfigUtil.load_json_to_variable("common_config.json")
+        union_config = (
+            common_config.get("MONITOR_CONFIG", {}).get("database", {}).get("union", {})
+        )
+        if not union_config.get("enable", False):
+            return None
+        return DatabaseBatchConfig(
+            size=max(1, int(union_config.get("size", 20))),
+            window=max(0.0, float(union_config.get("window", 0.2))),
+        )
+
+    @staticmethod
+    def pool_key(db_config: Dict[str, Any]) -> tuple:
+        """
+        Key của pool (cũng là key gộp probe giữa các nguồn):
+        (profile, loại database, tên database)
+
+        Args:
+            db_config: Config từ data_sources_config.json
+        """
+        db_cfg = db_config.get("database", {})
+        if not isinstance(db_cfg, dict):
+            db_cfg = {}
+        return (
+            DatabaseManager._get_user_connect(db_config),
+            db_cfg.get("type"),
+            db_cfg.get("database"),
+        )
+
+    def query_union(
+        self, probes: List[Tuple[Hashable, str, Dict[str, Any], Optional[str]]]
+    ) -> Dict[Hashable, Any]:
+        """
+        Query timestamp của nhiều nguồn cùng profile + database trong 1 round trip
+        (PostgreSQL: scalar subquery mỗi nguồn 1 cột; MongoDB: $unionWith)
+
+        Args:
+            probes: List (key, db_name, db_config, symbol), cùng `pool_key`
+
+        Returns:
+            Dict {key: datetime | Exception}; probe không có dữ liệu không có trong dict
+        """
+        first_db_name, first_config = probes[0][1], probes[0][2]
+        compound = [
+            (key, self._build_query_config(db_config), symbol)
+            for key, _, db_config, symbol in probes
+        ]
+        # Các nguồn cùng profile + database dùng chung pool → 1 connection cho cả nhóm
+        with self._checkout(first_db_name, first_config) as connector:
+            return connector.query_union(compound)
+
+    async def query_union_async(
+        self,
+        probes: List[Tuple[Hashable, str, Dict[str, Any], Optional[str]]],
+        rank: int = 1,
+    ) -> Dict[Hashable, Any]:
+        """
+        Như `query_union` nhưng chạy trong thread pool của connection profile
+        (giữ 1 slot bulkhead của profile với `rank` ưu tiên nhất của nhóm)
+        """
+        return await self._run_async(probes[0][2], rank, self.query_union, probes)
+
+    async def _run_async(
+        self, db_config: Dict[str, Any], rank: int, fn: Callable[..., Any], *args
+    ) -> Any:
+        """
+        Chạy `fn(*args)` trong thread pool của connection profile, giữ 1 slot
+        bulkhead của profile (max_in_flight/QPS) trong lúc query
+
+        Args:
+            db_config: Config từ data_sources_config.json (lấy `user_connect`)
+            rank: Priority rank của nguồn (0 = critical)
+            fn: Hàm query đồng bộ (không qua single-flight)
+            *args: Tham số của `fn`
+
+        Returns:
+            Kết quả của `fn`
+        """
+        from utils.bulkhead_util import BulkheadUtil
+
+        user_connect = self._get_user_connect(db_config)
+        executor = self._get_executor(user_connect)
+        async with BulkheadUtil.limit(BulkheadUtil.profile_target(user_connect), rank):
+            return await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+
+    @staticmethod
+    def _query_key(kind: str, db_config: Dict[str, Any], *extra) -> tuple:
+        """Key single-flight của query timestamp (cột, record_pointer, cột symbol + filter)"""
+        db_cfg = db_config.get("database", {})
+        symbols_cfg = db_config.get("symbols", {})
+        return DatabaseManager._request_key(
+            kind,
+            db_config,
+            db_cfg.get("column_to_check", "datetime"),
+            db_cfg.get("record_pointer", 0),
+            symbols_cfg.get("column"),
+            *extra,
+        )
+
+    def _query(
+        self, db_name: str, db_config: Dict[str, Any], symbol: Optional[str] = None
+    ) -> datetime:
+        """Thực hiện query (không qua single-flight)"""
+        query_config = self._build_query_config(db_config)
+
+        # Execute query
+        with self._checkout(db_name, db_config) as connector:
+            return connector.query(query_config, symbol)
+
+    def _query_many(
+        self, db_name: str, db_config: Dict[str, Any], symbols: List[str]
+    ) -> Dict[str, Any]:
+        """Thực hiện query gộp nhiều symbol (không qua single-flight)"""
+        query_config = self._build_query_config(db_config)
+        with self._checkout(db_name, db_config) as connector:
+            return connector.query_many(query_config, list(symbols))
+
+    @staticmethod
+    def _build_query_config(db_config: Dict[str, Any]) -> Dict[str, Any]:
+        """Query config cho connector (collection/table, cột, record_pointer, cột symbol)"""
         # Extract query config
         db_cfg = db_config.get("database", {})
         symbols_cfg = db_config.get("symbols", {})
@@ -287,9 +659,7 @@ class DatabaseManager:
             query_config["table"] = db_config.get("table") or db_config.get(
                 "table_name"
             )
-
-        # Execute query
-        return connector.query(query_config, symbol)
+        return query_config
 
     def get_distinct_symbols(self, db_name: str, db_config: Dict[str, Any]) -> list:
         """
@@ -302,53 +672,69 @@ class DatabaseManager:
         Returns:
             Sorted list of unique symbols
         """
-        connector = self.connect(db_name, db_config)
+        from utils.single_flight_util import SingleFlightUtil
 
-        db_cfg = db_config.get("database", {})
-        symbols_cfg = db_config.get("symbols", {})
-
-        symbol_column = symbols_cfg.get("column")
+        symbol_column = db_config.get("symbols", {}).get("column")
         if not symbol_column:
             raise ValueError("Thiếu symbols.column trong config")
 
+        key = self._request_key("db_distinct", db_config, symbol_column)
+        return SingleFlightUtil.do(
+            key, lambda: self._get_distinct_symbols(db_name, db_config)
+        )
+
+    def _get_distinct_symbols(self, db_name: str, db_config: Dict[str, Any]) -> list:
+        """Lấy distinct symbols (không qua single-flight)"""
+        db_cfg = db_config.get("database", {})
+        symbol_column = db_config.get("symbols", {}).get("column")
+
         # Get table/collection name
         collection_name = db_cfg.get("collection_name")
         table_name = db_cfg.get("table")
 
-        if hasattr(connector, "get_distinct_symbols"):
-            if collection_name:
-                return connector.get_distinct_symbols(collection_name, symbol_column)
-            elif table_name:
-                return connector.get_distinct_symbols(table_name, symbol_column)
+        with self._checkout(db_name, db_config) as connector:
+            if hasattr(connector, "get_distinct_symbols"):
+                if collection_name:
+                    return connector.get_distinct_symbols(collection_name, symbol_column)
+                elif table_name:
+                    return connector.get_distinct_symbols(table_name, symbol_column)
 
         raise ValueError("Connector không hỗ trợ get_distinct_symbols")
 
-    def close(self, db_name: Optional[str] = None) -> None:
+    def close(self, db_config: Optional[Dict[str, Any]] = None) -> None:
         """
-        Đóng database connections
+        Đóng database connections (pool dùng chung toàn process)
 
         Args:
-            db_name: Tên database cần đóng. Nếu None, đóng tất cả
+            db_config: Config của nguồn cần đóng pool. Nếu None, đóng tất cả pool
+                       và thread pool query
         """
-        if db_name:
-            # Close specific connector
-            if db_name in self.connectors:
-                try:
-                    self.connectors[db_name].close()
-                    del self.connectors[db_name]
-                    self.logger.info(f"Đã đóng kết nối: {db_name}")
-                except Exception as e:
-                    self.logger.error(f"Lỗi đóng kết nối {db_name}: {str(e)}")
-        else:
-            # Close all connectors
-            for name, connector in list(self.connectors.items()):
-                try:
-                    connector.close()
-                    self.logger.info(f"Đã đóng kết nối: {name}")
-                except Exception as e:
-                    self.logger.error(f"Lỗi đóng kết nối {name}: {str(e)}")
-
-            self.connectors.clear()
+        with self._lock:
+            if db_config is not None:
+                pool = self._pools.pop(self.pool_key(db_config), None)
+                pools = [pool] if pool is not None else []
+                executors = []
+            else:
+                pools = list(self._pools.values())
+                self._pools.clear()
+                executors = list(self._executors.values())
+                self._executors.clear()
+                if DatabaseManager._keepalive_stop is not None:
+                    DatabaseManager._keepalive_stop.set()
+                    DatabaseManager._keepalive_stop = None
+
+        for pool in pools:
+            pool.close()
+            self.logger.info(f"Đã đóng pool kết nối: {pool.name}")
+        for executor in executors:
+            executor.shutdown(wait=False)
+
+    @staticmethod
+    def get_pool_stats() -> Dict[str, Dict[str, Any]]:
+        """Trạng thái các pool: số connection đang mở/đang dùng, số lần mở mới/phải chờ"""
+        with DatabaseManager._lock:
+            pools = list(DatabaseManager._pools.values())
+        return {pool.name: pool.get_stats() for pool in pools}
 
     def list_supported_types(self) -> list:
         """
@@ -1,6 +1,7 @@
 """MongoDB Connector - Kết nối và query MongoDB"""
 
-from typing import Any, Dict, Optional
+import threading
+from typing import Any, Dict, List, Optional, Tuple
 from datetime import datetime
 from configs.database_config.base_db import BaseDatabaseConnector
 
@@ -9,14 +10,23 @@ class MongoDBConnector(BaseDatabaseConnector):
     """
     MongoDB connector implementation
 
-    - Connection pooling
+    - Connection pooling: 1 MongoClient (pool `maxPoolSize` connection) dùng chung
+      cho mọi connector cùng host + port + credentials, kể cả khác database
     - Authentication
     """
 
+    # MongoClient thread-safe và có connection pool riêng
+    thread_safe = True
+
+    # {(host, port, username, password, auth_source, max_pool_size): [client, số connector dùng]}
+    _clients: Dict[tuple, list] = {}
+    _clients_lock = threading.Lock()
+
     def __init__(self, logger):
         super().__init__(logger)
         self.client = None
         self.db = None
+        self._client_key = None
 
     def connect(self, config: Dict[str, Any]) -> Any:
         """
@@ -30,6 +40,7 @@ class MongoDBConnector(BaseDatabaseConnector):
                 - username: Optional username
                 - password: Optional password
                 - auth_source: Auth source (default: "admin")
+                - max_pool_size: Optional maxPoolSize của MongoClient (default: 100)
 
         Returns:
             MongoDB database object
@@ -54,15 +65,24 @@ class MongoDBConnector(BaseDatabaseConnector):
         username = config.get("username")
         password = config.get("password")
         auth_source = config.get("auth_source", "admin")
+        max_pool_size = int(config.get("max_pool_size") or 100)
 
         # Build connection URI
         if username and password:
-            uri = f"mongodb://{username}:{password}@{host}:{port}/{database}?authSource={auth_source}"
+            uri = f"mongodb://{username}:{password}@{host}:{port}/?authSource={auth_source}"
         else:
-            uri = f"mongodb://{host}:{port}/{database}"
+            uri = f"mongodb://{host}:{port}/"
 
+        client_key = (host, port, username, password, auth_source, max_pool_size)
         try:
-            self.client = MongoClient(uri)
+            with MongoDBConnector._clients_lock:
+                entry = MongoDBConnector._clients.get(client_key)
+                if entry is None:
+                    entry = [MongoClient(uri, maxPoolSize=max_pool_size), 0]
+                    MongoDBConnector._clients[client_key] = entry
+                entry[1] += 1
+            self._client_key = client_key
+            self.client = entry[0]
             self.db = self.client[database]
 
             # Test connection
@@ -72,6 +92,7 @@ class MongoDBConnector(BaseDatabaseConnector):
             return self.db
 
         except Exception as e:
+            self.close()
             self.logger.error(f"Lỗi kết nối MongoDB: {str(e)}")
             raise ConnectionError(f"Không thể kết nối MongoDB: {str(e)}")
 
@@ -156,14 +177,128 @@ class MongoDBConnector(BaseDatabaseConnector):
             self.logger.error(f"Lỗi query MongoDB: {str(e)}")
             raise
 
+    def query_many(
+        self, config: Dict[str, Any], symbols: List[str]
+    ) -> Dict[str, Any]:
+        """
+        1 aggregation cho nhiều symbol:
+        $match {symbol: {$in: symbols}} + $group {_id: "$symbol", value: {$max: "$col"}}
+
+        Args:
+            config: Dict như `query` (bắt buộc symbol_column)
+            symbols: Danh sách symbol
+
+        Returns:
+            Dict {symbol: datetime | ValueError}; symbol không có dữ liệu không có trong dict
+        """
+        if not self.is_connected():
+            raise ConnectionError("Chưa kết nối đến MongoDB")
+
+        self.validate_config(
+            config, ["collection_name", "column_to_check", "symbol_column"]
+        )
+
+        column_to_check = config["column_to_check"]
+        symbol_column = config["symbol_column"]
+        accumulator = "$min" if config.get("record_pointer", 0) == -1 else "$max"
+
+        pipeline = [
+            {"$match": {symbol_column: {"$in": list(symbols)}}},
+            {
+                "$group": {
+                    "_id": f"${symbol_column}",
+                    "value": {accumulator: f"${column_to_check}"},
+                }
+            },
+        ]
+
+        try:
+            docs = self.db[config["collection_name"]].aggregate(pipeline)
+            values = {str(doc["_id"]): doc.get("value") for doc in docs}
+        except Exception as e:
+            self.logger.error(f"Lỗi query MongoDB (batch): {str(e)}")
+            raise
+
+        return self.convert_values(values)
+
+    def query_union(
+        self, probes: List[Tuple[Any, Dict[str, Any], Optional[str]]]
+    ) -> Dict[Any, Any]:
+        """
+        1 aggregation cho nhiều collection: nhánh đầu chạy trên collection đầu,
+        các nhánh sau nối bằng $unionWith (MongoDB >= 4.4). Mỗi nhánh là
+        $match + $sort + $limit 1 như query đơn. Lỗi → query riêng từng nguồn.
+
+        Args:
+            probes: List (key, query config như `query`, symbol)
+
+        Returns:
+            Dict {key: datetime | Exception}
+        """
+        if not self.is_connected():
+            raise ConnectionError("Chưa kết nối đến MongoDB")
+
+        def branch(index, config, symbol):
+            column_to_check = config["column_to_check"]
+            query_filter = {}
+            if symbol and config.get("symbol_column"):
+                query_filter[config["symbol_column"]] = symbol
+            sort_direction = 1 if config.get("record_pointer", 0) == -1 else -1
+            return [
+                {"$match": query_filter},
+                {"$sort": {column_to_check: sort_direction}},
+                {"$limit": 1},
+                {
+                    "$project": {
+                        "_id": 0,
+                        "key": {"$literal": index},
+                        "value": f"${column_to_check}",
+                    }
+                },
+            ]
+
+        for _, config, _ in probes:
+            self.validate_config(config, ["collection_name", "column_to_check"])
+
+        pipeline = branch(0, probes[0][1], probes[0][2])
+        for index, (_, config, symbol) in enumerate(probes[1:], start=1):
+            pipeline.append(
+                {
+                    "$unionWith": {
+                        "coll": config["collection_name"],
+                        "pipeline": branch(index, config, symbol),
+                    }
+                }
+            )
+
+        try:
+            docs = self.db[probes[0][1]["collection_name"]].aggregate(pipeline)
+            values = {probes[doc["key"]][0]: doc.get("value") for doc in docs}
+        except Exception as e:
+            self.logger.warning(
+                f"Lỗi query MongoDB (union): {str(e)} - query riêng từng nguồn"
+            )
+            return super().query_union(probes)
+
+        return self.convert_values(values)
+
     def close(self) -> None:
         """
-        Đóng MongoDB connection
+        Đóng MongoDB connection (MongoClient dùng chung chỉ đóng khi connector
+        cuối cùng dùng nó đóng)
         """
         try:
             if self.client:
-                self.client.close()
-                self.logger.info("Đã đóng kết nối MongoDB")
+                with MongoDBConnector._clients_lock:
+                    entry = MongoDBConnector._clients.get(self._client_key)
+                    last = entry is None or entry[0] is not self.client or entry[1] <= 1
+                    if entry is not None and entry[0] is self.client:
+                        entry[1] -= 1
+                        if last:
+                            del MongoDBConnector._clients[self._client_key]
+                if last:
+                    self.client.close()
+                    self.logger.info("Đã đóng kết nối MongoDB")
         except Exception as e:
             self.logger.error(f"Lỗi đóng kết nối MongoDB: {str(e)}")
         finally:
@@ -197,7 +332,7 @@ class MongoDBConnector(BaseDatabaseConnector):
         try:
             collection = self.db[collection_name]
             symbols = collection.distinct(symbol_column)
-            return sorted(symbols)
+            return sorted(s for s in symbols if s is not None)
         except Exception as e:
             self.logger.error(f"Lỗi lấy DISTINCT symbols từ MongoDB: {str(e)}")
             raise
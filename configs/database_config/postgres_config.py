@@ -1,6 +1,6 @@
 """PostgreSQL Connector - Kết nối và query PostgreSQL"""
 
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from datetime import datetime
 from configs.database_config.base_db import BaseDatabaseConnector
 
@@ -11,32 +11,76 @@ class PostgreSQLConnector(BaseDatabaseConnector):
 
     Hỗ trợ:
     - Connection pooling
-    - Auto-reconnect khi connection bị đóng
+    - Auto-reconnect khi connection bị đóng: liveness kiểm tra lười - không
+      `SELECT 1` trước mỗi query, chỉ khi query gặp lỗi mất kết nối mới
+      reconnect và chạy lại 1 lần (xem `_execute`)
+    - Autocommit: query chỉ đọc, không cần BEGIN/transaction mở giữa các probe
     """
 
     def __init__(self, logger):
         super().__init__(logger)
+        self._connect_config: Optional[Dict[str, Any]] = None
 
     def is_connected(self) -> bool:
         """
-        Check xem PostgreSQL connection còn active không
+        Check xem PostgreSQL connection còn mở không (không round trip tới server;
+        connection chết phía server được phát hiện khi query - xem `_execute`)
 
         Returns:
-            True nếu connected và active, False nếu không
+            True nếu connection còn mở, False nếu không
         """
-        if self.connection is None:
-            return False
+        return self.connection is not None and not self.connection.closed
+
+    def ping(self) -> bool:
+        """
+        Keepalive: `SELECT 1` (reconnect nếu connection đã chết)
 
+        Returns:
+            True nếu connection dùng được
+        """
         try:
-            # Test connection bằng cách execute simple query
-            with self.connection.cursor() as cursor:
-                cursor.execute("SELECT 1")
+            self._execute("SELECT 1")
             return True
-        except Exception:
-            # Connection đã bị đóng hoặc không còn hoạt động
-            # KHÔNG set self.connection = None để tránh ảnh hưởng các connection pool khác
+        except Exception as e:
+            self.logger.warning(f"Keepalive PostgreSQL lỗi: {str(e)}")
             return False
 
+    def _execute(self, query: str, params=None, fetch: str = "one") -> Any:
+        """
+        Chạy query; lỗi mất kết nối (OperationalError/InterfaceError và connection
+        đã bị đóng) → reconnect và chạy lại đúng 1 lần
+
+        Lỗi khác (SQL sai, statement timeout...) được raise nguyên trạng.
+
+        Args:
+            query: Câu SQL
+            params: Tham số của query
+            fetch: "one" (fetchone) hoặc "all" (fetchall)
+
+        Returns:
+            Row hoặc list row
+
+        Raises:
+            ConnectionError: Vẫn mất kết nối sau khi reconnect
+        """
+        import psycopg2
+
+        for attempt in range(2):
+            try:
+                with self.connection.cursor() as cursor:
+                    cursor.execute(query, params)
+                    return cursor.fetchone() if fetch == "one" else cursor.fetchall()
+            except (psycopg2.OperationalError, psycopg2.InterfaceError) as e:
+                if not self.connection.closed:
+                    raise
+                if attempt == 1 or self._connect_config is None:
+                    raise ConnectionError(f"Mất kết nối PostgreSQL: {str(e)}") from e
+                self.logger.warning(
+                    f"Connection PostgreSQL đã bị đóng ({str(e).strip()}), reconnect và thử lại"
+                )
+                self.close()
+                self.connect(self._connect_config)
+
     def connect(self, config: Dict[str, Any]) -> Any:
         """
         Kết nối đến PostgreSQL
@@ -80,6 +124,8 @@ class PostgreSQLConnector(BaseDatabaseConnector):
                 user=username,
                 password=password,
             )
+            self.connection.autocommit = True
+            self._connect_config = dict(config)
 
             return self.connection
 
@@ -139,30 +185,25 @@ class PostgreSQLConnector(BaseDatabaseConnector):
             params.append(symbol)
 
         try:
-            with self.connection.cursor() as cursor:
-                cursor.execute(query, params)
-                result = cursor.fetchone()
+            result = self._execute(query, params)
 
-                if result and result[0] is not None:
-                    latest_time = result[0]
+            if result and result[0] is not None:
+                latest_time = result[0]
 
-                    # Sử dụng ConvertDatetimeUtil để handle tất cả các type
-                    from utils.convert_datetime_util import ConvertDatetimeUtil
+                # Sử dụng ConvertDatetimeUtil để handle tất cả các type
+                from utils.convert_datetime_util import ConvertDatetimeUtil
 
-                    try:
-                        return ConvertDatetimeUtil.convert_str_to_datetime(latest_time)
-                    except ValueError as e:
-                        raise ValueError(
-                            f"Không thể convert {type(latest_time)} ({latest_time}) thành datetime: {e}"
-                        )
-                else:
-                    raise ValueError("Query không trả về kết quả")
+                try:
+                    return ConvertDatetimeUtil.convert_str_to_datetime(latest_time)
+                except ValueError as e:
+                    raise ValueError(
+                        f"Không thể convert {type(latest_time)} ({latest_time}) thành datetime: {e}"
+                    )
+            else:
+                raise ValueError("Query không trả về kết quả")
 
         except Exception as e:
-            # Kiểm tra nếu là lỗi connection closed
-            error_str = str(e).lower()
-            if "closed" in error_str or "terminate" in error_str:
-                # KHÔNG set self.connection = None - để database pool manager xử lý
+            if isinstance(e, ConnectionError):
                 self.logger.error(
                     f"Lỗi query PostgreSQL: {str(e)} - Connection có thể đã bị đóng bởi server"
                 )
@@ -170,6 +211,109 @@ class PostgreSQLConnector(BaseDatabaseConnector):
                 self.logger.error(f"Lỗi query PostgreSQL: {str(e)}")
             raise
 
+    def query_many(
+        self, config: Dict[str, Any], symbols: List[str]
+    ) -> Dict[str, Any]:
+        """
+        1 query GROUP BY cho nhiều symbol:
+        SELECT symbol, MAX(col) FROM table WHERE symbol = ANY(%s) GROUP BY symbol
+
+        Args:
+            config: Dict như `query` (bắt buộc symbol_column)
+            symbols: Danh sách symbol
+
+        Returns:
+            Dict {symbol: datetime | ValueError}; symbol không có dữ liệu không có trong dict
+        """
+        if not self.is_connected():
+            raise ConnectionError(
+                "Connection đã bị đóng hoặc chưa kết nối đến PostgreSQL"
+            )
+
+        self.validate_config(config, ["table", "column_to_check", "symbol_column"])
+
+        table_name = config["table"]
+        column_to_check = config["column_to_check"]
+        symbol_column = config["symbol_column"]
+        agg_func = "MIN" if config.get("record_pointer", 0) == -1 else "MAX"
+
+        query = (
+            f"SELECT {symbol_column}, {agg_func}({column_to_check}) FROM {table_name} "
+            f"WHERE {symbol_column} = ANY(%s) GROUP BY {symbol_column}"
+        )
+
+        try:
+            rows = self._execute(query, (list(symbols),), fetch="all")
+        except Exception as e:
+            if isinstance(e, ConnectionError):
+                self.logger.error(
+                    f"Lỗi query PostgreSQL (batch): {str(e)} - Connection có thể đã bị đóng bởi server"
+                )
+            else:
+                self.logger.error(f"Lỗi query PostgreSQL (batch): {str(e)}")
+            raise
+
+        return self.convert_values({str(symbol): value for symbol, value in rows})
+
+    def query_union(
+        self, probes: List[Tuple[Any, Dict[str, Any], Optional[str]]]
+    ) -> Dict[Any, Any]:
+        """
+        1 query cho nhiều nguồn trong cùng database, mỗi nguồn 1 cột scalar subquery:
+        SELECT (SELECT MAX(c1) FROM t1), (SELECT MAX(c2) FROM t2 WHERE s = %s), ...
+
+        Scalar subquery giữ nguyên kiểu của từng cột (UNION ALL bắt các nhánh
+        cùng kiểu); mỗi subquery vẫn dùng index như query đơn. Query gộp lỗi
+        (vd 1 bảng sai tên) → rollback và query riêng từng nguồn.
+
+        Args:
+            probes: List (key, query config như `query`, symbol)
+
+        Returns:
+            Dict {key: datetime | Exception}
+        """
+        if not self.is_connected():
+            raise ConnectionError(
+                "Connection đã bị đóng hoặc chưa kết nối đến PostgreSQL"
+            )
+
+        columns = []
+        params = []
+        for index, (_, config, symbol) in enumerate(probes):
+            self.validate_config(config, ["table", "column_to_check"])
+            agg_func = "MIN" if config.get("record_pointer", 0) == -1 else "MAX"
+            subquery = f"SELECT {agg_func}({config['column_to_check']}) FROM {config['table']}"
+            if symbol and config.get("symbol_column"):
+                subquery += f" WHERE {config['symbol_column']} = %s"
+                params.append(symbol)
+            columns.append(f"({subquery}) AS v{index}")
+
+        try:
+            row = self._execute("SELECT " + ", ".join(columns), params)
+        except Exception as e:
+            if isinstance(e, ConnectionError):
+                self.logger.error(
+                    f"Lỗi query PostgreSQL (union): {str(e)} - Connection có thể đã bị đóng bởi server"
+                )
+                raise
+            self.logger.warning(
+                f"Lỗi query PostgreSQL (union): {str(e)} - query riêng từng nguồn"
+            )
+            self.recover_after_error()
+            return super().query_union(probes)
+
+        return self.convert_values(
+            {key: row[index] for index, (key, _, _) in enumerate(probes)}
+        )
+
+    def recover_after_error(self) -> None:
+        """Rollback transaction bị abort để các query sau chạy được"""
+        try:
+            if self.connection is not None:
+                self.connection.rollback()
+        except Exception:
+            pass
+
     def close(self) -> None:
         """
         Đóng PostgreSQL connection
@@ -211,16 +355,11 @@ class PostgreSQLConnector(BaseDatabaseConnector):
         try:
             query = f"SELECT DISTINCT {symbol_column} FROM {table_name} ORDER BY {symbol_column}"
 
-            with self.connection.cursor() as cursor:
-                cursor.execute(query)
-                results = cursor.fetchall()
-                return [row[0] for row in results]
+            results = self._execute(query, fetch="all")
+            return [row[0] for row in results]
 
         except Exception as e:
-            # Kiểm tra nếu là lỗi connection closed
-            error_str = str(e).lower()
-            if "closed" in error_str or "terminate" in error_str:
-                # KHÔNG set self.connection = None - để database pool manager xử lý
+            if isinstance(e, ConnectionError):
                 self.logger.error(
                     f"Lỗi lấy DISTINCT symbols từ PostgreSQL: {str(e)} - Connection có thể đã bị đóng bởi server"
                 )
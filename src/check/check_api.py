@@ -1,51 +1,367 @@
-import asyncio
 from datetime import datetime
 
-import requests
 from utils.convert_datetime_util import ConvertDatetimeUtil
 from logic_check.time_validator import TimeValidator
 from logic_check.data_validator import DataValidator
+from logic_check.probe_policy import AdaptiveProbePolicy
 from utils.alert_tracker_util import AlertTracker
 
 from configs.logging_config import LoggerConfig
 from utils.task_manager_util import TaskManager
-from utils.load_config_util import LoadConfigUtil
+from utils.task_reconciler_util import TaskReconciler
+from utils.scheduler_util import CheckScheduler
 from utils.platform_util.platform_manager import PlatformManager
 from utils.symbol_resolver_util import SymbolResolverUtil
+from utils.source_config_util import SourceConfigUtil
+from utils.single_flight_util import SingleFlightUtil
+from utils.bulkhead_util import BulkheadUtil
+from utils.api_batch_util import ApiBatchUtil
+from utils.json_stream_util import JsonStreamUtil
+from utils.circuit_breaker_util import CircuitBreakerUtil
+from utils.latency_util import LatencyUtil
+from utils.push_subscription_util import PushSubscriptionUtil
+from utils.http_client_util import (
+    HttpClientUtil,
+    HttpConnectionError,
+    HttpStatusError,
+    HttpTimeoutError,
+)
 
 
 class CheckAPI:
     """Class kiểm tra data freshness từ API endpoints"""
 
-    def __init__(self):
+    def __init__(self, scheduler=None, shard=None):
+        """
+        Args:
+            scheduler: CheckScheduler dùng chung (mặc định tạo scheduler riêng)
+            shard: ShardFilter khi chạy nhiều worker process (None = tất cả item)
+        """
         self.logger_api = LoggerConfig.logger_config("CheckAPI", "api.log")
         self.task_manager_api = TaskManager()
         self.platform_util = PlatformManager()
+        self.scheduler = scheduler or CheckScheduler()
+        self.shard = shard
 
         # Sử dụng AlertTracker để quản lý tất cả tracking
         self.tracker = AlertTracker()
+        # Giãn chu kỳ probe cho item stale kéo dài / low-activity
+        self.probe_policy = AdaptiveProbePolicy()
+        # Version config lần cuối đã dọn push subscription
+        self._push_version = None
 
     def _load_config(self):
         """
-        Load config từ JSON file (gọi mỗi chu kỳ check)
+        Lấy config đã compile (chỉ build lại khi file đổi version)
+
+        Returns:
+            Dict {api_name: SourceConfig} với api.enable = true
+        """
+        compiled = SourceConfigUtil.get_compiled()
+        if compiled.version != self._push_version:
+            # Config đổi: dừng push stream của nguồn đã bị xóa/tắt
+            PushSubscriptionUtil.prune(compiled.api_sources)
+            self._push_version = compiled.version
+        return compiled.api_sources
+
+    @staticmethod
+    def _phase_key(api_name, api_config, symbol):
+        """Các symbol của nguồn batch dùng chung pha để đến hạn cùng lúc"""
+        if symbol is not None and api_config.api.batch is not None:
+            return api_name
+        return TaskReconciler.display_name(api_name, symbol)
+
+    @staticmethod
+    def _extract_data_array(response, nested_list):
+        """
+        Lấy mảng record từ response API (kiểm tra wrapper code/message)
+
+        Args:
+            response: Response JSON (dùng chung - không được sửa)
+            nested_list: True nếu API trả [[...]]
+
+        Returns:
+            List record
+
+        Raises:
+            ValueError: Response code != 200 hoặc EMPTY_DATA
+            KeyError, TypeError: Response sai format
+        """
+        # Xác định data_array dựa vào nested_list
+        if nested_list:
+            # Response format: [[{...}, {...}]]
+            # Hoặc với wrapper: {"code": 200, "data": [[{...}]]}
+            if isinstance(response, dict):
+                # Có wrapper (code, message, data)
+                response_code = response.get("code", 200)
+                response_message = response.get("message", "")
+                if response_code != 200:
+                    # Check if this is a "no data available" message (should be warning, not error)
+                    if "No data available" in response_message:
+                        raise ValueError("EMPTY_DATA")
+                    else:
+                        error_details = (
+                            f"Response code = {response_code} (không phải 200)"
+                        )
+                        if response_message:
+                            error_details += f" - {response_message}"
+                        raise ValueError(error_details)
+
+                # Lấy data từ các key phổ biến (ưu tiên 'data' trước)
+                if "data" in response:
+                    data_array = response["data"]
+                elif "result" in response:
+                    data_array = response["result"]
+                else:
+                    raise KeyError("Response không có key 'data' hoặc 'result'")
+            else:
+                # Response trực tiếp là array
+                data_array = response
+
+            # Kiểm tra data_array có phải list không
+            if not isinstance(data_array, list):
+                raise TypeError(
+                    f"Response không phải list, là {type(data_array).__name__}"
+                )
+
+            # Nested list: [[...]] -> [...]
+            if len(data_array) == 0:
+                raise ValueError("EMPTY_DATA")
+
+            if not isinstance(data_array[0], list):
+                raise TypeError(
+                    f"Nested list expected nhưng phần tử đầu tiên không phải list"
+                )
+
+            # Flatten
+            data_array = data_array[0]
+
+            if not isinstance(data_array, list):
+                raise TypeError(f"Nested array sau flatten không phải list")
+
+        else:
+            # Response format: [{...}, {...}]
+            # Hoặc với wrapper: {"code": 200, "data": [{...}]}
+            if isinstance(response, dict):
+                # Có wrapper
+                response_code = response.get("code", 200)
+                response_message = response.get("message", "")
+                if response_code != 200:
+                    # Check if this is a "no data available" message (should be warning, not error)
+                    if "No data available" in response_message:
+                        raise ValueError("EMPTY_DATA")
+                    else:
+                        error_details = f"Response code = {response_code}"
+                        if response_message:
+                            error_details += f" - {response_message}"
+                        raise ValueError(error_details)
+
+                # Lấy data từ các key phổ biến (ưu tiên 'data' trước)
+                if "data" in response:
+                    data_array = response["data"]
+                elif "result" in response:
+                    data_array = response["result"]
+                else:
+                    raise KeyError("Response không có key 'data' hoặc 'result'")
+            else:
+                # Response trực tiếp là array
+                data_array = response
+
+            # Kiểm tra data_array có phải list không
+            if not isinstance(data_array, list):
+                raise TypeError(
+                    f"Response không phải list, là {type(data_array).__name__}"
+                )
+
+        return data_array
+
+    async def _probe(self, uri, flight_key, request, rank, hedge=False):
+        """
+        Gửi request API qua single-flight, bulkhead, timeout thích ứng và hedge
+
+        Chỉ request thật (flight leader, hedge) giữ slot/token bulkhead của host
+        và được đo latency: caller chờ chung flight hoặc trúng micro-TTL không
+        tốn slot và không ghi mẫu vào phân bố của endpoint.
+
+        Args:
+            uri: URL request
+            flight_key: Key single-flight (các item cùng key chỉ request 1 lần)
+            request: Hàm async gửi request tới backend
+            rank: Priority rank của nguồn (cho bulkhead)
+            hedge: Gửi request hedge khi probe chậm hơn p95
 
         Returns:
-            Dict chứa các API config với api.enable = true
+            Kết quả của request (dùng chung - không được sửa)
         """
-        all_config = LoadConfigUtil.load_json_to_variable("data_sources_config.json")
-        # Filter chỉ lấy những config có api.enable = true
-        return {
-            k: v for k, v in all_config.items() if v.get("api", {}).get("enable", False)
-        }
+        target = BulkheadUtil.host_target(uri)
+        latency_key = LatencyUtil.endpoint_key(uri)
+
+        async def fetch():
+            # Giới hạn số request đồng thời/QPS theo host, ưu tiên theo priority
+            async with BulkheadUtil.limit(target, rank):
+                return await LatencyUtil.measure(latency_key, request)
+
+        return await LatencyUtil.call(
+            latency_key,
+            lambda: SingleFlightUtil.do_async(flight_key, fetch),
+            hedge_fetch=fetch if hedge else None,
+        )
+
+    async def _fetch_json(self, uri, rank, hedge=False):
+        """
+        Gọi API và parse toàn bộ response JSON
+
+        Args:
+            uri: URL request
+            rank: Priority rank của nguồn (cho bulkhead)
+            hedge: Gửi request hedge khi probe chậm hơn p95
+
+        Returns:
+            Response JSON (dùng chung - không được sửa)
+        """
+        # Các item cùng URL (khác nguồn/checker) gọi cùng lúc chỉ request 1 lần
+        return await self._probe(
+            uri,
+            ("api", SingleFlightUtil.normalize_url(uri)),
+            lambda: HttpClientUtil.get_json(uri),
+            rank,
+            hedge,
+        )
+
+    async def _fetch_data_array(self, uri, nested_list, rank, hedge=False):
+        """
+        Gọi API và lấy mảng record
+
+        Args:
+            uri: URL request
+            nested_list: True nếu API trả [[...]]
+            rank: Priority rank của nguồn (cho bulkhead)
+            hedge: Gửi request hedge khi probe chậm hơn p95
+
+        Returns:
+            List record (dùng chung - không được sửa)
+        """
+        response = await self._fetch_json(uri, rank, hedge)
+        return self._extract_data_array(response, nested_list)
+
+    async def _fetch_records(self, uri, api_cfg, rank, hedge=False):
+        """
+        Gọi API và stream body, chỉ lấy record tại record_pointer
+
+        Args:
+            uri: URL request
+            api_cfg: ApiSourceConfig của nguồn
+            rank: Priority rank của nguồn (cho bulkhead)
+            hedge: Gửi request hedge khi probe chậm hơn p95
+
+        Returns:
+            PartialArray (dùng chung - không được sửa)
+        """
+        # Key gồm cả cách extract: cùng URL nhưng khác record_pointer là 2 kết quả khác
+        key = (
+            "api_records",
+            SingleFlightUtil.normalize_url(uri),
+            api_cfg.record_pointer,
+            api_cfg.nested_list,
+        )
+        return await self._probe(
+            uri, key, lambda: JsonStreamUtil.fetch_records(uri, api_cfg), rank, hedge
+        )
+
+    async def _fetch_path_value(self, uri, api_cfg, rank, hedge=False):
+        """
+        Gọi API và lấy giá trị theo api.path (giữ max_bytes/conditional như stream)
+
+        Args:
+            uri: URL request
+            api_cfg: ApiSourceConfig của nguồn
+            rank: Priority rank của nguồn (cho bulkhead)
+            hedge: Gửi request hedge khi probe chậm hơn p95
+
+        Returns:
+            Giá trị tại path (dùng chung - không được sửa)
+        """
+        key = ("api_path", SingleFlightUtil.normalize_url(uri), api_cfg.path.expr)
+        return await self._probe(
+            uri, key, lambda: JsonStreamUtil.fetch_path_value(uri, api_cfg), rank, hedge
+        )
+
+    async def _fetch_header_record(self, uri, api_cfg, rank, hedge=False):
+        """
+        HEAD API và lấy timestamp từ header api.head_header
+
+        Args:
+            uri: URL request
+            api_cfg: ApiSourceConfig của nguồn
+            rank: Priority rank của nguồn (cho bulkhead)
+            hedge: Gửi request hedge khi probe chậm hơn p95
+
+        Returns:
+            PartialArray 1 record {column_to_check: giá trị header}
+        """
+
+        def fetch_header():
+            return JsonStreamUtil.fetch_header_record(
+                uri, api_cfg.head_header, api_cfg.column_to_check
+            )
+
+        key = (
+            "api_head",
+            SingleFlightUtil.normalize_url(uri),
+            api_cfg.head_header,
+            api_cfg.column_to_check,
+        )
+        return await self._probe(uri, key, fetch_header, rank, hedge)
+
+    def _report_host_down(self, host, api_name, api_config, uri):
+        """
+        Alert cấp host khi circuit breaker của host đang mở (1 alert cho mọi
+        nguồn/symbol trên host, theo alert_frequency)
+
+        Args:
+            host: host[:port]
+            api_name: Tên API config của item
+            api_config: SourceConfig của item
+            uri: URL của item
+
+        Returns:
+            Số giây tới lần kiểm tra kế tiếp
+        """
+        check_cfg = api_config.check
+        host_key = f"host:{host}"
+        if self.tracker.should_send_alert(host_key, check_cfg.alert_frequency):
+            retry_after = CircuitBreakerUtil.retry_after(host)
+            error_message = (
+                f"Không thể kết nối đến server {host}. Tạm dừng probe tất cả "
+                f"nguồn trên host, thử lại sau {retry_after:.0f}s"
+            )
+            self.logger_api.error(f"Lỗi API: {error_message} (từ {api_name})")
+            self.platform_util.send_alert(
+                api_name=host,
+                symbol=None,
+                overdue_seconds=0,
+                allow_delay=check_cfg.allow_delay,
+                check_frequency=check_cfg.check_frequency,
+                alert_frequency=check_cfg.alert_frequency,
+                alert_level="error",
+                error_message=error_message,
+                error_type="API",
+                source_info={"type": "API", "url": uri},
+            )
+            self.tracker.record_alert_sent(host_key)
+        return check_cfg.check_frequency
 
     async def check_data_api(self, api_name, api_config, symbol=None):
         """
-        Hàm logic kiểm tra data từ API chạy liên tục
+        Chạy 1 lần kiểm tra data từ API (được CheckScheduler gọi theo lịch)
 
         Args:
             api_name: Tên API config
-            api_config: Dict cấu hình API
+            api_config: SourceConfig đã compile của API
             symbol: Optional symbol để filter
+
+        Returns:
+            Số giây tới lần kiểm tra kế tiếp
         """
         # Tạo display name trước
         if symbol:
@@ -53,210 +369,135 @@ class CheckAPI:
         else:
             display_name = api_name
 
-        while True:
-            # Reload config mỗi lần loop để nhận config mới
-            # (LoadConfigUtil có cache, chỉ reload khi file thay đổi)
-            all_config = self._load_config()
-            api_config = all_config.get(api_name, api_config)
-
-            # Đọc config từ cấu trúc mới
-            api_cfg = api_config.get("api", {})
-            check_cfg = api_config.get("check", {})
-            schedule_cfg = api_config.get("schedule", {})
-            symbols_cfg = api_config.get("symbols", {})
-
-            uri = api_cfg.get("url")
-            record_pointer = api_cfg.get("record_pointer", 0)
-            column_to_check = api_cfg.get("column_to_check", "datetime")
-            nested_list = api_cfg.get("nested_list", False)  # True nếu API trả [[...]]
-
-            timezone_offset = check_cfg.get("timezone_offset", 7)
-            allow_delay = check_cfg.get("allow_delay", 60)
-            alert_frequency = check_cfg.get("alert_frequency", 60)
-            check_frequency = check_cfg.get("check_frequency", 10)
-
-            valid_schedule = schedule_cfg
-
-            if symbol:
-                uri = uri.format(symbol=symbol)
-
-            # Kiểm tra holidays: nếu là ngày lễ thì gửi alert 1 lần và không gửi alert stale nữa
-            holidays = valid_schedule.get("holidays") if valid_schedule else None
-            is_holiday = False
-            if holidays:
-                current_date = datetime.now().date()
-                for holiday_str in holidays:
-                    try:
-                        if " " in holiday_str:
-                            holiday_date = datetime.strptime(
-                                holiday_str, "%Y-%m-%d %H:%M:%S"
-                            ).date()
-                        else:
-                            holiday_date = datetime.strptime(
-                                holiday_str, "%Y-%m-%d"
-                            ).date()
-
-                        if current_date == holiday_date:
-                            is_holiday = True
-                            break
-                    except ValueError:
-                        continue
-
-            if is_holiday:
-                # Gửi alert 1 lần duy nhất khi là ngày lễ
-                if not getattr(self.tracker, "holiday_alert_sent", {}).get(
-                    display_name, False
-                ):
-                    # Gửi alert báo ngày lễ
-                    source_info = {"type": "API", "url": uri}
-                    alert_message = f"Hôm nay là ngày lễ, hệ thống sẽ không gửi alert về dữ liệu quá hạn"
-
-                    self.platform_util.send_alert(
-                        api_name=api_name,
-                        symbol=symbol,
-                        overdue_seconds=0,
-                        allow_delay=allow_delay,
-                        check_frequency=check_frequency,
-                        alert_frequency=alert_frequency,
-                        alert_level="info",
-                        error_message=alert_message,
-                        source_info=source_info,
-                    )
+        # Lấy config mới nhất mỗi lần check (model chỉ compile lại khi config đổi)
+        api_config = self._load_config().get(api_name, api_config)
 
-                    if not hasattr(self.tracker, "holiday_alert_sent"):
-                        self.tracker.holiday_alert_sent = {}
-                    self.tracker.holiday_alert_sent[display_name] = True
+        api_cfg = api_config.api
+        check_cfg = api_config.check
+        schedule_cfg = api_config.schedule
 
-                    self.logger_api.info(
-                        f"Đã gửi alert thông báo ngày lễ cho {display_name}"
-                    )
+        uri = api_cfg.url_for(symbol)
+        record_pointer = api_cfg.record_pointer
+        column_to_check = api_cfg.column_to_check
+        nested_list = api_cfg.nested_list  # True nếu API trả [[...]]
 
-                # Vẫn check nhưng không gửi alert stale - tiếp tục xuống dưới
+        timezone_offset = check_cfg.timezone_offset
+        allow_delay = check_cfg.allow_delay
+        alert_frequency = check_cfg.alert_frequency
+        check_frequency = check_cfg.check_frequency
 
-            # Kiểm tra valid_schedule: chỉ check trong khoảng thời gian và ngày được phép
-            is_within_schedule = TimeValidator.is_within_valid_schedule(
-                valid_schedule, timezone_offset
-            )
+        # Kiểm tra holidays: nếu là ngày lễ thì gửi alert 1 lần và không gửi alert stale nữa
+        is_holiday = schedule_cfg.is_holiday(datetime.now().date())
 
-            if not is_within_schedule:
-                # Chỉ log 1 lần khi vào trạng thái ngoài giờ
-                if not self.tracker.outside_schedule_logged.get(display_name, False):
-                    self.logger_api.info(
-                        f"Ngoài lịch kiểm tra cho {display_name}, tạm dừng..."
-                    )
-                    self.tracker.outside_schedule_logged[display_name] = True
-
-                await asyncio.sleep(60)
-                continue
-            else:
-                # Reset flag khi vào lại trong giờ
-                if self.tracker.outside_schedule_logged.get(display_name, False):
-                    self.logger_api.info(
-                        f"Trong lịch kiểm tra cho {display_name}, tiếp tục..."
-                    )
-                    self.tracker.outside_schedule_logged[display_name] = False
-
-            # Reset holiday flag chỉ khi không phải ngày lễ
-            if not is_holiday and getattr(self.tracker, "holiday_logged", {}).get(
+        if is_holiday:
+            # Gửi alert 1 lần duy nhất khi là ngày lễ
+            if not getattr(self.tracker, "holiday_alert_sent", {}).get(
                 display_name, False
             ):
-                self.logger_api.info(
-                    f"Không phải ngày lễ, tiếp tục kiểm tra {display_name}"
+                # Gửi alert báo ngày lễ
+                source_info = {"type": "API", "url": uri}
+                alert_message = f"Hôm nay là ngày lễ, hệ thống sẽ không gửi alert về dữ liệu quá hạn"
+
+                self.platform_util.send_alert(
+                    api_name=api_name,
+                    symbol=symbol,
+                    overdue_seconds=0,
+                    allow_delay=allow_delay,
+                    check_frequency=check_frequency,
+                    alert_frequency=alert_frequency,
+                    alert_level="info",
+                    error_message=alert_message,
+                    source_info=source_info,
                 )
-                self.tracker.holiday_logged[display_name] = False
-
-            try:
-                r = requests.get(url=uri, timeout=10)
-                r.raise_for_status()
-
-                response = r.json()
-
-                # Xác định data_array dựa vào nested_list
-                if nested_list:
-                    # Response format: [[{...}, {...}]]
-                    # Hoặc với wrapper: {"code": 200, "data": [[{...}]]}
-                    if isinstance(response, dict):
-                        # Có wrapper (code, message, data)
-                        response_code = response.get("code", 200)
-                        response_message = response.get("message", "")
-                        if response_code != 200:
-                            # Check if this is a "no data available" message (should be warning, not error)
-                            if "No data available" in response_message:
-                                raise ValueError("EMPTY_DATA")
-                            else:
-                                error_details = (
-                                    f"Response code = {response_code} (không phải 200)"
-                                )
-                                if response_message:
-                                    error_details += f" - {response_message}"
-                                raise ValueError(error_details)
-
-                        # Lấy data từ các key phổ biến (ưu tiên 'data' trước)
-                        if "data" in response:
-                            data_array = response["data"]
-                        elif "result" in response:
-                            data_array = response["result"]
-                        else:
-                            raise KeyError("Response không có key 'data' hoặc 'result'")
-                    else:
-                        # Response trực tiếp là array
-                        data_array = response
-
-                    # Kiểm tra data_array có phải list không
-                    if not isinstance(data_array, list):
-                        raise TypeError(
-                            f"Response không phải list, là {type(data_array).__name__}"
-                        )
 
-                    # Nested list: [[...]] -> [...]
-                    if len(data_array) == 0:
-                        raise ValueError("EMPTY_DATA")
+                if not hasattr(self.tracker, "holiday_alert_sent"):
+                    self.tracker.holiday_alert_sent = {}
+                self.tracker.holiday_alert_sent[display_name] = True
 
-                    if not isinstance(data_array[0], list):
-                        raise TypeError(
-                            f"Nested list expected nhưng phần tử đầu tiên không phải list"
-                        )
+                self.logger_api.info(
+                    f"Đã gửi alert thông báo ngày lễ cho {display_name}"
+                )
 
-                    # Flatten
-                    data_array = data_array[0]
+            # Vẫn check nhưng không gửi alert stale - tiếp tục xuống dưới
 
-                    if not isinstance(data_array, list):
-                        raise TypeError(f"Nested array sau flatten không phải list")
+        # Kiểm tra valid_schedule: chỉ check trong khoảng thời gian và ngày được phép
+        is_within_schedule = TimeValidator.is_within_compiled_schedule(
+            schedule_cfg
+        )
 
-                else:
-                    # Response format: [{...}, {...}]
-                    # Hoặc với wrapper: {"code": 200, "data": [{...}]}
-                    if isinstance(response, dict):
-                        # Có wrapper
-                        response_code = response.get("code", 200)
-                        response_message = response.get("message", "")
-                        if response_code != 200:
-                            # Check if this is a "no data available" message (should be warning, not error)
-                            if "No data available" in response_message:
-                                raise ValueError("EMPTY_DATA")
-                            else:
-                                error_details = f"Response code = {response_code}"
-                                if response_message:
-                                    error_details += f" - {response_message}"
-                                raise ValueError(error_details)
-
-                        # Lấy data từ các key phổ biến (ưu tiên 'data' trước)
-                        if "data" in response:
-                            data_array = response["data"]
-                        elif "result" in response:
-                            data_array = response["result"]
-                        else:
-                            raise KeyError("Response không có key 'data' hoặc 'result'")
-                    else:
-                        # Response trực tiếp là array
-                        data_array = response
+        if not is_within_schedule:
+            # Chỉ log 1 lần khi vào trạng thái ngoài giờ
+            if not self.tracker.outside_schedule_logged.get(display_name, False):
+                self.logger_api.info(
+                    f"Ngoài lịch kiểm tra cho {display_name}, tạm dừng..."
+                )
+                self.tracker.outside_schedule_logged[display_name] = True
 
-                    # Kiểm tra data_array có phải list không
-                    if not isinstance(data_array, list):
-                        raise TypeError(
-                            f"Response không phải list, là {type(data_array).__name__}"
-                        )
+            # Ngủ tới đúng lúc lịch mở lại (không poll mỗi 60 giây)
+            wake_delay = TimeValidator.seconds_until_schedule_opens(schedule_cfg)
+            return wake_delay if wake_delay is not None else 60
+        else:
+            # Reset flag khi vào lại trong giờ
+            if self.tracker.outside_schedule_logged.get(display_name, False):
+                self.logger_api.info(
+                    f"Trong lịch kiểm tra cho {display_name}, tiếp tục..."
+                )
+                self.tracker.outside_schedule_logged[display_name] = False
+
+        # Reset holiday flag chỉ khi không phải ngày lễ
+        if not is_holiday and getattr(self.tracker, "holiday_logged", {}).get(
+            display_name, False
+        ):
+            self.logger_api.info(
+                f"Không phải ngày lễ, tiếp tục kiểm tra {display_name}"
+            )
+            self.tracker.holiday_logged[display_name] = False
+
+        # Hedge cho nguồn critical (timeout thích ứng theo latency của endpoint)
+        rank = check_cfg.priority_rank
+        hedge = LatencyUtil.should_hedge(check_cfg.priority)
+
+        # Push stream: dùng giá trị mới nhất nhận qua SSE/WebSocket, không polling
+        pushed_value = None
+        if api_cfg.push is not None:
+            pushed_value = PushSubscriptionUtil.get_value(api_name, api_cfg.push, symbol)
+
+        try:
+            if pushed_value is not None:
+                data_array = None
+                record_pointer_data_with_column_to_check = pushed_value
+            elif api_cfg.batch is not None and symbol is not None:
+                # Batch: gộp các symbol đến hạn cùng lúc thành 1 request/chunk
+                data_array = await ApiBatchUtil.fetch(
+                    api_name,
+                    api_cfg.batch,
+                    symbol,
+                    lambda url: self._fetch_data_array(
+                        url, nested_list, rank, hedge
+                    ),
+                )
+            elif api_cfg.head_header:
+                # HEAD: timestamp lấy từ header, không tải body
+                data_array = await self._fetch_header_record(
+                    uri, api_cfg, rank, hedge
+                )
+            elif api_cfg.path is not None:
+                # Path đã compile: lấy thẳng giá trị trong response
+                data_array = None
+                record_pointer_data_with_column_to_check = await self._fetch_path_value(
+                    uri, api_cfg, rank, hedge
+                )
+            elif api_cfg.streaming:
+                # Stream body, chỉ giữ record tại record_pointer
+                data_array = await self._fetch_records(
+                    uri, api_cfg, rank, hedge
+                )
+            else:
+                data_array = await self._fetch_data_array(
+                    uri, nested_list, rank, hedge
+                )
 
+            if data_array is not None:
                 # Kiểm tra mảng rỗng + code=200 → WARNING (chưa có data vào thời điểm này)
                 if len(data_array) == 0:
                     raise ValueError("EMPTY_DATA")
@@ -284,249 +525,226 @@ class CheckAPI:
                     column_to_check
                 ]
 
-                error_message = "Không có dữ liệu mới"
-                api_error = False
+            error_message = "Không có dữ liệu mới"
+            api_error = False
 
-            except requests.exceptions.ConnectionError:
-                error_message = (
-                    "Không thể kết nối đến server. Server có thể đã dừng hoặc bị lỗi"
-                )
-                error_type = "API"
-                api_error = True
-                self.logger_api.error(f"Lỗi API: {error_message} cho {display_name}")
-            except requests.exceptions.HTTPError as e:
-                error_message = f"HTTP {e.response.status_code}"
-                error_type = "API"
-                api_error = True
-                self.logger_api.error(f"Lỗi API: {error_message} cho {display_name}")
-            except ValueError as e:
-                error_str = str(e)
-                # Code != 200 hoặc lỗi giá trị khác → ERROR
-                if "Response code" in error_str:
-                    error_message = error_str
-                    error_type = "API"
-                    api_error = True
-                    self.logger_api.error(
-                        f"Lỗi API: {error_message} cho {display_name}"
-                    )
-                # Mảng rỗng + code=200 → WARNING (chưa có data vào thời điểm này)
-                elif "EMPTY_DATA" in error_str:
-                    error_message = "Chưa có dữ liệu vào thời điểm này"
-                    error_type = "API_WARNING"
-                    api_error = True
-
-                    self.logger_api.warning(
-                        f"Cảnh báo API: {error_message} cho {display_name}"
-                    )
-                else:
-                    error_message = f"Lỗi giá trị - {error_str}"
-                    error_type = "API"
-                    api_error = True
-                    self.logger_api.error(
-                        f"Lỗi API: {error_message} cho {display_name}"
-                    )
-            except (KeyError, IndexError, TypeError) as e:
-                # Format sai - đây mới là ERROR thật sự
-                error_message = f"Dữ liệu không đúng format - {str(e)}"
+        except HttpConnectionError as e:
+            host = getattr(e, "host", None) or CircuitBreakerUtil.host_of(uri)
+            if CircuitBreakerUtil.is_open(host):
+                # Host đang down: gộp lỗi của mọi item thành 1 alert cấp host
+                return self._report_host_down(host, api_name, api_config, uri)
+            error_message = (
+                "Không thể kết nối đến server. Server có thể đã dừng hoặc bị lỗi"
+            )
+            error_type = "API"
+            api_error = True
+            self.logger_api.error(f"Lỗi API: {error_message} cho {display_name}")
+        except HttpTimeoutError as e:
+            error_message = f"Timeout - {e}"
+            error_type = "API"
+            api_error = True
+            self.logger_api.error(f"Lỗi API: {error_message} cho {display_name}")
+        except HttpStatusError as e:
+            error_message = f"HTTP {e.status}"
+            error_type = "API"
+            api_error = True
+            self.logger_api.error(f"Lỗi API: {error_message} cho {display_name}")
+        except ValueError as e:
+            error_str = str(e)
+            # Code != 200 hoặc lỗi giá trị khác → ERROR
+            if "Response code" in error_str:
+                error_message = error_str
                 error_type = "API"
                 api_error = True
-                self.logger_api.error(f"Lỗi API: {error_message} cho {display_name}")
-            except Exception as e:
-                error_message = str(e)
-                error_type = "API"
+                self.logger_api.error(
+                    f"Lỗi API: {error_message} cho {display_name}"
+                )
+            # Mảng rỗng + code=200 → WARNING (chưa có data vào thời điểm này)
+            elif "EMPTY_DATA" in error_str:
+                error_message = "Chưa có dữ liệu vào thời điểm này"
+                error_type = "API_WARNING"
                 api_error = True
-                self.logger_api.error(f"Lỗi API: {error_message} cho {display_name}")
-
-            if api_error:
-                # Xử lý lỗi API - gửi cảnh báo
-                current_time = datetime.now()
 
-                should_send_alert = self.tracker.should_send_alert(
-                    display_name, alert_frequency
+                self.logger_api.warning(
+                    f"Cảnh báo API: {error_message} cho {display_name}"
                 )
-
-                self.logger_api.info(
-                    f"API error for {display_name}: should_send_alert={should_send_alert}, error_type={error_type}"
+            else:
+                error_message = f"Lỗi giá trị - {error_str}"
+                error_type = "API"
+                api_error = True
+                self.logger_api.error(
+                    f"Lỗi API: {error_message} cho {display_name}"
                 )
+        except (KeyError, IndexError, TypeError) as e:
+            # Format sai - đây mới là ERROR thật sự
+            error_message = f"Dữ liệu không đúng format - {str(e)}"
+            error_type = "API"
+            api_error = True
+            self.logger_api.error(f"Lỗi API: {error_message} cho {display_name}")
+        except Exception as e:
+            error_message = str(e)
+            error_type = "API"
+            api_error = True
+            self.logger_api.error(f"Lỗi API: {error_message} cho {display_name}")
+
+        if api_error:
+            # Xử lý lỗi API - gửi cảnh báo
+            current_time = datetime.now()
 
-                if should_send_alert:
-                    # Build source_info với API URL
-                    source_info = {"type": "API", "url": uri}
-
-                    # Xác định alert_level dựa vào error_type
-                    if error_type == "API_WARNING":
-                        alert_level = "warning"
-                    else:
-                        alert_level = "error"
-
-                    self.logger_api.info(
-                        f"Sending {alert_level} alert for {display_name}"
-                    )
+            should_send_alert = self.tracker.should_send_alert(
+                display_name, alert_frequency
+            )
 
-                    result = self.platform_util.send_alert(
-                        api_name=api_name,
-                        symbol=symbol,
-                        overdue_seconds=0,
-                        allow_delay=allow_delay,
-                        check_frequency=check_frequency,
-                        alert_frequency=alert_frequency,
-                        alert_level=alert_level,
-                        error_message=error_message,
-                        error_type=error_type,
-                        source_info=source_info,
-                    )
+            self.logger_api.info(
+                f"API error for {display_name}: should_send_alert={should_send_alert}, error_type={error_type}"
+            )
 
-                    self.tracker.record_alert_sent(display_name)
+            if should_send_alert:
+                # Build source_info với API URL
+                source_info = {"type": "API", "url": uri}
 
-                await asyncio.sleep(check_frequency)
-                continue
+                # Xác định alert_level dựa vào error_type
+                if error_type == "API_WARNING":
+                    alert_level = "warning"
+                else:
+                    alert_level = "error"
 
-            dt_record_pointer_data_with_column_to_check = (
-                ConvertDatetimeUtil.convert_str_to_datetime(
-                    record_pointer_data_with_column_to_check
+                self.logger_api.info(
+                    f"Sending {alert_level} alert for {display_name}"
                 )
-            )
 
-            # Chuyển đổi từ múi giờ của data sang giờ local (GMT+7)
-            if timezone_offset != 7:  # Chỉ convert nếu không phải GMT+7
-                dt_record_pointer_data_with_column_to_check = (
-                    ConvertDatetimeUtil.convert_utc_to_local(
-                        dt_record_pointer_data_with_column_to_check,
-                        timezone_offset=7 - timezone_offset,
-                    )
+                result = self.platform_util.send_alert(
+                    api_name=api_name,
+                    symbol=symbol,
+                    overdue_seconds=0,
+                    allow_delay=allow_delay,
+                    check_frequency=check_frequency,
+                    alert_frequency=alert_frequency,
+                    alert_level=alert_level,
+                    error_message=error_message,
+                    error_type=error_type,
+                    source_info=source_info,
                 )
 
-            # Sử dụng DataValidator để kiểm tra dữ liệu
-            is_fresh, overdue_seconds = DataValidator.is_data_fresh(
-                dt_record_pointer_data_with_column_to_check, allow_delay
-            )
+                self.tracker.record_alert_sent(display_name)
+
+            return check_frequency
 
-            # Tính adjusted overdue nếu có time_ranges
-            active_start_time = DataValidator.get_active_start_time(
-                schedule_cfg.get("time_ranges") or [], datetime.now()
+        dt_record_pointer_data_with_column_to_check = (
+            ConvertDatetimeUtil.convert_str_to_datetime(
+                record_pointer_data_with_column_to_check
             )
+        )
 
-            if active_start_time and schedule_cfg.get("time_ranges"):
-                overdue_seconds = DataValidator.calculate_adjusted_overdue(
+        # Chuyển đổi từ múi giờ của data sang giờ local (GMT+7)
+        if timezone_offset != 7:  # Chỉ convert nếu không phải GMT+7
+            dt_record_pointer_data_with_column_to_check = (
+                ConvertDatetimeUtil.convert_utc_to_local(
                     dt_record_pointer_data_with_column_to_check,
-                    datetime.now(),
-                    schedule_cfg.get("time_ranges", []),
+                    timezone_offset=7 - timezone_offset,
                 )
-                is_fresh = overdue_seconds <= allow_delay
-
-            current_time = datetime.now()
-            current_date = current_time.strftime("%Y-%m-%d")
+            )
 
-            if is_fresh:
-                # Reset tracking
-                self.tracker.reset_fresh_data(display_name)
+        # Sử dụng DataValidator để kiểm tra dữ liệu
+        is_fresh, overdue_seconds = DataValidator.is_data_fresh(
+            dt_record_pointer_data_with_column_to_check, allow_delay
+        )
+
+        # Tính adjusted overdue nếu có time_ranges
+        time_ranges = schedule_cfg.time_ranges
+        if time_ranges and DataValidator.get_active_start_time(
+            time_ranges, datetime.now()
+        ):
+            overdue_seconds = DataValidator.calculate_adjusted_overdue(
+                dt_record_pointer_data_with_column_to_check,
+                datetime.now(),
+                time_ranges,
+            )
+            is_fresh = overdue_seconds <= allow_delay
 
-                self.logger_api.info(f"Kiểm tra API {display_name} - Có dữ liệu mới")
-                await asyncio.sleep(check_frequency)
-                continue
+        current_time = datetime.now()
+        current_date = current_time.strftime("%Y-%m-%d")
 
-            time_str = DataValidator.format_time_overdue(overdue_seconds, allow_delay)
+        if is_fresh:
+            # Reset tracking
+            self.tracker.reset_fresh_data(display_name)
 
-            # Lấy ngày của data mới nhất
-            latest_data_date = dt_record_pointer_data_with_column_to_check.strftime(
-                "%Y-%m-%d"
+            self.logger_api.info(f"Kiểm tra API {display_name} - Có dữ liệu mới")
+            self.probe_policy.observe(display_name, dt_record_pointer_data_with_column_to_check)
+            # Chỉ probe lại khi dữ liệu có thể quá hạn (nếu bật deadline_polling)
+            return DataValidator.get_next_probe_delay(
+                dt_record_pointer_data_with_column_to_check, check_cfg, schedule_cfg
             )
-            is_data_from_today = latest_data_date == current_date
 
-            # CASE 2: Data STALE - Alert normally (no max_stale suppression)
-            stale_count = self.tracker.get_stale_count()
-            total_apis = max(stale_count, 1)
+        time_str = DataValidator.format_time_overdue(overdue_seconds, allow_delay)
 
-            # Nội dung cảnh báo đồng bộ giữa log và alert
-            warning_message = f"CẢNH BÁO: Dữ liệu quá hạn {time_str} cho {display_name}"
-            self.logger_api.warning(warning_message)
+        # Lấy ngày của data mới nhất
+        latest_data_date = dt_record_pointer_data_with_column_to_check.strftime(
+            "%Y-%m-%d"
+        )
+        is_data_from_today = latest_data_date == current_date
 
-            # Không gửi alert nếu là ngày lễ
-            if not is_holiday:
-                should_send_alert = self.tracker.should_send_alert(
-                    display_name, alert_frequency
-                )
+        # CASE 2: Data STALE - Alert normally (no max_stale suppression)
+        stale_count = self.tracker.get_stale_count()
+        total_apis = max(stale_count, 1)
 
-                if should_send_alert:
-                    source_info = {"type": "API", "url": uri}
-                    self.platform_util.send_alert(
-                        api_name=api_name,
-                        symbol=symbol,
-                        overdue_seconds=overdue_seconds,
-                        allow_delay=allow_delay,
-                        check_frequency=check_frequency,
-                        alert_frequency=alert_frequency,
-                        alert_level="warning",
-                        error_message=f"Dữ liệu API quá hạn {time_str} cho {display_name}",
-                        source_info=source_info,
-                    )
-                    self.tracker.record_alert_sent(display_name)
+        # Nội dung cảnh báo đồng bộ giữa log và alert
+        warning_message = f"CẢNH BÁO: Dữ liệu quá hạn {time_str} cho {display_name}"
+        self.logger_api.warning(warning_message)
+
+        # Không gửi alert nếu là ngày lễ
+        if not is_holiday:
+            should_send_alert = self.tracker.should_send_alert(
+                display_name, alert_frequency
+            )
 
-            # Sleep theo check_frequency
-            await asyncio.sleep(check_frequency)
+            if should_send_alert:
+                source_info = {"type": "API", "url": uri}
+                self.platform_util.send_alert(
+                    api_name=api_name,
+                    symbol=symbol,
+                    overdue_seconds=overdue_seconds,
+                    allow_delay=allow_delay,
+                    check_frequency=check_frequency,
+                    alert_frequency=alert_frequency,
+                    alert_level="warning",
+                    error_message=f"Dữ liệu API quá hạn {time_str} cho {display_name}",
+                    source_info=source_info,
+                )
+                self.tracker.record_alert_sent(display_name)
+
+        # Giãn chu kỳ probe khi item stale kéo dài (reset khi thấy timestamp mới)
+        self.probe_policy.observe(display_name, dt_record_pointer_data_with_column_to_check)
+        _, became_low_activity = self.tracker.track_consecutive_stale_days(
+            display_name
+        )
+        if became_low_activity:
+            self.logger_api.info(
+                f"{display_name} stale nhiều ngày liên tiếp, chuyển sang low-activity"
+            )
+        return self.probe_policy.get_stale_delay(
+            display_name,
+            check_frequency,
+            alert_frequency,
+            low_activity=self.tracker.is_low_activity(display_name),
+        )
 
     async def run_api_tasks(self):
-        """Chạy tất cả các task kiểm tra API với config được load động"""
-        running_tasks = {}  # {display_name: task}
-
-        while True:
-            # Reload config để phát hiện thay đổi
-            config_api = self._load_config()
-
-            # Tạo list các item cần check
-            expected_items = set()
-            for api_name, api_config in config_api.items():
-                # Resolve symbols mỗi lần để luôn lấy từ database
-                symbols = SymbolResolverUtil.resolve_api_symbols(api_name, api_config)
-
-                if symbols is None:
-                    # API không cần symbols (ví dụ: gold-data)
-                    expected_items.add(api_name)
-                elif isinstance(symbols, list) and len(symbols) > 0:
-                    # Có symbols: tạo task cho từng symbol
-                    for symbol in symbols:
-                        expected_items.add(f"{api_name}-{symbol}")
-                else:
-                    # Empty list: skip API này (đã có warning trong resolver)
-                    continue
-
-            # Phát hiện item mới cần start task
-            current_items = set(running_tasks.keys())
-            new_items = expected_items - current_items
-            removed_items = current_items - expected_items
-
-            # Cancel các task không còn trong config
-            for item_name in removed_items:
-                if item_name in running_tasks:
-                    running_tasks[item_name].cancel()
-                    del running_tasks[item_name]
-                    self.logger_api.info(f"Đã dừng task cho {item_name}")
-
-            # Start task mới - resolve symbols mỗi lần
-            for api_name, api_config in config_api.items():
-                # Resolve symbols mỗi lần để luôn lấy từ database
-                symbols = SymbolResolverUtil.resolve_api_symbols(api_name, api_config)
-
-                if symbols is None:
-                    # API không cần symbols
-                    if api_name in new_items:
-                        task = asyncio.create_task(
-                            self.check_data_api(api_name, api_config, None)
-                        )
-                        running_tasks[api_name] = task
-                        self.logger_api.info(f"Đã start task mới cho {api_name}")
-                elif isinstance(symbols, list) and len(symbols) > 0:
-                    # Có symbols: tạo task cho từng symbol
-                    for symbol in symbols:
-                        display_name = f"{api_name}-{symbol}"
-                        if display_name in new_items:
-                            task = asyncio.create_task(
-                                self.check_data_api(api_name, api_config, symbol)
-                            )
-                            running_tasks[display_name] = task
-                            self.logger_api.info(
-                                f"Đã start task mới cho {display_name}"
-                            )
-
-            # Chờ 10 giây trước khi reload config
-            await asyncio.sleep(10)
+        """Chạy tất cả các task kiểm tra API, start/cancel theo diff config"""
+        reconciler = TaskReconciler(
+            load_sources=self._load_config,
+            check_func=self.check_data_api,
+            resolve_symbols=SymbolResolverUtil.resolve_api_symbols,
+            logger=self.logger_api,
+            scheduler=self.scheduler,
+            shard=self.shard,
+            kind="api",
+            phase_key=self._phase_key,
+        )
+        self.scheduler.ensure_started()
+        try:
+            await reconciler.run()
+        finally:
+            await PushSubscriptionUtil.close_all()
+            await HttpClientUtil.close_all()
+            JsonStreamUtil.shutdown()
@@ -1,31 +1,43 @@
-import asyncio
 from datetime import datetime
 
 from utils.convert_datetime_util import ConvertDatetimeUtil
 from logic_check.time_validator import TimeValidator
 from logic_check.data_validator import DataValidator
+from logic_check.probe_policy import AdaptiveProbePolicy
 from utils.alert_tracker_util import AlertTracker
 
 from configs.logging_config import LoggerConfig
 from configs.database_config.database_manager import DatabaseManager
 from utils.task_manager_util import TaskManager
-from utils.load_config_util import LoadConfigUtil
+from utils.task_reconciler_util import TaskReconciler
+from utils.scheduler_util import CheckScheduler
 from utils.platform_util.platform_manager import PlatformManager
 from utils.symbol_resolver_util import SymbolResolverUtil
+from utils.source_config_util import SourceConfigUtil
+from utils.db_batch_util import DatabaseBatchUtil
 
 
 class CheckDatabase:
     """Class kiểm tra data freshness từ database (MongoDB, PostgreSQL)"""
 
-    def __init__(self):
+    def __init__(self, scheduler=None, shard=None):
+        """
+        Args:
+            scheduler: CheckScheduler dùng chung (mặc định tạo scheduler riêng)
+            shard: ShardFilter khi chạy nhiều worker process (None = tất cả item)
+        """
         self.logger_db = LoggerConfig.logger_config("CheckDatabase", "database.log")
         self.task_manager_db = TaskManager()
         self.platform_util = PlatformManager()
+        self.scheduler = scheduler or CheckScheduler()
+        self.shard = shard
 
         self.db_connector = DatabaseManager()
 
         # Sử dụng AlertTracker để quản lý tất cả tracking
         self.tracker = AlertTracker()
+        # Giãn chu kỳ probe cho item stale kéo dài / low-activity
+        self.probe_policy = AdaptiveProbePolicy()
 
         # Tracking outside schedule logging
         self.outside_schedule_logged = {}
@@ -42,44 +54,74 @@ class CheckDatabase:
 
     def _load_config(self):
         """
-        Load config từ JSON file (gọi mỗi chu kỳ check)
+        Lấy config đã compile (chỉ build lại khi file đổi version)
 
         Returns:
-            Dict chứa các database config với database.enable = true
+            Dict {db_name: SourceConfig} với database.enable = true
         """
-        all_config = LoadConfigUtil.load_json_to_variable("data_sources_config.json")
-        # Filter chỉ lấy những config có database.enable = true
-        return {
-            k: v
-            for k, v in all_config.items()
-            if v.get("database", {}).get("enable", False)
-        }
-
-    def _get_active_start_time(self, time_ranges, current_time):
-        for time_range in time_ranges:
-            start_str, end_str = time_range.split("-")
-            start_time = current_time.replace(
-                hour=int(start_str[:2]),
-                minute=int(start_str[3:5]),
-                second=int(start_str[6:]),
-            )
-            end_time = current_time.replace(
-                hour=int(end_str[:2]), minute=int(end_str[3:5]), second=int(end_str[6:])
-            )
+        return SourceConfigUtil.get_compiled().database_sources
 
-            if start_time <= current_time <= end_time:
-                return start_time
+    @staticmethod
+    def _phase_key(db_name, db_config, symbol):
+        """
+        Các item được gộp query dùng chung pha để đến hạn cùng lúc: symbol của
+        nguồn batch theo nguồn, probe gộp giữa các nguồn theo profile + database
+        """
+        if symbol is not None and db_config.database.batch is not None:
+            return db_name
+        if DatabaseManager.get_union_config() is not None:
+            return ("union",) + DatabaseManager.pool_key(db_config.raw)
+        return TaskReconciler.display_name(db_name, symbol)
 
-        return None
+    async def _query_union(self, items):
+        """
+        1 query gộp cho các probe (nguồn, symbol) cùng profile + database
+
+        Args:
+            items: Tuple (db_name, symbol) trong chunk
+
+        Returns:
+            Dict {(db_name, symbol): datetime | Exception}
+        """
+        sources = self._load_config()
+        probes = [
+            (item, item[0], sources[item[0]].raw, item[1])
+            for item in items
+            if item[0] in sources
+        ]
+        if not probes:
+            return {}
+        return await self.db_connector.query_union_async(
+            probes, min(sources[name].check.priority_rank for _, name, _, _ in probes)
+        )
+
+    async def _query_many(self, db_name, db_config, symbols):
+        """
+        1 query gộp (GROUP BY / $group) cho các symbol của nguồn
+
+        Args:
+            db_name: Tên database config
+            db_config: SourceConfig đã compile của database
+            symbols: Tuple symbol trong chunk
+
+        Returns:
+            Dict {symbol: datetime | Exception}
+        """
+        return await self.db_connector.query_many_async(
+            db_name, db_config.raw, list(symbols), db_config.check.priority_rank
+        )
 
     async def check_data_database(self, db_name, db_config, symbol=None):
         """
-        Hàm logic kiểm tra data từ database chạy liên tục
+        Chạy 1 lần kiểm tra data từ database (được CheckScheduler gọi theo lịch)
 
         Args:
             db_name: Tên database config
-            db_config: Dict cấu hình database
+            db_config: SourceConfig đã compile của database
             symbol: Optional symbol để filter
+
+        Returns:
+            Số giây tới lần kiểm tra kế tiếp
         """
         # Tạo display name
         if symbol:
@@ -87,337 +129,295 @@ class CheckDatabase:
         else:
             display_name = db_name
 
-        while True:
-            try:
-                # Reload config mỗi lần loop để nhận config mới
-                # (LoadConfigUtil có cache, chỉ reload khi file thay đổi)
-                all_config = self._load_config()
-                db_config = all_config.get(db_name, db_config)
-
-                # Đọc config từ cấu trúc mới
-                check_cfg = db_config.get("check", {})
-                schedule_cfg = db_config.get("schedule", {})
-
-                timezone_offset = check_cfg.get("timezone_offset", 7)
-                allow_delay = check_cfg.get("allow_delay", 60)
-                alert_frequency = check_cfg.get("alert_frequency", 60)
-                check_frequency = check_cfg.get("check_frequency", 10)
-
-                valid_schedule = schedule_cfg
-
-                # Kiểm tra holidays trước: nếu là ngày lễ thì log riêng và bỏ qua
-                holidays = valid_schedule.get("holidays") if valid_schedule else None
-                is_holiday = False
-                if holidays:
-                    current_date = datetime.now().date()
-                    for holiday_str in holidays:
-                        try:
-                            if " " in holiday_str:
-                                holiday_date = datetime.strptime(
-                                    holiday_str, "%Y-%m-%d %H:%M:%S"
-                                ).date()
-                            else:
-                                holiday_date = datetime.strptime(
-                                    holiday_str, "%Y-%m-%d"
-                                ).date()
-
-                            if current_date == holiday_date:
-                                is_holiday = True
-                                break
-                        except ValueError:
-                            continue
-
-                if is_holiday:
-                    # Gửi alert 1 lần duy nhất khi là ngày lễ
-                    if not getattr(self.tracker, "holiday_alert_sent", {}).get(
-                        display_name, False
-                    ):
-                        # Gửi alert báo ngày lễ
-                        source_info = {"type": "DATABASE", "db_name": db_name}
-                        alert_message = f"Hôm nay là ngày lễ, hệ thống sẽ không gửi alert về dữ liệu quá hạn"
-
-                        self.platform_util.send_alert(
-                            api_name=display_name,
-                            symbol=symbol,
-                            overdue_seconds=0,
-                            allow_delay=allow_delay,
-                            check_frequency=check_frequency,
-                            alert_frequency=alert_frequency,
-                            alert_level="info",
-                            error_message=alert_message,
-                            source_info=source_info,
-                        )
-
-                        if not hasattr(self.tracker, "holiday_alert_sent"):
-                            self.tracker.holiday_alert_sent = {}
-                        self.tracker.holiday_alert_sent[display_name] = True
-
-                        self.logger_db.info(
-                            f"Đã gửi alert thông báo ngày lễ cho {display_name}"
-                        )
-
-                    # Vẫn check nhưng không gửi alert stale - tiếp tục xuống dưới
-
-                # Kiểm tra valid_schedule
-                is_within_schedule = TimeValidator.is_within_valid_schedule(
-                    valid_schedule, timezone_offset
-                )
+        try:
+            # Lấy config mới nhất mỗi lần check (model chỉ compile lại khi config đổi)
+            db_config = self._load_config().get(db_name, db_config)
 
-                if not is_within_schedule:
-                    # Chỉ log 1 lần khi vào trạng thái ngoài giờ
-                    if not self.outside_schedule_logged.get(display_name, False):
-                        self.logger_db.info(
-                            f"Ngoài lịch kiểm tra cho {display_name}, tạm dừng..."
-                        )
-                        self.outside_schedule_logged[display_name] = True
+            check_cfg = db_config.check
+            schedule_cfg = db_config.schedule
 
-                    await asyncio.sleep(60)
-                    continue
-                else:
-                    # Reset flag khi vào lại trong giờ
-                    if self.outside_schedule_logged.get(display_name, False):
-                        self.logger_db.info(
-                            f"Trong lịch kiểm tra cho {display_name}, tiếp tục..."
-                        )
-                        self.outside_schedule_logged[display_name] = False
-
-                # Reset holiday flag chỉ khi không phải ngày lễ
-                if not is_holiday and getattr(self, "holiday_logged", {}).get(
+            timezone_offset = check_cfg.timezone_offset
+            allow_delay = check_cfg.allow_delay
+            alert_frequency = check_cfg.alert_frequency
+            check_frequency = check_cfg.check_frequency
+
+            # Kiểm tra holidays trước: nếu là ngày lễ thì log riêng và bỏ qua
+            is_holiday = schedule_cfg.is_holiday(datetime.now().date())
+
+            if is_holiday:
+                # Gửi alert 1 lần duy nhất khi là ngày lễ
+                if not getattr(self.tracker, "holiday_alert_sent", {}).get(
                     display_name, False
                 ):
+                    # Gửi alert báo ngày lễ
+                    source_info = {"type": "DATABASE", "db_name": db_name}
+                    alert_message = f"Hôm nay là ngày lễ, hệ thống sẽ không gửi alert về dữ liệu quá hạn"
+
+                    self.platform_util.send_alert(
+                        api_name=display_name,
+                        symbol=symbol,
+                        overdue_seconds=0,
+                        allow_delay=allow_delay,
+                        check_frequency=check_frequency,
+                        alert_frequency=alert_frequency,
+                        alert_level="info",
+                        error_message=alert_message,
+                        source_info=source_info,
+                    )
+
+                    if not hasattr(self.tracker, "holiday_alert_sent"):
+                        self.tracker.holiday_alert_sent = {}
+                    self.tracker.holiday_alert_sent[display_name] = True
+
                     self.logger_db.info(
-                        f"Không phải ngày lễ, tiếp tục kiểm tra {display_name}"
+                        f"Đã gửi alert thông báo ngày lễ cho {display_name}"
                     )
-                    self.holiday_logged[display_name] = False
 
-                # Thực hiện query database
-                try:
-                    latest_time = self.db_connector.query(db_name, db_config, symbol)
+                # Vẫn check nhưng không gửi alert stale - tiếp tục xuống dưới
 
-                    if latest_time is None:
-                        raise ValueError("EMPTY_DATA")
+            # Kiểm tra valid_schedule
+            is_within_schedule = TimeValidator.is_within_compiled_schedule(
+                schedule_cfg
+            )
 
-                    error_message = "Không có dữ liệu mới"
-                    db_error = False
+            if not is_within_schedule:
+                # Chỉ log 1 lần khi vào trạng thái ngoài giờ
+                if not self.outside_schedule_logged.get(display_name, False):
+                    self.logger_db.info(
+                        f"Ngoài lịch kiểm tra cho {display_name}, tạm dừng..."
+                    )
+                    self.outside_schedule_logged[display_name] = True
+
+                # Ngủ tới đúng lúc lịch mở lại (không poll mỗi 60 giây)
+                wake_delay = TimeValidator.seconds_until_schedule_opens(schedule_cfg)
+                return wake_delay if wake_delay is not None else 60
+            else:
+                # Reset flag khi vào lại trong giờ
+                if self.outside_schedule_logged.get(display_name, False):
+                    self.logger_db.info(
+                        f"Trong lịch kiểm tra cho {display_name}, tiếp tục..."
+                    )
+                    self.outside_schedule_logged[display_name] = False
+
+            # Reset holiday flag chỉ khi không phải ngày lễ
+            if not is_holiday and getattr(self, "holiday_logged", {}).get(
+                display_name, False
+            ):
+                self.logger_db.info(
+                    f"Không phải ngày lễ, tiếp tục kiểm tra {display_name}"
+                )
+                self.holiday_logged[display_name] = False
 
-                except ConnectionError as e:
-                    error_message = f"Không thể kết nối - {str(e)}"
-                    error_type = "DATABASE"
-                    db_error = True
-                    self.logger_db.error(
-                        f"Lỗi Database: {error_message} cho {display_name}"
+            # Thực hiện query database
+            union_cfg = DatabaseManager.get_union_config()
+            try:
+                if db_config.database.batch is not None and symbol is not None:
+                    # Batch: các symbol của nguồn đến hạn cùng lúc → 1 query gộp/chunk
+                    latest_time = await DatabaseBatchUtil.fetch(
+                        db_name,
+                        db_config.database.batch,
+                        symbol,
+                        lambda symbols: self._query_many(db_name, db_config, symbols),
+                    )
+                elif union_cfg is not None:
+                    # Gộp probe của các nguồn cùng profile + database → 1 query/tick
+                    latest_time = await DatabaseBatchUtil.fetch(
+                        ("union",) + DatabaseManager.pool_key(db_config.raw),
+                        union_cfg,
+                        (db_name, symbol),
+                        self._query_union,
                     )
-                except ValueError as e:
-                    error_str = str(e)
-                    # Phân biệt EMPTY_DATA vs lỗi khác
-                    if "EMPTY_DATA" in error_str:
-                        error_message = "Không có dữ liệu trong database"
-                        error_type = "DATABASE_WARNING"
-                        db_error = True
-
-                        self.logger_db.warning(
-                            f"Cảnh báo Database: {error_message} cho {display_name}"
-                        )
-                if isinstance(latest_time, datetime):
-                    dt_latest_time = latest_time
                 else:
-                    dt_latest_time = ConvertDatetimeUtil.convert_str_to_datetime(
-                        latest_time
+                    # Query chạy trong thread pool của profile, không block event
+                    # loop; bulkhead của profile giới hạn số query đồng thời/QPS
+                    latest_time = await self.db_connector.query_async(
+                        db_name, db_config.raw, symbol, check_cfg.priority_rank
                     )
 
-                # Chuyển đổi timezone nếu cần
-                if timezone_offset != 7:
-                    dt_latest_time = ConvertDatetimeUtil.convert_utc_to_local(
-                        dt_latest_time, timezone_offset=7 - timezone_offset
-                    )
+                if latest_time is None:
+                    raise ValueError("EMPTY_DATA")
 
-                # Kiểm tra data fresh
-                is_fresh, overdue_seconds = DataValidator.is_data_fresh(
-                    dt_latest_time, allow_delay
-                )
+                error_message = "Không có dữ liệu mới"
+                db_error = False
 
-                # Tính adjusted overdue nếu có time_ranges
-                schedule_cfg = db_config.get("schedule", {})
-                active_start_time = DataValidator.get_active_start_time(
-                    schedule_cfg.get("time_ranges") or [] if schedule_cfg else [],
-                    datetime.now(),
+            except ConnectionError as e:
+                error_message = f"Không thể kết nối - {str(e)}"
+                error_type = "DATABASE"
+                db_error = True
+                self.logger_db.error(
+                    f"Lỗi Database: {error_message} cho {display_name}"
                 )
+            except ValueError as e:
+                error_str = str(e)
+                # Phân biệt EMPTY_DATA vs lỗi khác
+                if "EMPTY_DATA" in error_str:
+                    error_message = "Không có dữ liệu trong database"
+                    error_type = "DATABASE_WARNING"
+                    db_error = True
 
-                if (
-                    active_start_time
-                    and schedule_cfg
-                    and schedule_cfg.get("time_ranges")
-                ):
-                    overdue_seconds = DataValidator.calculate_adjusted_overdue(
-                        dt_latest_time,
-                        datetime.now(),
-                        schedule_cfg.get("time_ranges", []),
+                    self.logger_db.warning(
+                        f"Cảnh báo Database: {error_message} cho {display_name}"
                     )
-                    is_fresh = overdue_seconds <= allow_delay
+            if isinstance(latest_time, datetime):
+                dt_latest_time = latest_time
+            else:
+                dt_latest_time = ConvertDatetimeUtil.convert_str_to_datetime(
+                    latest_time
+                )
 
-                current_time = datetime.now()
-                current_date = current_time.strftime("%Y-%m-%d")
+            # Chuyển đổi timezone nếu cần
+            if timezone_offset != 7:
+                dt_latest_time = ConvertDatetimeUtil.convert_utc_to_local(
+                    dt_latest_time, timezone_offset=7 - timezone_offset
+                )
 
-                if is_fresh:
-                    self.logger_db.info(
-                        f"Kiểm tra database {display_name} - Có dữ liệu mới"
-                    )
-                    await asyncio.sleep(check_frequency)
-                    continue
+            # Kiểm tra data fresh
+            is_fresh, overdue_seconds = DataValidator.is_data_fresh(
+                dt_latest_time, allow_delay
+            )
 
-                time_str = DataValidator.format_time_overdue(
-                    overdue_seconds, allow_delay
+            # Tính adjusted overdue nếu có time_ranges
+            time_ranges = schedule_cfg.time_ranges
+            if time_ranges and DataValidator.get_active_start_time(
+                time_ranges, datetime.now()
+            ):
+                overdue_seconds = DataValidator.calculate_adjusted_overdue(
+                    dt_latest_time,
+                    datetime.now(),
+                    time_ranges,
                 )
+                is_fresh = overdue_seconds <= allow_delay
 
-                if display_name not in self.first_stale_times:
-                    self.first_stale_times[display_name] = current_time
-
-                latest_data_date = dt_latest_time.strftime("%Y-%m-%d")
-                is_data_from_today = latest_data_date == current_date
+            current_time = datetime.now()
+            current_date = current_time.strftime("%Y-%m-%d")
 
-                stale_count = self.tracker.get_stale_count()
-                total_dbs = max(stale_count, 1)
+            if is_fresh:
+                # Reset tracking
+                self.tracker.reset_fresh_data(display_name)
 
-                # Nội dung cảnh báo đồng bộ giữa log và alert
-                warning_message = (
-                    f"Dữ liệu database quá hạn {time_str} cho {display_name}"
+                self.logger_db.info(
+                    f"Kiểm tra database {display_name} - Có dữ liệu mới"
+                )
+                self.probe_policy.observe(display_name, dt_latest_time)
+                # Chỉ probe lại khi dữ liệu có thể quá hạn (nếu bật deadline_polling)
+                return DataValidator.get_next_probe_delay(
+                    dt_latest_time, check_cfg, schedule_cfg
                 )
-                self.logger_db.warning(warning_message)
 
-                # Không gửi alert nếu là ngày lễ
-                if not is_holiday:
-                    should_send_alert = self.tracker.should_send_alert(
-                        display_name, alert_frequency
-                    )
+            time_str = DataValidator.format_time_overdue(
+                overdue_seconds, allow_delay
+            )
 
-                    if should_send_alert:
-                        db_cfg = db_config.get("database", {})
-                        source_info = {"type": "DATABASE"}
-                        if "type" in db_cfg:
-                            source_info["database_type"] = db_cfg["type"]
-                        if "database" in db_cfg:
-                            source_info["database"] = db_cfg["database"]
-                        if "collection_name" in db_cfg:
-                            source_info["collection"] = db_cfg["collection_name"]
-                        elif "table_name" in db_cfg:
-                            source_info["table"] = db_cfg["table_name"]
-
-                        self.platform_util.send_alert(
-                            api_name=db_name,
-                            symbol=symbol,
-                            overdue_seconds=overdue_seconds,
-                            allow_delay=allow_delay,
-                            check_frequency=check_frequency,
-                            alert_frequency=alert_frequency,
-                            alert_level="warning",
-                            error_message=f"Dữ liệu database quá hạn {time_str} cho {display_name}",
-                            source_info=source_info,
-                        )
-                        self.tracker.record_alert_sent(display_name)
-
-                # Sleep
-                await asyncio.sleep(check_frequency)
-
-            except Exception as e:
-                # Catch-all cho mọi lỗi chưa được handle
-                error_message = f"Lỗi không xác định: {str(e)}"
-                self.logger_db.error(
-                    f"CRITICAL ERROR trong task {display_name}: {error_message}",
-                    exc_info=True,
-                )
+            if display_name not in self.first_stale_times:
+                self.first_stale_times[display_name] = current_time
+
+            latest_data_date = dt_latest_time.strftime("%Y-%m-%d")
+            is_data_from_today = latest_data_date == current_date
+
+            stale_count = self.tracker.get_stale_count()
+            total_dbs = max(stale_count, 1)
 
-                # Gửi alert về lỗi critical
-                current_time = datetime.now()
-                last_alert = self.last_alert_times.get(display_name)
+            # Nội dung cảnh báo đồng bộ giữa log và alert
+            warning_message = (
+                f"Dữ liệu database quá hạn {time_str} cho {display_name}"
+            )
+            self.logger_db.warning(warning_message)
 
-                should_send_alert = (
-                    last_alert is None
-                    or (current_time - last_alert).total_seconds() >= alert_frequency
+            # Không gửi alert nếu là ngày lễ
+            if not is_holiday:
+                should_send_alert = self.tracker.should_send_alert(
+                    display_name, alert_frequency
                 )
 
                 if should_send_alert:
+                    db_cfg = db_config.database
+                    source_info = {"type": "DATABASE"}
+                    if db_cfg.type:
+                        source_info["database_type"] = db_cfg.type
+                    if db_cfg.database:
+                        source_info["database"] = db_cfg.database
+                    if db_cfg.collection_name:
+                        source_info["collection"] = db_cfg.collection_name
+                    elif db_cfg.table:
+                        source_info["table"] = db_cfg.table
+
                     self.platform_util.send_alert(
                         api_name=db_name,
                         symbol=symbol,
-                        overdue_seconds=0,
+                        overdue_seconds=overdue_seconds,
                         allow_delay=allow_delay,
                         check_frequency=check_frequency,
                         alert_frequency=alert_frequency,
-                        alert_level="error",
-                        error_message=error_message,
-                        error_type="SYSTEM",
+                        alert_level="warning",
+                        error_message=f"Dữ liệu database quá hạn {time_str} cho {display_name}",
+                        source_info=source_info,
                     )
-                    self.last_alert_times[display_name] = current_time
+                    self.tracker.record_alert_sent(display_name)
+
+            # Giãn chu kỳ probe khi item stale kéo dài (reset khi thấy timestamp mới)
+            self.probe_policy.observe(display_name, dt_latest_time)
+            _, became_low_activity = self.tracker.track_consecutive_stale_days(
+                display_name
+            )
+            if became_low_activity:
+                self.logger_db.info(
+                    f"{display_name} stale nhiều ngày liên tiếp, chuyển sang low-activity"
+                )
+            return self.probe_policy.get_stale_delay(
+                display_name,
+                check_frequency,
+                alert_frequency,
+                low_activity=self.tracker.is_low_activity(display_name),
+            )
+
+        except Exception as e:
+            # Catch-all cho mọi lỗi chưa được handle
+            error_message = f"Lỗi không xác định: {str(e)}"
+            self.logger_db.error(
+                f"CRITICAL ERROR trong task {display_name}: {error_message}",
+                exc_info=True,
+            )
+
+            # Gửi alert về lỗi critical
+            current_time = datetime.now()
+            last_alert = self.last_alert_times.get(display_name)
 
-                # Sleep trước khi retry
-                await asyncio.sleep(check_frequency)
+            should_send_alert = (
+                last_alert is None
+                or (current_time - last_alert).total_seconds() >= alert_frequency
+            )
+
+            if should_send_alert:
+                self.platform_util.send_alert(
+                    api_name=db_name,
+                    symbol=symbol,
+                    overdue_seconds=0,
+                    allow_delay=allow_delay,
+                    check_frequency=check_frequency,
+                    alert_frequency=alert_frequency,
+                    alert_level="error",
+                    error_message=error_message,
+                    error_type="SYSTEM",
+                )
+                self.last_alert_times[display_name] = current_time
+
+            # Retry sau check_frequency
+            return check_frequency
 
     async def run_database_tasks(self):
-        """Chạy tất cả các task kiểm tra database với config được load động"""
-        running_tasks = {}  # {display_name: task}
-
-        while True:
-            # Reload config để phát hiện thay đổi
-            config_db = self._load_config()
-
-            # Tạo list các item cần check
-            expected_items = set()
-            for db_name, db_config in config_db.items():
-                # Resolve symbols mỗi lần để luôn lấy từ database
-                symbols = SymbolResolverUtil.resolve_api_symbols(db_name, db_config)
-
-                if symbols is None:
-                    # Database không cần symbols
-                    expected_items.add(db_name)
-                elif isinstance(symbols, list) and len(symbols) > 0:
-                    # Có symbols: tạo task cho từng symbol
-                    for symbol in symbols:
-                        expected_items.add(f"{db_name}-{symbol}")
-                else:
-                    # Empty list: skip database này
-                    continue
-
-            # Phát hiện item mới cần start task
-            current_items = set(running_tasks.keys())
-            new_items = expected_items - current_items
-            removed_items = current_items - expected_items
-
-            # Cancel các task không còn trong config
-            for item_name in removed_items:
-                if item_name in running_tasks:
-                    running_tasks[item_name].cancel()
-                    del running_tasks[item_name]
-                    self.logger_db.info(f"Đã dừng task cho {item_name}")
-
-                    # Cleanup
-                    db_name = item_name.split("-")[0]
-
-            # Start task mới - resolve symbols mỗi lần
-            for db_name, db_config in config_db.items():
-                # Resolve symbols mỗi lần để luôn lấy từ database
-                symbols = SymbolResolverUtil.resolve_api_symbols(db_name, db_config)
-
-                if symbols is None:
-                    # Database không cần symbols
-                    if db_name in new_items:
-                        task = asyncio.create_task(
-                            self.check_data_database(db_name, db_config, None)
-                        )
-                        running_tasks[db_name] = task
-                        self.logger_db.info(f"Đã start task mới cho {db_name}")
-                elif isinstance(symbols, list) and len(symbols) > 0:
-                    # Có symbols: tạo task cho từng symbol
-                    for symbol in symbols:
-                        display_name = f"{db_name}-{symbol}"
-                        if display_name in new_items:
-                            task = asyncio.create_task(
-                                self.check_data_database(db_name, db_config, symbol)
-                            )
-                            running_tasks[display_name] = task
-                            self.logger_db.info(f"Đã start task mới cho {display_name}")
-
-            # Chờ 10 giây trước khi reload config
-            await asyncio.sleep(10)
+        """Chạy tất cả các task kiểm tra database, start/cancel theo diff config"""
+        reconciler = TaskReconciler(
+            load_sources=self._load_config,
+            check_func=self.check_data_database,
+            resolve_symbols=SymbolResolverUtil.resolve_api_symbols,
+            logger=self.logger_db,
+            scheduler=self.scheduler,
+            shard=self.shard,
+            kind="database",
+            phase_key=self._phase_key,
+        )
+        self.scheduler.ensure_started()
+        await reconciler.run()
 
     def close_connections(self):
         """Đóng tất cả database connections"""
@@ -1,6 +1,8 @@
 from datetime import datetime, timedelta
 import logging
 
+from logic_check.time_validator import TimeValidator
+
 
 logger = logging.getLogger("CheckAPI")
 
@@ -100,13 +102,41 @@ class DataValidator:
 
             return f"{hours} giờ {minutes} phút {secs} giây (ngưỡng {allow_hours} giờ {allow_minutes} phút)"
 
+    @staticmethod
+    def _get_range_bounds(time_range, current_time):
+        """
+        Tính (start, end) datetime của 1 khoảng thời gian trong ngày của current_time
+
+        Tham số:
+            time_range: "HH:MM:SS-HH:MM:SS" hoặc tuple (start_sec, end_sec) đã compile.
+            current_time (datetime): Thời gian hiện tại.
+
+        Trả về:
+            tuple: (start_time, end_time)
+        """
+        if isinstance(time_range, str):
+            start_str, end_str = time_range.split("-")
+            start_sec = (
+                int(start_str[:2]) * 3600 + int(start_str[3:5]) * 60 + int(start_str[6:])
+            )
+            end_sec = int(end_str[:2]) * 3600 + int(end_str[3:5]) * 60 + int(end_str[6:])
+        else:
+            start_sec, end_sec = time_range
+
+        midnight = current_time.replace(hour=0, minute=0, second=0, microsecond=0)
+        return (
+            midnight + timedelta(seconds=start_sec),
+            midnight + timedelta(seconds=end_sec),
+        )
+
     @staticmethod
     def get_active_start_time(time_ranges, current_time):
         """
         Lấy thời gian bắt đầu của khoảng thời gian hoạt động mà thời gian hiện tại thuộc về.
 
         Tham số:
-            time_ranges (list): Danh sách các khoảng thời gian dạng "HH:MM:SS-HH:MM:SS".
+            time_ranges (list): Danh sách các khoảng thời gian dạng "HH:MM:SS-HH:MM:SS"
+                hoặc tuple (start_sec, end_sec) đã compile.
             current_time (datetime): Thời gian hiện tại.
 
         Trả về:
@@ -116,14 +146,8 @@ class DataValidator:
             return None
 
         for time_range in time_ranges:
-            start_str, end_str = time_range.split("-")
-            start_time = current_time.replace(
-                hour=int(start_str[:2]),
-                minute=int(start_str[3:5]),
-                second=int(start_str[6:]),
-            )
-            end_time = current_time.replace(
-                hour=int(end_str[:2]), minute=int(end_str[3:5]), second=int(end_str[6:])
+            start_time, end_time = DataValidator._get_range_bounds(
+                time_range, current_time
             )
 
             if start_time <= current_time <= end_time:
@@ -139,7 +163,8 @@ class DataValidator:
         Tham số:
             latest_time (datetime): Thời gian của dữ liệu mới nhất.
             current_time (datetime): Thời gian hiện tại.
-            time_ranges (list): Danh sách các khoảng thời gian hoạt động dạng "HH:MM:SS-HH:MM:SS".
+            time_ranges (list): Danh sách các khoảng thời gian hoạt động dạng "HH:MM:SS-HH:MM:SS"
+                hoặc tuple (start_sec, end_sec) đã compile.
 
         Trả về:
             int: Số giây quá hạn đã điều chỉnh.
@@ -149,14 +174,8 @@ class DataValidator:
             return 0
 
         for time_range in time_ranges:
-            start_str, end_str = time_range.split("-")
-            start_time = current_time.replace(
-                hour=int(start_str[:2]),
-                minute=int(start_str[3:5]),
-                second=int(start_str[6:]),
-            )
-            end_time = current_time.replace(
-                hour=int(end_str[:2]), minute=int(end_str[3:5]), second=int(end_str[6:])
+            start_time, end_time = DataValidator._get_range_bounds(
+                time_range, current_time
             )
 
             # Thời gian bắt đầu tính: max(latest_time, start_time)
@@ -168,3 +187,54 @@ class DataValidator:
                 adjusted_overdue += (calc_end - calc_start).total_seconds()
 
         return int(adjusted_overdue)
+
+    @staticmethod
+    def seconds_until_stale(data_datetime: datetime, allow_delay, current_time=None):
+        """
+        Số giây tối thiểu trước khi dữ liệu có thể bị quá hạn
+
+        Dùng mốc T + allow_delay cho mọi trường hợp: với data chỉ có ngày, mốc
+        quá hạn thật luôn >= nửa đêm của ngày đó + allow_delay; với adjusted
+        overdue (chỉ tính trong time_ranges), số giây quá hạn không tăng nhanh
+        hơn thời gian thực. Vì vậy không bao giờ bỏ lỡ thời điểm quá hạn.
+
+        Tham số:
+            data_datetime (datetime): Thời gian của dữ liệu mới nhất (giờ local).
+            allow_delay (int): Số giây cho phép.
+            current_time (datetime): Thời gian hiện tại (mặc định datetime.now()).
+
+        Trả về:
+            float: Số giây (có thể <= 0 nếu đã qua mốc).
+        """
+        if current_time is None:
+            current_time = datetime.now()
+        deadline = data_datetime + timedelta(seconds=allow_delay)
+        return (deadline - current_time).total_seconds()
+
+    @staticmethod
+    def get_next_probe_delay(data_datetime: datetime, check_cfg, schedule_cfg):
+        """
+        Delay tới lần probe kế tiếp khi dữ liệu đang mới (deadline-driven polling)
+
+        Probe lại tại min(T + allow_delay, mốc đóng của lịch hiện tại), không sớm
+        hơn check_frequency. Nếu nguồn không bật `check.deadline_polling` thì
+        trả về check_frequency như cũ.
+
+        Tham số:
+            data_datetime (datetime): Thời gian của dữ liệu mới nhất (giờ local).
+            check_cfg (CheckConfig): Phần `check` đã compile.
+            schedule_cfg (ScheduleConfig): Phần `schedule` đã compile.
+
+        Trả về:
+            float: Số giây tới lần probe kế tiếp.
+        """
+        check_frequency = check_cfg.check_frequency
+        if not check_cfg.deadline_polling:
+            return check_frequency
+
+        delay = DataValidator.seconds_until_stale(data_datetime, check_cfg.allow_delay)
+        boundary = TimeValidator.seconds_until_schedule_closes(schedule_cfg)
+        if boundary is not None:
+            delay = min(delay, boundary)
+
+        return max(delay, check_frequency)
@@ -0,0 +1,175 @@
+"""
+Adaptive Probe Policy
+Giãn chu kỳ probe cho item stale kéo dài / low-activity và học khoảng cách giữa
+các lần dữ liệu cập nhật để probe ngay sau lần cập nhật kế tiếp dự kiến
+"""
+
+import statistics
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Deque, Dict, Optional
+
+
+class ProbeState:
+    """
+    Trạng thái probe của 1 item
+
+    Attributes:
+        last_data_time: Timestamp dữ liệu mới nhất đã thấy
+        intervals: Khoảng cách (giây) giữa các timestamp liên tiếp đã thấy
+        stale_probes: Số lần probe liên tiếp mà item vẫn stale
+        updated: Lần observe gần nhất thấy timestamp mới (chưa được get_stale_delay dùng)
+    """
+
+    __slots__ = ("last_data_time", "intervals", "stale_probes", "updated")
+
+    def __init__(self, history_size: int):
+        self.last_data_time: Optional[datetime] = None
+        self.intervals: Deque[float] = deque(maxlen=history_size)
+        self.stale_probes = 0
+        self.updated = False
+
+
+class AdaptiveProbePolicy:
+    """
+    Tính delay tới lần probe kế tiếp cho item đang stale
+
+    - Stale liên tục → delay tăng theo cấp số nhân từ check_frequency, tối đa
+      min(max_interval, alert_frequency) để không làm thưa alert lặp lại
+    - Low-activity (stale nhiều ngày liên tiếp) → dùng ngay max_interval, trừ
+      khi vừa thấy timestamp mới
+    - Đủ mẫu → probe ngay sau thời điểm cập nhật kế tiếp dự kiến
+      (timestamp mới nhất + trung vị khoảng cách) nếu sớm hơn backoff
+    - Thấy timestamp mới → reset về check_frequency (kể cả item low-activity);
+      chỉ giãn chu kỳ khi item tiếp tục không có dữ liệu mới
+
+    Tham số đọc từ MONITOR_CONFIG.adaptive_probe trong common_config.json.
+    """
+
+    DEFAULT_CONFIG = {
+        "enable": True,
+        "max_interval": 600,
+        "multiplier": 2,
+        "history_size": 20,
+        "min_samples": 3,
+        "expected_slack": 5,
+    }
+
+    def __init__(self):
+        self.states: Dict[str, ProbeState] = {}
+
+    @staticmethod
+    def get_config() -> dict:
+        """
+        Lấy MONITOR_CONFIG.adaptive_probe (đã merge với giá trị mặc định)
+
+        Returns:
+            Dict tham số của policy
+        """
+        from utils.load_config_util import LoadConfigUtil
+
+        common_config = LoadConfigUtil.load_json_to_variable("common_config.json")
+        config = dict(AdaptiveProbePolicy.DEFAULT_CONFIG)
+        config.update(
+            common_config.get("MONITOR_CONFIG", {}).get("adaptive_probe", {})
+        )
+        return config
+
+    def _get_state(self, display_name: str) -> ProbeState:
+        state = self.states.get(display_name)
+        if state is None:
+            history_size = int(self.get_config()["history_size"])
+            state = ProbeState(max(1, history_size))
+            self.states[display_name] = state
+        return state
+
+    def observe(self, display_name: str, data_datetime: datetime) -> bool:
+        """
+        Ghi nhận timestamp dữ liệu vừa probe được
+
+        Args:
+            display_name: Tên hiển thị của item
+            data_datetime: Timestamp dữ liệu mới nhất (giờ local)
+
+        Returns:
+            True nếu timestamp mới hơn lần trước (có data mới)
+        """
+        state = self._get_state(display_name)
+        last_time = state.last_data_time
+
+        if last_time is not None and data_datetime <= last_time:
+            return False
+
+        if last_time is not None:
+            state.intervals.append((data_datetime - last_time).total_seconds())
+        state.last_data_time = data_datetime
+        state.stale_probes = 0
+        state.updated = True
+        return True
+
+    def get_expected_update(self, display_name: str) -> Optional[datetime]:
+        """
+        Thời điểm cập nhật kế tiếp dự kiến theo phân bố khoảng cách đã học
+
+        Args:
+            display_name: Tên hiển thị của item
+
+        Returns:
+            datetime dự kiến, hoặc None nếu chưa đủ mẫu
+        """
+        state = self.states.get(display_name)
+        if state is None or state.last_data_time is None:
+            return None
+        if len(state.intervals) < int(self.get_config()["min_samples"]):
+            return None
+        return state.last_data_time + timedelta(
+            seconds=statistics.median(state.intervals)
+        )
+
+    def get_stale_delay(
+        self,
+        display_name: str,
+        check_frequency: float,
+        alert_frequency: float,
+        low_activity: bool = False,
+    ) -> float:
+        """
+        Delay tới lần probe kế tiếp khi item đang stale
+
+        Args:
+            display_name: Tên hiển thị của item
+            check_frequency: Chu kỳ check bình thường (giây)
+            alert_frequency: Tần suất alert (giây)
+            low_activity: Item đã được AlertTracker xác định là low-activity
+
+        Returns:
+            Số giây tới lần probe kế tiếp (>= check_frequency)
+        """
+        config = self.get_config()
+        if not config["enable"]:
+            return check_frequency
+
+        state = self._get_state(display_name)
+        max_interval = float(config["max_interval"])
+
+        # Vừa có timestamp mới: probe lại sau check_frequency dù item low-activity
+        updated, state.updated = state.updated, False
+        if low_activity and not updated:
+            backoff = max_interval
+        else:
+            cap = min(max_interval, alert_frequency)
+            backoff = min(
+                cap, check_frequency * float(config["multiplier"]) ** state.stale_probes
+            )
+            if backoff < cap:
+                state.stale_probes += 1
+
+        expected = self.get_expected_update(display_name)
+        if expected is not None:
+            until_expected = (expected - datetime.now()).total_seconds() + float(
+                config["expected_slack"]
+            )
+            if until_expected > 0:
+                backoff = min(backoff, until_expected)
+
+        return max(check_frequency, backoff)
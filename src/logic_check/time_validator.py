@@ -4,6 +4,9 @@ from datetime import datetime, timezone, timedelta
 
 logger = logging.getLogger("CheckAPI")
 
+# Schedule trong config luôn theo giờ VN (UTC+7)
+VN_TIMEZONE = timezone(timedelta(hours=7))
+
 
 class TimeValidator:
     """Xử lý logic kiểm tra thời gian nằm trong lịch hợp lệ"""
@@ -140,8 +143,7 @@ class TimeValidator:
             return True  # {} hoặc [] = không giới hạn
 
         # Get current time in Vietnam timezone (UTC+7) - schedule luôn theo giờ VN
-        tz = timezone(timedelta(hours=7))
-        now = datetime.now(tz)
+        now = datetime.now(VN_TIMEZONE)
         current_weekday = now.weekday()  # 0=Monday, 6=Sunday
         current_time = now.time()
 
@@ -206,3 +208,125 @@ class TimeValidator:
                 return True
 
         return False
+
+    @staticmethod
+    def is_within_compiled_schedule(schedule, now=None):
+        """
+        Kiểm tra lịch đã compile (ScheduleConfig) - không parse lại string
+
+        Args:
+            schedule: ScheduleConfig từ SourceConfigUtil
+            now: Thời điểm cần kiểm tra (mặc định: hiện tại theo giờ VN)
+
+        Returns:
+            True nếu trong khoảng thời gian hợp lệ, False nếu không
+        """
+        if schedule.legacy:
+            return TimeValidator.is_within_valid_schedule(schedule.raw)
+
+        if now is None:
+            now = datetime.now(VN_TIMEZONE)
+
+        if schedule.valid_days is not None and now.weekday() not in schedule.valid_days:
+            return False
+
+        if schedule.time_ranges is None:
+            return True  # Không giới hạn giờ
+
+        second_of_day = (
+            now.hour * 3600 + now.minute * 60 + now.second + now.microsecond / 1e6
+        )
+        for start_sec, end_sec in schedule.time_ranges:
+            if start_sec <= second_of_day <= end_sec:
+                return True
+        return False
+
+    @staticmethod
+    def seconds_until_schedule_opens(schedule, now=None):
+        """
+        Tính số giây tới thời điểm lịch đã compile mở lại (mốc chuyển kế tiếp)
+
+        Chỉ dựa vào `valid_days` và `time_ranges`: ngày lễ không chặn việc check
+        (checker vẫn check, chỉ không gửi alert stale) nên không phải mốc chuyển.
+
+        Args:
+            schedule: ScheduleConfig từ SourceConfigUtil
+            now: Thời điểm tính (mặc định: hiện tại theo giờ VN)
+
+        Returns:
+            0 nếu đang trong lịch, số giây tới lúc mở lại, hoặc None nếu không
+            xác định được (lịch format cũ hoặc không có khoảng hợp lệ nào)
+        """
+        if schedule.legacy:
+            return None
+
+        if now is None:
+            now = datetime.now(VN_TIMEZONE)
+
+        if TimeValidator.is_within_compiled_schedule(schedule, now):
+            return 0
+
+        second_of_day = (
+            now.hour * 3600 + now.minute * 60 + now.second + now.microsecond / 1e6
+        )
+        if schedule.time_ranges is None:
+            starts = [0]
+        else:
+            starts = sorted(
+                start_sec
+                for start_sec, end_sec in schedule.time_ranges
+                if start_sec <= end_sec
+            )
+        if not starts:
+            return None
+
+        # Lịch lặp theo tuần nên chỉ cần xét tối đa 7 ngày tới
+        for day_offset in range(8):
+            weekday = (now.weekday() + day_offset) % 7
+            if schedule.valid_days is not None and weekday not in schedule.valid_days:
+                continue
+            for start_sec in starts:
+                if day_offset == 0 and start_sec <= second_of_day:
+                    continue
+                return day_offset * 86400 + start_sec - second_of_day
+
+        return None
+
+    @staticmethod
+    def seconds_until_schedule_closes(schedule, now=None):
+        """
+        Tính số giây tới khi khoảng lịch hiện tại đóng lại
+
+        Args:
+            schedule: ScheduleConfig từ SourceConfigUtil
+            now: Thời điểm tính (mặc định: hiện tại theo giờ VN)
+
+        Returns:
+            0 nếu đang ngoài lịch, số giây tới lúc ra khỏi khoảng hiện tại,
+            hoặc None nếu lịch không có mốc đóng (24/7 hoặc format cũ)
+        """
+        if schedule.legacy:
+            return None
+
+        if now is None:
+            now = datetime.now(VN_TIMEZONE)
+
+        if not TimeValidator.is_within_compiled_schedule(schedule, now):
+            return 0
+
+        second_of_day = (
+            now.hour * 3600 + now.minute * 60 + now.second + now.microsecond / 1e6
+        )
+        if schedule.time_ranges is None:
+            if schedule.valid_days is None:
+                return None
+            # Chỉ giới hạn theo ngày: mốc đóng là nửa đêm
+            return 86400 - second_of_day
+
+        # End của khoảng là inclusive → ra khỏi lịch sau end 1 giây
+        end_sec = max(
+            end_sec
+            for start_sec, end_sec in schedule.time_ranges
+            if start_sec <= second_of_day <= end_sec
+        )
+        return end_sec + 1 - second_of_day
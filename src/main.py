@@ -29,12 +29,19 @@ from check.check_api import CheckAPI
 from check.check_database import CheckDatabase
 from check.check_disk import CheckDisk
 from utils.platform_util.platform_manager import PlatformManager
+from utils.scheduler_util import CheckScheduler
+from utils.shard_util import ShardFilter
+from utils.cluster_util import ClusterUtil
 
 
+import argparse
 import asyncio
 import logging
+import multiprocessing
+import queue
 import signal
 import sys
+import time
 import atexit
 
 
@@ -113,20 +120,13 @@ signal.signal(signal.SIGTERM, signal_handler)
 atexit.register(on_exit)
 
 
-async def main():
+def send_startup_alert(message="Hệ thống giám sát đã khởi động thành công"):
     """
-    Hàm main chạy tất cả các monitors song song
+    Gửi alert khi hệ thống khởi động
 
-    Chạy đồng thời:
-    - API monitoring (check_api)
-    - Database monitoring (check_database)
-    - Disk monitoring (check_disk) - optional
+    Args:
+        message: Nội dung alert
     """
-    logger.info("=" * 80)
-    logger.info("BẮT ĐẦU HỆ THỐNG GIÁM SÁT DỮ LIỆU")
-    logger.info("=" * 80)
-
-    # Gửi alert khởi động thành công
     try:
         platform_manager.send_alert(
             api_name="SYSTEM",
@@ -136,7 +136,7 @@ async def main():
             check_frequency=0,
             alert_frequency=0,
             alert_level="info",
-            error_message="Hệ thống giám sát đã khởi động thành công",
+            error_message=message,
             error_type="SYSTEM",
             source_info={"type": "SYSTEM", "message": "Data monitoring system started"},
         )
@@ -144,22 +144,60 @@ async def main():
     except Exception as e:
         logger.error(f"Lỗi gửi startup alert: {e}")
 
+
+async def run_checkers(shard=None, node_suffix=None):
+    """
+    Chạy 3 checker trên 1 scheduler dùng chung
+
+    Args:
+        shard: ShardFilter khi chạy trong worker process (None = tất cả item)
+        node_suffix: Hậu tố node_id khi process join cluster (index của worker)
+    """
+    tasks = []
+    if ClusterUtil.is_enabled():
+        # Mỗi process là 1 node của cluster: item chia theo lease thay vì ShardFilter
+        shard = await asyncio.to_thread(ClusterUtil.start, node_suffix)
+        tasks.append(ClusterUtil.run())
+
+    # Scheduler dùng chung: 1 heap + worker pool cho tất cả checker
+    scheduler = CheckScheduler()
+
     # Khởi tạo API checker
-    api_checker = CheckAPI()
+    api_checker = CheckAPI(scheduler=scheduler, shard=shard)
 
     # Khởi tạo Database checker
-    db_checker = CheckDatabase()
+    db_checker = CheckDatabase(scheduler=scheduler, shard=shard)
 
     # Khởi tạo Disk checker (tùy chọn)
-    disk_checker = CheckDisk()
+    disk_checker = CheckDisk(scheduler=scheduler, shard=shard)
+
+    # Chạy tất cả tasks song song
+    await asyncio.gather(
+        api_checker.run_api_tasks(),
+        db_checker.run_database_tasks(),
+        disk_checker.run_disk_tasks(),
+        *tasks,
+    )
+
+
+async def main():
+    """
+    Hàm main chạy tất cả các monitors song song
+
+    Chạy đồng thời:
+    - API monitoring (check_api)
+    - Database monitoring (check_database)
+    - Disk monitoring (check_disk) - optional
+    """
+    logger.info("=" * 80)
+    logger.info("BẮT ĐẦU HỆ THỐNG GIÁM SÁT DỮ LIỆU")
+    logger.info("=" * 80)
+
+    # Gửi alert khởi động thành công
+    send_startup_alert()
 
     try:
-        # Chạy tất cả tasks song song
-        await asyncio.gather(
-            api_checker.run_api_tasks(),
-            db_checker.run_database_tasks(),
-            disk_checker.run_disk_tasks(),
-        )
+        await run_checkers()
     except Exception as e:
         logger.error(f"LỖI NGHIÊM TRỌNG trong main: {e}", exc_info=True)
         send_shutdown_alert(f"Lỗi nghiêm trọng: {str(e)}", alert_level="error")
@@ -170,5 +208,138 @@ async def main():
         logger.info("=" * 80)
 
 
+def worker_main(worker_index, worker_count, alert_queue):
+    """
+    Entry của worker process (fork từ coordinator)
+
+    Worker chỉ chạy các item thuộc shard của mình (consistent hashing theo
+    display name) và chuyển mọi alert về coordinator qua alert_queue. Khi bật
+    cluster, mỗi worker join cluster như 1 node (lease + alert record dùng chung).
+
+    Args:
+        worker_index: Index của worker (0..worker_count-1)
+        worker_count: Tổng số worker
+        alert_queue: multiprocessing.Queue nhận alert
+    """
+    global _shutdown_handled
+    # Chỉ coordinator xử lý signal và gửi alert shutdown
+    _shutdown_handled = True
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # SystemExit để asyncio.run hủy task (trả lease cluster) trước khi thoát
+    signal.signal(signal.SIGTERM, lambda sig, frame: sys.exit(0))
+
+    logger.info(f"Worker {worker_index}/{worker_count} bắt đầu chạy")
+    if ClusterUtil.is_enabled():
+        asyncio.run(run_checkers(node_suffix=worker_index))
+        return
+
+    PlatformManager.set_alert_sink(alert_queue.put)
+    asyncio.run(run_checkers(ShardFilter(worker_index, worker_count)))
+
+
+def forward_alert(alert, last_sent):
+    """
+    Gửi alert nhận từ worker, dedup toàn cục
+
+    Cùng (api_name, symbol, alert_level, error_type) chỉ gửi 1 lần trong 90%
+    alert_frequency (tránh alert trùng khi worker restart mất tracking).
+
+    Args:
+        alert: Dict tham số PlatformManager.send_alert
+        last_sent: Dict {key: monotonic time lần gửi cuối}
+    """
+    key = (
+        alert.get("api_name"),
+        alert.get("symbol"),
+        alert.get("alert_level"),
+        alert.get("error_type"),
+    )
+    now = time.monotonic()
+    window = 0.9 * (alert.get("alert_frequency") or 0)
+    last = last_sent.get(key)
+    if last is not None and now - last < window:
+        logger.debug(f"Bỏ qua alert trùng từ worker: {key}")
+        return
+
+    last_sent[key] = now
+    try:
+        platform_manager.send_alert(**alert)
+    except Exception as e:
+        logger.error(f"Lỗi gửi alert từ worker: {e}")
+
+
+def run_coordinator(worker_count):
+    """
+    Coordinator: fork N worker process, gửi alert thay worker, restart worker chết
+
+    Args:
+        worker_count: Số worker process
+    """
+    logger.info("=" * 80)
+    logger.info(f"BẮT ĐẦU HỆ THỐNG GIÁM SÁT DỮ LIỆU ({worker_count} workers)")
+    logger.info("=" * 80)
+
+    send_startup_alert(
+        f"Hệ thống giám sát đã khởi động thành công ({worker_count} workers)"
+    )
+
+    # fork: worker kế thừa module đã import, không chạy lại code top-level của main.py
+    context = multiprocessing.get_context("fork")
+    alert_queue = context.Queue()
+    workers = {}
+
+    def start_worker(worker_index):
+        process = context.Process(
+            target=worker_main,
+            args=(worker_index, worker_count, alert_queue),
+            name=f"Worker-{worker_index}",
+            daemon=True,
+        )
+        process.start()
+        workers[worker_index] = process
+
+    for worker_index in range(worker_count):
+        start_worker(worker_index)
+
+    last_sent = {}
+    try:
+        while True:
+            try:
+                forward_alert(alert_queue.get(timeout=1), last_sent)
+            except queue.Empty:
+                pass
+
+            for worker_index, process in list(workers.items()):
+                if not process.is_alive():
+                    logger.error(
+                        f"Worker {worker_index} đã dừng (exitcode={process.exitcode}), restart..."
+                    )
+                    start_worker(worker_index)
+    except Exception as e:
+        logger.error(f"LỖI NGHIÊM TRỌNG trong coordinator: {e}", exc_info=True)
+        send_shutdown_alert(f"Lỗi nghiêm trọng: {str(e)}", alert_level="error")
+        raise
+    finally:
+        for process in workers.values():
+            process.terminate()
+        for process in workers.values():
+            process.join(timeout=5)
+        logger.info("=" * 80)
+        logger.info("DỪNG HỆ THỐNG GIÁM SÁT DỮ LIỆU")
+        logger.info("=" * 80)
+
+
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser(description="Hệ thống giám sát dữ liệu")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Số worker process (mặc định 1 = chạy trên 1 process)",
+    )
+    args = parser.parse_args()
+
+    if args.workers > 1:
+        run_coordinator(args.workers)
+    else:
+        asyncio.run(main())
@@ -0,0 +1,237 @@
+"""
+Stand-in server SSE/WebSocket để kiểm tra PushSubscriptionUtil (api.stream_url)
+
+Chạy server (trỏ `api.stream_url` của 1 nguồn test tới đây):
+    python src/tools/push_stand_in_server.py --port 8765
+    - GET /sse: Server-Sent Events
+    - GET /ws: WebSocket
+    - GET /drop: đóng tất cả stream đang mở (giả lập mất kết nối)
+    - Mỗi `--interval` giây push 1 event {"data": [{"symbol": ..., "datetime": ...}]}
+
+Tự kiểm tra reconnect + polling fallback (không cần config/database):
+    python src/tools/push_stand_in_server.py --check
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+
+def find_project_root(current_file, marker="requirements.txt"):
+    """
+    Tìm thư mục root của project
+
+    Args:
+        current_file: File hiện tại
+        marker: File đánh dấu root (default: requirements.txt)
+
+    Returns:
+        Path object của project root
+    """
+    current_path = Path(current_file).resolve()
+    for parent in current_path.parents:
+        if (parent / marker).exists():
+            return parent
+    return current_path.parent
+
+
+project_root = find_project_root(__file__, marker="requirements.txt")
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "src"))
+
+try:
+    from aiohttp import WSCloseCode, web
+except ImportError:
+    raise ImportError("Thiếu thư viện aiohttp. Cài đặt: pip install aiohttp")
+
+
+SYMBOLS = ("BTC", "ETH")
+
+
+class PushStandInServer:
+    """Server push giả lập: SSE + WebSocket, có thể chủ động đóng stream"""
+
+    def __init__(self, interval: float = 0.2):
+        """
+        Args:
+            interval: Số giây giữa 2 event
+        """
+        self.interval = interval
+        self._streams = set()
+        self._closing = set()
+        self._runner = None
+
+    def make_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/sse", self._handle_sse)
+        app.router.add_get("/ws", self._handle_ws)
+        app.router.add_get("/drop", self._handle_drop)
+        return app
+
+    async def start(self, host: str, port: int) -> int:
+        """
+        Chạy server nền trên event loop hiện tại
+
+        Returns:
+            Port thực tế (port=0 → OS chọn)
+        """
+        self._runner = web.AppRunner(self.make_app())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        return self._runner.addresses[0][1]
+
+    async def stop(self) -> None:
+        self.drop()
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    def drop(self) -> int:
+        """
+        Đóng tất cả stream đang mở
+
+        Returns:
+            Số stream bị đóng
+        """
+        streams = list(self._streams)
+        self._closing.update(streams)
+        return len(streams)
+
+    @staticmethod
+    def _event() -> str:
+        now = datetime.now(timezone.utc).isoformat()
+        return json.dumps({"data": [{"symbol": s, "datetime": now} for s in SYMBOLS]})
+
+    async def _handle_sse(self, request: web.Request) -> web.StreamResponse:
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        token = object()
+        self._streams.add(token)
+        try:
+            while token not in self._closing:
+                await response.write(f"data: {self._event()}\n\n".encode())
+                await asyncio.sleep(self.interval)
+        finally:
+            self._streams.discard(token)
+            self._closing.discard(token)
+        # Kết thúc stream để client thấy mất kết nối ngay (client đã đi thì bỏ qua)
+        if request.transport is not None:
+            await response.write_eof()
+        return response
+
+    async def _handle_ws(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        token = object()
+        self._streams.add(token)
+        try:
+            while token not in self._closing and not ws.closed:
+                await ws.send_str(self._event())
+                await asyncio.sleep(self.interval)
+        finally:
+            self._streams.discard(token)
+            self._closing.discard(token)
+        await ws.close(code=WSCloseCode.GOING_AWAY)
+        return ws
+
+    async def _handle_drop(self, request: web.Request) -> web.Response:
+        return web.json_response({"dropped": self.drop()})
+
+
+async def _wait_for(condition, timeout: float) -> bool:
+    """Chờ condition() đúng trong tối đa `timeout` giây"""
+    deadline = asyncio.get_running_loop().time() + timeout
+    while asyncio.get_running_loop().time() < deadline:
+        if condition():
+            return True
+        await asyncio.sleep(0.05)
+    return condition()
+
+
+async def run_check(interval: float) -> bool:
+    """
+    Kiểm tra từng loại stream: nhận event → server đóng stream → CheckAPI
+    quay về polling (get_value None) → kết nối lại và nhận event tiếp
+
+    Returns:
+        True nếu mọi bước đều đạt
+    """
+    from utils.push_subscription_util import PushSubscriptionUtil
+    from utils.source_config_util import ApiPushConfig
+
+    server = PushStandInServer(interval)
+    port = await server.start("127.0.0.1", 0)
+    PushSubscriptionUtil.RECONNECT_MIN = 0.5
+
+    ok = True
+    try:
+        for stream_type, path in (("sse", "/sse"), ("websocket", "/ws")):
+            name = f"stand_in_{stream_type}"
+            push_cfg = ApiPushConfig(
+                url=f"http://127.0.0.1:{port}{path}",
+                type=stream_type,
+                symbol_key="symbol",
+                column="datetime",
+                idle_timeout=5.0,
+            )
+
+            def value():
+                return PushSubscriptionUtil.get_value(name, push_cfg, "BTC")
+
+            steps = [
+                ("nhận event", lambda: value() is not None, 5.0),
+                ("server đóng stream → polling", None, 5.0),
+                ("kết nối lại", lambda: value() is not None, 10.0),
+            ]
+            for step, condition, timeout in steps:
+                if condition is None:
+                    server.drop()
+                    condition = lambda: value() is None  # noqa: E731
+                passed = await _wait_for(condition, timeout)
+                ok = ok and passed
+                print(f"[{stream_type}] {step}: {'OK' if passed else 'FAIL'}")
+
+            # Nguồn bị xóa khỏi config → subscription dừng
+            PushSubscriptionUtil.prune({})
+            passed = name not in PushSubscriptionUtil.get_stats()
+            ok = ok and passed
+            print(f"[{stream_type}] prune: {'OK' if passed else 'FAIL'}")
+    finally:
+        await PushSubscriptionUtil.close_all()
+        await server.stop()
+    return ok
+
+
+async def _serve(host: str, port: int, interval: float) -> None:
+    server = PushStandInServer(interval)
+    port = await server.start(host, port)
+    print(f"Stand-in push server: http://{host}:{port}/sse, ws://{host}:{port}/ws")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stand-in server SSE/WebSocket")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--interval", type=float, default=0.2, help="Số giây giữa 2 event")
+    parser.add_argument(
+        "--check", action="store_true", help="Tự kiểm tra reconnect + polling fallback"
+    )
+    args = parser.parse_args()
+
+    if args.check:
+        sys.exit(0 if asyncio.run(run_check(args.interval)) else 1)
+    try:
+        asyncio.run(_serve(args.host, args.port, args.interval))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -249,6 +249,9 @@ class AlertTracker:
         if display_name in self.consecutive_stale_days:
             del self.consecutive_stale_days[display_name]
 
+        # Có data mới → không còn low-activity
+        self.low_activity_symbols.discard(display_name)
+
         # Reset empty data nếu có
         if display_name in self.empty_data_tracking:
             del self.empty_data_tracking[display_name]
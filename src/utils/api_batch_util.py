@@ -0,0 +1,147 @@
+"""
+API Batch Utility
+Gộp các symbol của cùng 1 nguồn API đến hạn gần nhau thành 1 request cho mỗi chunk
+K symbol, rồi chia response theo symbol cho từng item
+"""
+
+import asyncio
+from collections import defaultdict
+from typing import Awaitable, Callable, Dict, List, Tuple
+
+from configs.logging_config import LoggerConfig
+
+
+class _PendingBatch:
+    """Các symbol đang chờ flush của 1 nguồn"""
+
+    __slots__ = ("futures", "fetch_array")
+
+    def __init__(self, fetch_array):
+        self.futures: Dict[str, asyncio.Future] = {}
+        self.fetch_array = fetch_array
+
+
+class ApiBatchUtil:
+    """
+    Batch probe API theo nguồn (dùng chung toàn process)
+
+    - Symbol đầu tiên đến hạn mở 1 batch, các symbol cùng nguồn đến hạn trong
+      `window` giây được gộp vào (đủ `size` symbol thì flush ngay)
+    - Mỗi chunk `size` symbol gọi 1 request tới `batch.url`, response được chia
+      theo `symbol_key` của record (giữ nguyên thứ tự record) cho từng symbol
+    - Lỗi của request (kết nối, HTTP, format) được trả cho tất cả symbol trong chunk
+
+    Item của nguồn batch dùng chung pha của nguồn (xem CheckAPI._phase_key) nên
+    đến hạn cùng lúc.
+
+    Sử dụng:
+        data_array = await ApiBatchUtil.fetch(
+            api_name, api_cfg.batch, symbol, lambda url: fetch_array(url)
+        )
+    """
+
+    _logger = None
+    _pending: Dict[str, _PendingBatch] = {}
+    _stats = {"symbols": 0, "requests": 0}
+
+    @staticmethod
+    def _get_logger():
+        """Lazy load logger"""
+        if ApiBatchUtil._logger is None:
+            ApiBatchUtil._logger = LoggerConfig.logger_config("ApiBatchUtil")
+        return ApiBatchUtil._logger
+
+    @staticmethod
+    async def fetch(
+        source_name: str,
+        batch_cfg,
+        symbol: str,
+        fetch_array: Callable[[str], Awaitable[List]],
+    ) -> List:
+        """
+        Lấy các record của 1 symbol qua batch request
+
+        Args:
+            source_name: Tên nguồn API
+            batch_cfg: ApiBatchConfig đã compile
+            symbol: Symbol của item
+            fetch_array: Hàm async (url) → list record của response
+
+        Returns:
+            List record của symbol (rỗng nếu response không có symbol)
+        """
+        pending = ApiBatchUtil._pending.get(source_name)
+        if pending is None:
+            pending = _PendingBatch(fetch_array)
+            ApiBatchUtil._pending[source_name] = pending
+            asyncio.get_running_loop().call_later(
+                batch_cfg.window, ApiBatchUtil._flush, source_name, pending, batch_cfg
+            )
+
+        future = pending.futures.get(symbol)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            pending.futures[symbol] = future
+            ApiBatchUtil._stats["symbols"] += 1
+            if len(pending.futures) >= batch_cfg.size:
+                ApiBatchUtil._flush(source_name, pending, batch_cfg)
+
+        # shield: 1 item bị cancel không hủy kết quả của các item khác
+        return await asyncio.shield(future)
+
+    @staticmethod
+    def _flush(source_name: str, pending: _PendingBatch, batch_cfg) -> None:
+        """Gửi các chunk của batch (bỏ qua nếu batch đã flush trước đó)"""
+        if ApiBatchUtil._pending.get(source_name) is not pending:
+            return
+        del ApiBatchUtil._pending[source_name]
+
+        symbols = sorted(pending.futures)
+        for start in range(0, len(symbols), batch_cfg.size):
+            chunk = tuple(symbols[start : start + batch_cfg.size])
+            asyncio.ensure_future(
+                ApiBatchUtil._fetch_chunk(source_name, pending, batch_cfg, chunk)
+            )
+
+    @staticmethod
+    async def _fetch_chunk(
+        source_name: str, pending: _PendingBatch, batch_cfg, chunk: Tuple[str, ...]
+    ) -> None:
+        """1 request cho 1 chunk, chia record theo symbol"""
+        futures = [pending.futures[symbol] for symbol in chunk]
+        ApiBatchUtil._stats["requests"] += 1
+        try:
+            data_array = await pending.fetch_array(batch_cfg.url_for(chunk))
+        except BaseException as e:
+            cancelled = isinstance(e, asyncio.CancelledError)
+            for future in futures:
+                if future.done():
+                    continue
+                if cancelled:
+                    future.cancel()
+                else:
+                    future.set_exception(e)
+                    # Tránh warning "exception was never retrieved" khi item đã bị cancel
+                    future.exception()
+            if cancelled:
+                raise
+            return
+
+        grouped = defaultdict(list)
+        key = batch_cfg.symbol_key
+        for record in data_array:
+            if isinstance(record, dict):
+                grouped[str(record.get(key))].append(record)
+
+        for symbol, future in zip(chunk, futures):
+            if not future.done():
+                future.set_result(grouped.get(symbol, []))
+
+        ApiBatchUtil._get_logger().debug(
+            f"[{source_name}] Batch {len(chunk)} symbols, {len(data_array)} records"
+        )
+
+    @staticmethod
+    def get_stats() -> Dict[str, int]:
+        """Số symbol đã probe qua batch và số request thực sự gửi"""
+        return dict(ApiBatchUtil._stats)
@@ -0,0 +1,286 @@
+"""
+Bulkhead Utility
+Giới hạn số probe đồng thời (max_in_flight) và QPS (token bucket) cho từng backend:
+theo profile `user_connect` (database) và theo host của URL (API)
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Tuple
+from urllib.parse import urlsplit
+
+from configs.logging_config import LoggerConfig
+
+
+class TokenBucket:
+    """
+    Token bucket cho QPS budget
+
+    Attributes:
+        rate: Số token nạp mỗi giây (<= 0 = không giới hạn)
+        burst: Số token tối đa tích lũy
+    """
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+
+    def reserve(self) -> float:
+        """
+        Lấy 1 token (có thể lấy trước token tương lai)
+
+        Returns:
+            Số giây phải chờ trước khi được dùng token
+        """
+        if self.rate <= 0:
+            return 0.0
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens / self.rate
+
+
+class Bulkhead:
+    """
+    Bulkhead của 1 backend: slot in-flight + token bucket + hàng đợi theo priority
+
+    Mỗi priority class chỉ được dùng tối đa `share` phần slot (critical = 100%),
+    nên dưới tải các nguồn critical luôn còn slot. Waiter được đánh thức theo
+    thứ tự (rank, thứ tự đến).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_in_flight: int,
+        qps: float,
+        burst: float,
+        shares: Dict[int, float],
+    ):
+        self.name = name
+        self.max_in_flight = max(1, int(max_in_flight))
+        self.bucket = TokenBucket(qps, burst)
+        self.shares = shares
+        self.in_flight = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+
+        # Metrics (reset sau mỗi lần đọc)
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._acquired = 0
+
+    def _limit_for(self, rank: int) -> int:
+        """Số slot tối đa priority rank được dùng"""
+        share = self.shares.get(rank, 1.0)
+        return max(1, int(self.max_in_flight * share))
+
+    def _wake_waiters(self) -> None:
+        """Trao slot trống cho waiter ưu tiên nhất còn trong giới hạn của nó"""
+        while self._waiters:
+            rank, _, future = self._waiters[0]
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+            if self.in_flight >= self._limit_for(rank):
+                return
+            heapq.heappop(self._waiters)
+            self.in_flight += 1
+            future.set_result(None)
+
+    async def acquire(self, rank: int) -> float:
+        """
+        Chờ slot + token
+
+        Args:
+            rank: Priority rank (0 = critical)
+
+        Returns:
+            Số giây đã chờ trong hàng đợi
+        """
+        started = time.monotonic()
+
+        if not self._waiters and self.in_flight < self._limit_for(rank):
+            self.in_flight += 1
+        else:
+            future = asyncio.get_running_loop().create_future()
+            heapq.heappush(self._waiters, (rank, next(self._seq), future))
+            try:
+                await future
+            except asyncio.CancelledError:
+                if future.done() and not future.cancelled():
+                    # Đã được trao slot nhưng bị cancel - trả lại
+                    self.release()
+                raise
+
+        delay = self.bucket.reserve()
+        if delay > 0:
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                self.release()
+                raise
+
+        waited = time.monotonic() - started
+        self._wait_total += waited
+        self._wait_max = max(self._wait_max, waited)
+        self._acquired += 1
+        return waited
+
+    def release(self) -> None:
+        """Trả slot"""
+        self.in_flight -= 1
+        self._wake_waiters()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Returns:
+            Dict: in_flight, queued, acquired, wait_avg, wait_max (giây)
+        """
+        stats = {
+            "in_flight": self.in_flight,
+            "queued": sum(1 for _, _, f in self._waiters if not f.done()),
+            "acquired": self._acquired,
+            "wait_avg": round(self._wait_total / self._acquired, 3)
+            if self._acquired
+            else 0.0,
+            "wait_max": round(self._wait_max, 3),
+        }
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._acquired = 0
+        return stats
+
+
+class BulkheadUtil:
+    """
+    Registry bulkhead dùng chung toàn process
+
+    Config: MONITOR_CONFIG.bulkheads trong common_config.json
+        {
+            "default": {"max_in_flight": 4, "qps": 0, "burst": 1},
+            "targets": {"host:192.168.110.164:8000": {"max_in_flight": 8, "qps": 20}},
+            "priority_share": {"critical": 1.0, "normal": 0.75, "low": 0.5}
+        }
+    `qps` = 0 là không giới hạn QPS. Bulkhead được tạo lần đầu theo config hiện
+    tại và tạo lại khi config của target đổi.
+
+    Sử dụng:
+        async with BulkheadUtil.limit(BulkheadUtil.host_target(url), rank):
+            ...probe...
+    """
+
+    DEFAULT_CONFIG = {"max_in_flight": 4, "qps": 0, "burst": 1}
+
+    _logger = None
+    _bulkheads: Dict[str, Tuple[Any, Bulkhead]] = {}
+
+    @staticmethod
+    def _get_logger():
+        """Lazy load logger"""
+        if BulkheadUtil._logger is None:
+            BulkheadUtil._logger = LoggerConfig.logger_config("BulkheadUtil")
+        return BulkheadUtil._logger
+
+    @staticmethod
+    def host_target(url: str) -> str:
+        """Target key theo host (kèm port) của URL"""
+        return f"host:{urlsplit(url).netloc.lower()}"
+
+    @staticmethod
+    def profile_target(user_connect: str) -> str:
+        """Target key theo connection profile database"""
+        return f"profile:{user_connect}"
+
+    @staticmethod
+    def _get_config() -> dict:
+        from utils.load_config_util import LoadConfigUtil
+
+        common_config = LoadConfigUtil.load_json_to_variable("common_config.json")
+        return common_config.get("MONITOR_CONFIG", {}).get("bulkheads", {})
+
+    @staticmethod
+    def get(target: str) -> Bulkhead:
+        """
+        Lấy (hoặc tạo) bulkhead của target
+
+        Args:
+            target: Key của backend (xem `host_target`, `profile_target`)
+
+        Returns:
+            Bulkhead
+        """
+        from utils.source_config_util import PRIORITY_RANKS
+
+        config = BulkheadUtil._get_config()
+        target_config = dict(BulkheadUtil.DEFAULT_CONFIG)
+        target_config.update(config.get("default", {}))
+        target_config.update(config.get("targets", {}).get(target, {}))
+        share_config = config.get("priority_share", {})
+        fingerprint = (
+            tuple(sorted(target_config.items())),
+            tuple(sorted(share_config.items())),
+        )
+
+        cached = BulkheadUtil._bulkheads.get(target)
+        if cached is not None and cached[0] == fingerprint:
+            return cached[1]
+
+        shares = {
+            rank: float(share_config.get(name, 1.0))
+            for name, rank in PRIORITY_RANKS.items()
+        }
+        bulkhead = Bulkhead(
+            target,
+            max_in_flight=target_config["max_in_flight"],
+            qps=float(target_config["qps"]),
+            burst=float(target_config["burst"]),
+            shares=shares,
+        )
+        # Probe đang giữ slot của bulkhead cũ sẽ release trên bulkhead cũ
+        BulkheadUtil._bulkheads[target] = (fingerprint, bulkhead)
+        return bulkhead
+
+    @staticmethod
+    @asynccontextmanager
+    async def limit(target: str, rank: int = 1):
+        """
+        Context manager: chờ slot + token của target, trả slot khi xong
+
+        Args:
+            target: Key của backend
+            rank: Priority rank của nguồn (0 = critical)
+        """
+        bulkhead = BulkheadUtil.get(target)
+        await bulkhead.acquire(rank)
+        try:
+            yield bulkhead
+        finally:
+            bulkhead.release()
+
+    @staticmethod
+    def get_stats() -> Dict[str, Dict[str, Any]]:
+        """Metrics của tất cả bulkhead (reset sau mỗi lần đọc)"""
+        return {
+            target: bulkhead.get_stats()
+            for target, (_, bulkhead) in BulkheadUtil._bulkheads.items()
+        }
+
+    @staticmethod
+    def log_stats() -> None:
+        """Log metrics các bulkhead có probe trong kỳ"""
+        for target, stats in BulkheadUtil.get_stats().items():
+            if not stats["acquired"] and not stats["queued"]:
+                continue
+            BulkheadUtil._get_logger().info(
+                f"Bulkhead {target}: in_flight={stats['in_flight']} queued={stats['queued']} "
+                f"acquired={stats['acquired']} wait avg={stats['wait_avg']}s max={stats['wait_max']}s"
+            )
@@ -0,0 +1,246 @@
+"""
+Circuit Breaker Utility
+Circuit breaker theo host cho API probe: sau N lỗi kết nối liên tiếp thì mở mạch,
+chặn toàn bộ probe tới host và chỉ cho 1 probe thử (half-open) sau mỗi khoảng backoff
+"""
+
+import time
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+from configs.logging_config import LoggerConfig
+
+
+class CircuitBreaker:
+    """
+    Trạng thái circuit breaker của 1 host
+
+    - closed: probe bình thường, đếm lỗi kết nối liên tiếp
+    - open: chặn mọi probe tới `open_until`
+    - half_open: đã cho 1 probe thử đi, các probe khác vẫn bị chặn tới khi có kết quả
+    Probe thử thành công → closed; thất bại → open lại với thời gian mở nhân đôi
+    (tối đa `max_open_seconds`).
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, host: str):
+        self.host = host
+        self.state = CircuitBreaker.CLOSED
+        self.failures = 0
+        self.open_seconds = 0.0
+        self.open_until = 0.0
+        self.opened_at: Optional[float] = None
+        self.rejected = 0
+
+    def allow(self, now: float) -> bool:
+        """
+        Probe có được gửi không (chuyển open → half_open khi hết thời gian mở)
+
+        Args:
+            now: time.monotonic()
+        """
+        if self.state == CircuitBreaker.CLOSED:
+            return True
+        if self.state == CircuitBreaker.OPEN and now >= self.open_until:
+            # Caller này là probe thử duy nhất
+            self.state = CircuitBreaker.HALF_OPEN
+            return True
+        self.rejected += 1
+        return False
+
+    def record_success(self) -> bool:
+        """
+        Host phản hồi (kể cả HTTP status lỗi)
+
+        Returns:
+            True nếu mạch vừa đóng lại (host phục hồi)
+        """
+        recovered = self.state != CircuitBreaker.CLOSED
+        self.state = CircuitBreaker.CLOSED
+        self.failures = 0
+        self.open_seconds = 0.0
+        self.opened_at = None
+        self.rejected = 0
+        return recovered
+
+    def record_failure(
+        self, now: float, threshold: int, open_seconds: float, max_open_seconds: float
+    ) -> bool:
+        """
+        Lỗi kết nối tới host
+
+        Returns:
+            True nếu mạch vừa chuyển sang open
+        """
+        self.failures += 1
+        if self.state == CircuitBreaker.HALF_OPEN:
+            # Probe thử thất bại: mở lại, backoff nhân đôi
+            self.open_seconds = min(max_open_seconds, self.open_seconds * 2)
+        elif self.state == CircuitBreaker.CLOSED and self.failures >= threshold:
+            self.open_seconds = open_seconds
+            self.opened_at = now
+        else:
+            return False
+        self.state = CircuitBreaker.OPEN
+        self.open_until = now + self.open_seconds
+        return True
+
+    def record_inconclusive(self, now: float) -> None:
+        """Probe không cho biết host sống hay chết (read timeout, bị cancel...)"""
+        if self.state == CircuitBreaker.HALF_OPEN:
+            # Cho probe kế tiếp thử lại ngay, giữ nguyên backoff
+            self.state = CircuitBreaker.OPEN
+            self.open_until = now
+
+    def retry_after(self, now: float) -> float:
+        """Số giây tới lần probe thử kế tiếp"""
+        return max(0.0, self.open_until - now)
+
+
+class CircuitBreakerUtil:
+    """
+    Registry circuit breaker theo host (dùng chung toàn process)
+
+    Config: MONITOR_CONFIG.circuit_breaker trong common_config.json
+        {"enable": true, "failure_threshold": 5, "open_seconds": 10,
+         "max_open_seconds": 300}
+    Chỉ lỗi kết nối (từ chối kết nối, DNS, connect timeout) được tính là lỗi;
+    host trả response (kể cả HTTP 4xx/5xx) được coi là còn sống.
+
+    Sử dụng (trong HttpClientUtil.open):
+        if not CircuitBreakerUtil.allow(host):
+            raise CircuitOpenError(...)
+        CircuitBreakerUtil.record_success(host) / record_failure(host)
+    """
+
+    DEFAULT_CONFIG = {
+        "enable": True,
+        "failure_threshold": 5,
+        "open_seconds": 10,
+        "max_open_seconds": 300,
+    }
+
+    _logger = None
+    _breakers: Dict[str, CircuitBreaker] = {}
+
+    @staticmethod
+    def _get_logger():
+        """Lazy load logger"""
+        if CircuitBreakerUtil._logger is None:
+            CircuitBreakerUtil._logger = LoggerConfig.logger_config(
+                "CircuitBreakerUtil"
+            )
+        return CircuitBreakerUtil._logger
+
+    @staticmethod
+    def get_config() -> dict:
+        """MONITOR_CONFIG.circuit_breaker (đã merge default)"""
+        from utils.load_config_util import LoadConfigUtil
+
+        common_config = LoadConfigUtil.load_json_to_variable("common_config.json")
+        config = dict(CircuitBreakerUtil.DEFAULT_CONFIG)
+        config.update(common_config.get("MONITOR_CONFIG", {}).get("circuit_breaker", {}))
+        return config
+
+    @staticmethod
+    def host_of(url: str) -> str:
+        """host[:port] viết thường của URL"""
+        return urlsplit(url).netloc.lower()
+
+    @staticmethod
+    def _get(host: str) -> CircuitBreaker:
+        breaker = CircuitBreakerUtil._breakers.get(host)
+        if breaker is None:
+            breaker = CircuitBreaker(host)
+            CircuitBreakerUtil._breakers[host] = breaker
+        return breaker
+
+    @staticmethod
+    def allow(host: str) -> bool:
+        """
+        Probe tới host có được gửi không
+
+        Args:
+            host: host[:port]
+
+        Returns:
+            False nếu mạch đang mở (hoặc đang có probe thử)
+        """
+        if not CircuitBreakerUtil.get_config()["enable"]:
+            return True
+        return CircuitBreakerUtil._get(host).allow(time.monotonic())
+
+    @staticmethod
+    def record_success(host: str) -> None:
+        """Host đã phản hồi"""
+        breaker = CircuitBreakerUtil._breakers.get(host)
+        if breaker is None:
+            return
+        down_seconds = (
+            time.monotonic() - breaker.opened_at if breaker.opened_at else 0.0
+        )
+        rejected = breaker.rejected
+        if breaker.record_success():
+            CircuitBreakerUtil._get_logger().info(
+                f"Circuit breaker đóng cho {host}: host đã phục hồi sau "
+                f"{down_seconds:.0f}s, đã chặn {rejected} probe"
+            )
+
+    @staticmethod
+    def record_failure(host: str) -> None:
+        """Lỗi kết nối tới host"""
+        config = CircuitBreakerUtil.get_config()
+        if not config["enable"]:
+            return
+        breaker = CircuitBreakerUtil._get(host)
+        now = time.monotonic()
+        opened = breaker.record_failure(
+            now,
+            threshold=max(1, int(config["failure_threshold"])),
+            open_seconds=max(1.0, float(config["open_seconds"])),
+            max_open_seconds=max(1.0, float(config["max_open_seconds"])),
+        )
+        if opened:
+            CircuitBreakerUtil._get_logger().warning(
+                f"Circuit breaker mở cho {host} sau {breaker.failures} lỗi kết nối liên tiếp, "
+                f"probe thử lại sau {breaker.open_seconds:.0f}s"
+            )
+
+    @staticmethod
+    def record_inconclusive(host: str) -> None:
+        """Probe kết thúc mà không biết host sống hay chết"""
+        breaker = CircuitBreakerUtil._breakers.get(host)
+        if breaker is not None:
+            breaker.record_inconclusive(time.monotonic())
+
+    @staticmethod
+    def is_open(host: str) -> bool:
+        """Mạch của host đang mở hoặc half-open"""
+        breaker = CircuitBreakerUtil._breakers.get(host)
+        return breaker is not None and breaker.state != CircuitBreaker.CLOSED
+
+    @staticmethod
+    def retry_after(host: str) -> float:
+        """Số giây tới lần probe thử kế tiếp của host (0 nếu mạch đóng)"""
+        breaker = CircuitBreakerUtil._breakers.get(host)
+        if breaker is None or breaker.state == CircuitBreaker.CLOSED:
+            return 0.0
+        return breaker.retry_after(time.monotonic())
+
+    @staticmethod
+    def get_stats() -> Dict[str, Dict[str, Any]]:
+        """Trạng thái các host có mạch không đóng"""
+        now = time.monotonic()
+        return {
+            host: {
+                "state": breaker.state,
+                "failures": breaker.failures,
+                "retry_after": round(breaker.retry_after(now), 1),
+                "rejected": breaker.rejected,
+            }
+            for host, breaker in CircuitBreakerUtil._breakers.items()
+            if breaker.state != CircuitBreaker.CLOSED
+        }
@@ -0,0 +1,490 @@
+"""
+Cluster Utility
+Chạy nhiều instance giám sát (nhiều host): mỗi node giữ lease trên 1 phần shard
+của không gian item (source/symbol) trong store dùng chung (SQLite hoặc PostgreSQL),
+và ghi nhận alert đã gửi vào store để mỗi alert chỉ được gửi 1 lần
+"""
+
+import asyncio
+import hashlib
+import math
+import os
+import socket
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from configs.logging_config import LoggerConfig
+
+
+class LeaseStore:
+    """
+    Store lease + alert record trên 1 bảng SQL dùng chung
+
+    Bảng:
+        monitor_nodes(node_id, expires_at): heartbeat của các node
+        monitor_leases(shard, owner, expires_at): shard đang thuộc node nào
+        monitor_alerts(alert_key, node_id, sent_at): lần gửi cuối của mỗi alert
+
+    Mọi thao tác là 1 câu lệnh (upsert có điều kiện) nên không cần transaction
+    nhiều bước và chạy lại được: mất kết nối (server restart, mạng chập chờn)
+    → mở lại connection và chạy lại câu lệnh 1 lần. Thời gian là epoch giây
+    (các host cần đồng bộ NTP).
+    """
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS monitor_nodes ("
+        "node_id TEXT PRIMARY KEY, expires_at DOUBLE PRECISION NOT NULL)",
+        "CREATE TABLE IF NOT EXISTS monitor_leases ("
+        "shard INTEGER PRIMARY KEY, owner TEXT NOT NULL, "
+        "expires_at DOUBLE PRECISION NOT NULL)",
+        "CREATE TABLE IF NOT EXISTS monitor_alerts ("
+        "alert_key TEXT PRIMARY KEY, node_id TEXT NOT NULL, "
+        "sent_at DOUBLE PRECISION NOT NULL)",
+    )
+
+    def __init__(
+        self,
+        connect: Callable[[], Any],
+        placeholder: str,
+        disconnect_errors: Tuple[type, ...] = (),
+    ):
+        """
+        Args:
+            connect: Hàm mở DB-API connection ở chế độ autocommit
+            placeholder: Paramstyle của driver ("?" cho sqlite3, "%s" cho psycopg2)
+            disconnect_errors: Exception mất kết nối của driver → reconnect và
+                               chạy lại 1 lần (rỗng = không reconnect)
+        """
+        self.connect = connect
+        self.placeholder = placeholder
+        self.disconnect_errors = disconnect_errors
+        self.connection = connect()
+        self._lock = threading.Lock()
+        for statement in self.SCHEMA:
+            self._execute(statement)
+
+    @staticmethod
+    def open_sqlite(path: str) -> "LeaseStore":
+        """
+        Store trên file SQLite (các node cùng máy hoặc cùng filesystem dùng chung)
+
+        Args:
+            path: Đường dẫn file .db
+        """
+        import sqlite3
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        return LeaseStore(
+            lambda: sqlite3.connect(
+                path, timeout=10, isolation_level=None, check_same_thread=False
+            ),
+            "?",
+        )
+
+    @staticmethod
+    def open_postgres(config: Dict[str, Any]) -> "LeaseStore":
+        """
+        Store trên PostgreSQL (các node ở nhiều host)
+
+        Args:
+            config: POSTGRE_CONFIG của 1 connection profile trong DATABASE_CONNECTIONS
+        """
+        try:
+            import psycopg2
+        except ImportError:
+            raise ImportError(
+                "Thiếu thư viện PostgreSQL. Cài đặt: pip install psycopg2-binary"
+            )
+
+        def connect():
+            connection = psycopg2.connect(
+                host=config["host"],
+                port=config.get("port", 5432),
+                database=config["database"],
+                user=config.get("user") or config.get("username"),
+                password=config["password"],
+                connect_timeout=10,
+            )
+            connection.autocommit = True
+            return connection
+
+        return LeaseStore(
+            connect, "%s", (psycopg2.OperationalError, psycopg2.InterfaceError)
+        )
+
+    def _execute(self, sql: str, params: Iterable = ()) -> List[tuple]:
+        """
+        Chạy 1 câu lệnh, trả về rows (SELECT) hoặc [(rowcount,)]
+
+        Lỗi mất kết nối (`disconnect_errors` và connection đã bị đóng) → mở lại
+        connection và chạy lại đúng 1 lần; reconnect lỗi thì lần gọi sau thử lại.
+        """
+        sql = sql.replace("?", self.placeholder)
+        params = tuple(params)
+        with self._lock:
+            for attempt in range(2):
+                try:
+                    cursor = self.connection.cursor()
+                    try:
+                        cursor.execute(sql, params)
+                        if cursor.description is not None:
+                            return cursor.fetchall()
+                        return [(cursor.rowcount,)]
+                    finally:
+                        cursor.close()
+                except self.disconnect_errors as e:
+                    if attempt == 1 or not getattr(self.connection, "closed", False):
+                        raise
+                    ClusterUtil._get_logger().warning(
+                        f"Mất kết nối lease store ({str(e).strip()}), reconnect và thử lại"
+                    )
+                    self.close()
+                    self.connection = self.connect()
+
+    def heartbeat(self, node_id: str, expires_at: float) -> None:
+        """Gia hạn sự hiện diện của node"""
+        self._execute(
+            "INSERT INTO monitor_nodes (node_id, expires_at) VALUES (?, ?) "
+            "ON CONFLICT (node_id) DO UPDATE SET expires_at = excluded.expires_at",
+            (node_id, expires_at),
+        )
+
+    def remove_node(self, node_id: str) -> None:
+        """Xóa node khi shutdown (các node khác rebalance ngay)"""
+        self._execute("DELETE FROM monitor_nodes WHERE node_id = ?", (node_id,))
+
+    def alive_nodes(self, now: float) -> List[str]:
+        """Các node còn heartbeat"""
+        rows = self._execute(
+            "SELECT node_id FROM monitor_nodes WHERE expires_at > ? ORDER BY node_id",
+            (now,),
+        )
+        return [row[0] for row in rows]
+
+    def renew(self, node_id: str, now: float, expires_at: float) -> Set[int]:
+        """
+        Gia hạn các lease còn hiệu lực của node
+
+        Returns:
+            Tập shard node đang giữ
+        """
+        self._execute(
+            "UPDATE monitor_leases SET expires_at = ? "
+            "WHERE owner = ? AND expires_at > ?",
+            (expires_at, node_id, now),
+        )
+        rows = self._execute(
+            "SELECT shard FROM monitor_leases WHERE owner = ? AND expires_at > ?",
+            (node_id, now),
+        )
+        return {row[0] for row in rows}
+
+    def free_shards(self, shard_count: int, now: float) -> List[int]:
+        """Shard chưa có lease hoặc lease đã hết hạn"""
+        rows = self._execute(
+            "SELECT shard FROM monitor_leases WHERE expires_at > ?", (now,)
+        )
+        taken = {row[0] for row in rows}
+        return [shard for shard in range(shard_count) if shard not in taken]
+
+    def claim(self, shard: int, node_id: str, now: float, expires_at: float) -> bool:
+        """
+        Lấy lease của shard nếu shard đang trống/hết hạn
+
+        Returns:
+            True nếu node giành được lease
+        """
+        rows = self._execute(
+            "INSERT INTO monitor_leases (shard, owner, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT (shard) DO UPDATE SET owner = excluded.owner, "
+            "expires_at = excluded.expires_at "
+            "WHERE monitor_leases.expires_at <= ? OR monitor_leases.owner = excluded.owner",
+            (shard, node_id, expires_at, now),
+        )
+        return rows[0][0] > 0
+
+    def release(self, node_id: str, shards: Iterable[int]) -> None:
+        """Trả lease (đặt hết hạn ngay) để node khác nhận"""
+        for shard in shards:
+            self._execute(
+                "UPDATE monitor_leases SET expires_at = 0 WHERE shard = ? AND owner = ?",
+                (shard, node_id),
+            )
+
+    def claim_alert(self, alert_key: str, node_id: str, now: float, window: float) -> bool:
+        """
+        Ghi nhận gửi alert nếu chưa node nào gửi alert này trong `window` giây
+
+        Returns:
+            True nếu node này được gửi
+        """
+        # Điều kiện thứ 2: câu lệnh chạy lại sau khi mất kết nối mà lần đầu đã ghi
+        # xong vẫn nhận là node này được gửi
+        rows = self._execute(
+            "INSERT INTO monitor_alerts (alert_key, node_id, sent_at) VALUES (?, ?, ?) "
+            "ON CONFLICT (alert_key) DO UPDATE SET node_id = excluded.node_id, "
+            "sent_at = excluded.sent_at WHERE monitor_alerts.sent_at <= ? "
+            "OR (monitor_alerts.node_id = excluded.node_id "
+            "AND monitor_alerts.sent_at = excluded.sent_at)",
+            (alert_key, node_id, now, now - window),
+        )
+        return rows[0][0] > 0
+
+    def close(self) -> None:
+        try:
+            self.connection.close()
+        except Exception:
+            pass
+
+
+class ClusterShardFilter:
+    """
+    Bộ lọc item theo lease của node (cùng interface với ShardFilter)
+
+    `version` tăng mỗi khi tập shard đổi để TaskReconciler đồng bộ lại item.
+    """
+
+    def __init__(self, shard_count: int):
+        self.shard_count = shard_count
+        self.shards: Set[int] = set()
+        self.version = 0
+
+    def shard_of(self, display_name: str) -> int:
+        """Shard của item (ổn định giữa các host)"""
+        digest = hashlib.md5(display_name.encode("utf-8")).digest()
+        return int.from_bytes(digest[:8], "big") % self.shard_count
+
+    def owns(self, display_name: str) -> bool:
+        """True nếu node đang giữ lease shard của item"""
+        return self.shard_of(display_name) in self.shards
+
+    def update(self, shards: Set[int]) -> None:
+        if shards != self.shards:
+            self.shards = set(shards)
+            self.version += 1
+
+    def __repr__(self) -> str:
+        return f"ClusterShardFilter({len(self.shards)}/{self.shard_count} shards)"
+
+
+class ClusterUtil:
+    """
+    Điều phối nhiều node qua lease (dùng chung toàn process)
+
+    Config: MONITOR_CONFIG.cluster trong common_config.json
+        {
+            "enable": false,
+            "backend": "sqlite",              # hoặc "postgres"
+            "sqlite_path": "cache/cluster.db",
+            "user_connect": "duc_le_connect", # profile POSTGRE_CONFIG khi backend = postgres
+            "node_id": null,                  # mặc định <hostname>-<pid>
+            "shard_count": 64,
+            "lease_ttl": 30,
+            "renew_interval": 10
+        }
+
+    Mỗi vòng renew: heartbeat node, gia hạn lease đang giữ, trả bớt lease nếu giữ
+    quá ceil(shard_count / số node), giành shard trống/hết hạn nếu còn thiếu.
+    Node chết → lease hết hạn sau `lease_ttl` và được node khác nhận.
+
+    Sử dụng:
+        shard = ClusterUtil.start()
+        checker = CheckAPI(scheduler=scheduler, shard=shard)
+        await asyncio.gather(ClusterUtil.run(), checker.run_api_tasks())
+    """
+
+    DEFAULT_CONFIG = {
+        "enable": False,
+        "backend": "sqlite",
+        "sqlite_path": "cache/cluster.db",
+        "user_connect": "duc_le_connect",
+        "node_id": None,
+        "shard_count": 64,
+        "lease_ttl": 30,
+        "renew_interval": 10,
+    }
+
+    _logger = None
+    _store: Optional[LeaseStore] = None
+    _node_id: Optional[str] = None
+    _filter: Optional[ClusterShardFilter] = None
+    # Epoch time lease hiện tại hết hạn nếu không renew được
+    _lease_deadline = 0.0
+
+    @staticmethod
+    def _get_logger():
+        """Lazy load logger"""
+        if ClusterUtil._logger is None:
+            ClusterUtil._logger = LoggerConfig.logger_config("ClusterUtil")
+        return ClusterUtil._logger
+
+    @staticmethod
+    def get_config() -> dict:
+        """MONITOR_CONFIG.cluster (đã merge với giá trị mặc định)"""
+        from utils.load_config_util import LoadConfigUtil
+
+        common_config = LoadConfigUtil.load_json_to_variable("common_config.json")
+        config = dict(ClusterUtil.DEFAULT_CONFIG)
+        config.update(common_config.get("MONITOR_CONFIG", {}).get("cluster", {}))
+        return config
+
+    @staticmethod
+    def is_enabled() -> bool:
+        return bool(ClusterUtil.get_config()["enable"])
+
+    @staticmethod
+    def is_active() -> bool:
+        """True nếu process đã join cluster"""
+        return ClusterUtil._store is not None
+
+    @staticmethod
+    def _open_store(config: dict) -> LeaseStore:
+        from utils.load_config_util import LoadConfigUtil
+
+        if config["backend"] == "postgres":
+            common_config = LoadConfigUtil.load_json_to_variable("common_config.json")
+            profile = (
+                common_config.get("DATABASE_CONNECTIONS", {})
+                .get(config["user_connect"], {})
+                .get("POSTGRE_CONFIG")
+            )
+            if not profile:
+                raise ValueError(
+                    f"Không tìm thấy POSTGRE_CONFIG của profile '{config['user_connect']}'"
+                )
+            return LeaseStore.open_postgres(dict(profile))
+
+        path = config["sqlite_path"]
+        if not os.path.isabs(path):
+            path = str(LoadConfigUtil._get_project_root() / path)
+        return LeaseStore.open_sqlite(path)
+
+    @staticmethod
+    def start(node_suffix: Optional[str] = None) -> ClusterShardFilter:
+        """
+        Join cluster: mở store và chạy vòng lease đầu tiên
+
+        Args:
+            node_suffix: Hậu tố node_id (vd: index worker khi chạy --workers)
+
+        Returns:
+            ClusterShardFilter truyền cho các checker
+        """
+        config = ClusterUtil.get_config()
+        node_id = config["node_id"] or f"{socket.gethostname()}-{os.getpid()}"
+        if node_suffix is not None:
+            node_id = f"{node_id}-{node_suffix}"
+
+        ClusterUtil._node_id = node_id
+        ClusterUtil._store = ClusterUtil._open_store(config)
+        ClusterUtil._filter = ClusterShardFilter(int(config["shard_count"]))
+        ClusterUtil._get_logger().info(
+            f"Node {node_id} join cluster (backend={config['backend']}, "
+            f"shards={config['shard_count']})"
+        )
+        ClusterUtil.renew()
+        return ClusterUtil._filter
+
+    @staticmethod
+    def _rank(node_id: str, shard: int) -> bytes:
+        """Thứ tự ưu tiên shard riêng cho mỗi node (giảm tranh chấp khi claim)"""
+        return hashlib.md5(f"{node_id}:{shard}".encode("utf-8")).digest()
+
+    @staticmethod
+    def renew() -> None:
+        """1 vòng heartbeat + renew + rebalance lease"""
+        store = ClusterUtil._store
+        node_id = ClusterUtil._node_id
+        shard_filter = ClusterUtil._filter
+        config = ClusterUtil.get_config()
+        lease_ttl = float(config["lease_ttl"])
+
+        try:
+            now = time.time()
+            expires_at = now + lease_ttl
+            store.heartbeat(node_id, expires_at)
+            nodes = store.alive_nodes(now)
+            owned = store.renew(node_id, now, expires_at)
+
+            target = math.ceil(shard_filter.shard_count / max(1, len(nodes)))
+            if len(owned) > target:
+                extra = sorted(owned, key=lambda s: ClusterUtil._rank(node_id, s))[target:]
+                store.release(node_id, extra)
+                owned -= set(extra)
+            elif len(owned) < target:
+                free = sorted(
+                    store.free_shards(shard_filter.shard_count, now),
+                    key=lambda s: ClusterUtil._rank(node_id, s),
+                )
+                for shard in free:
+                    if len(owned) >= target:
+                        break
+                    if store.claim(shard, node_id, now, expires_at):
+                        owned.add(shard)
+
+            ClusterUtil._lease_deadline = expires_at
+            if owned != shard_filter.shards:
+                ClusterUtil._get_logger().info(
+                    f"Node {node_id}: giữ {len(owned)}/{shard_filter.shard_count} shards "
+                    f"({len(nodes)} nodes)"
+                )
+            shard_filter.update(owned)
+        except Exception as e:
+            ClusterUtil._get_logger().error(f"Lỗi renew lease: {e}")
+            if time.time() >= ClusterUtil._lease_deadline and shard_filter.shards:
+                # Lease đã hết hạn trong store - node khác có thể đã nhận shard
+                ClusterUtil._get_logger().warning(
+                    f"Node {node_id}: lease hết hạn, dừng check {len(shard_filter.shards)} shards"
+                )
+                shard_filter.update(set())
+
+    @staticmethod
+    async def run() -> None:
+        """Vòng renew lease theo renew_interval; trả lease khi dừng"""
+        try:
+            while True:
+                await asyncio.sleep(float(ClusterUtil.get_config()["renew_interval"]))
+                await asyncio.to_thread(ClusterUtil.renew)
+        finally:
+            ClusterUtil.leave()
+
+    @staticmethod
+    def leave() -> None:
+        """Trả toàn bộ lease và xóa node để các node khác nhận shard ngay"""
+        store = ClusterUtil._store
+        if store is None:
+            return
+        try:
+            store.release(ClusterUtil._node_id, list(ClusterUtil._filter.shards))
+            store.remove_node(ClusterUtil._node_id)
+            ClusterUtil._get_logger().info(f"Node {ClusterUtil._node_id} rời cluster")
+        except Exception as e:
+            ClusterUtil._get_logger().error(f"Lỗi trả lease: {e}")
+        finally:
+            ClusterUtil._filter.update(set())
+            store.close()
+            ClusterUtil._store = None
+
+    @staticmethod
+    def claim_alert(alert_key: str, alert_frequency: float) -> bool:
+        """
+        Ghi nhận alert vào store dùng chung
+
+        Args:
+            alert_key: Key của alert (nguồn, symbol, level, loại lỗi)
+            alert_frequency: Tần suất alert (giây) - cửa sổ dedup = 90%
+
+        Returns:
+            True nếu node này được gửi alert (True luôn khi store lỗi)
+        """
+        store = ClusterUtil._store
+        if store is None:
+            return True
+        try:
+            window = 0.9 * float(alert_frequency or 0)
+            return store.claim_alert(alert_key, ClusterUtil._node_id, time.time(), window)
+        except Exception as e:
+            # Store lỗi: thà gửi trùng còn hơn mất alert
+            ClusterUtil._get_logger().error(f"Lỗi ghi alert record: {e}")
+            return True
@@ -0,0 +1,153 @@
+"""
+Database Batch Utility
+Gộp các probe database đến hạn gần nhau (vd: các symbol của cùng 1 nguồn) thành
+1 query gộp cho mỗi chunk, rồi chia kết quả cho từng item
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+from configs.logging_config import LoggerConfig
+
+
+class _PendingBatch:
+    """Các item đang chờ flush của 1 batch key"""
+
+    __slots__ = ("futures", "fetch_many")
+
+    def __init__(self, fetch_many):
+        self.futures: Dict[Hashable, asyncio.Future] = {}
+        self.fetch_many = fetch_many
+
+
+class DatabaseBatchUtil:
+    """
+    Batch probe database theo key (dùng chung toàn process)
+
+    - Item đầu tiên đến hạn mở 1 batch, các item cùng key đến hạn trong `window`
+      giây được gộp vào (đủ `size` item thì flush ngay)
+    - Mỗi chunk `size` item gọi `fetch_many` 1 lần (1 query GROUP BY / $group),
+      kết quả {item: datetime | Exception} được trả cho từng item; item không có
+      trong kết quả → ValueError("Query không trả về kết quả") như query đơn
+    - Lỗi của cả query (kết nối, SQL...) được trả cho tất cả item trong chunk
+
+    Item của nguồn batch dùng chung pha của nguồn (xem CheckDatabase._phase_key)
+    nên đến hạn cùng lúc.
+
+    Sử dụng:
+        latest_time = await DatabaseBatchUtil.fetch(
+            db_name, db_cfg.batch, symbol, lambda symbols: query_many(symbols)
+        )
+    """
+
+    _logger = None
+    _pending: Dict[Hashable, _PendingBatch] = {}
+    _stats = {"items": 0, "queries": 0}
+
+    @staticmethod
+    def _get_logger():
+        """Lazy load logger"""
+        if DatabaseBatchUtil._logger is None:
+            DatabaseBatchUtil._logger = LoggerConfig.logger_config("DatabaseBatchUtil")
+        return DatabaseBatchUtil._logger
+
+    @staticmethod
+    async def fetch(
+        batch_key: Hashable,
+        batch_cfg,
+        item: Hashable,
+        fetch_many: Callable[[Tuple[Hashable, ...]], Awaitable[Dict[Hashable, Any]]],
+    ) -> Any:
+        """
+        Lấy kết quả của 1 item qua batch query
+
+        Args:
+            batch_key: Key gộp batch (vd: tên nguồn)
+            batch_cfg: DatabaseBatchConfig đã compile (size, window)
+            item: Item cần probe (vd: symbol)
+            fetch_many: Hàm async (tuple item) → {item: kết quả | Exception}
+
+        Returns:
+            Kết quả của item
+
+        Raises:
+            Exception của item hoặc của cả query
+        """
+        pending = DatabaseBatchUtil._pending.get(batch_key)
+        if pending is None:
+            pending = _PendingBatch(fetch_many)
+            DatabaseBatchUtil._pending[batch_key] = pending
+            asyncio.get_running_loop().call_later(
+                batch_cfg.window, DatabaseBatchUtil._flush, batch_key, pending, batch_cfg
+            )
+
+        future = pending.futures.get(item)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            pending.futures[item] = future
+            DatabaseBatchUtil._stats["items"] += 1
+            if len(pending.futures) >= batch_cfg.size:
+                DatabaseBatchUtil._flush(batch_key, pending, batch_cfg)
+
+        # shield: 1 item bị cancel không hủy kết quả của các item khác
+        return await asyncio.shield(future)
+
+    @staticmethod
+    def _flush(batch_key: Hashable, pending: _PendingBatch, batch_cfg) -> None:
+        """Gửi các chunk của batch (bỏ qua nếu batch đã flush trước đó)"""
+        if DatabaseBatchUtil._pending.get(batch_key) is not pending:
+            return
+        del DatabaseBatchUtil._pending[batch_key]
+
+        items = sorted(pending.futures, key=repr)
+        for start in range(0, len(items), batch_cfg.size):
+            chunk = tuple(items[start : start + batch_cfg.size])
+            asyncio.ensure_future(
+                DatabaseBatchUtil._fetch_chunk(batch_key, pending, chunk)
+            )
+
+    @staticmethod
+    async def _fetch_chunk(
+        batch_key: Hashable, pending: _PendingBatch, chunk: Tuple[Hashable, ...]
+    ) -> None:
+        """1 query cho 1 chunk, chia kết quả theo item"""
+        futures = [pending.futures[item] for item in chunk]
+        DatabaseBatchUtil._stats["queries"] += 1
+        try:
+            results = await pending.fetch_many(chunk)
+        except BaseException as e:
+            cancelled = isinstance(e, asyncio.CancelledError)
+            for future in futures:
+                if future.done():
+                    continue
+                if cancelled:
+                    future.cancel()
+                else:
+                    future.set_exception(e)
+                    # Tránh warning "exception was never retrieved" khi item đã bị cancel
+                    future.exception()
+            if cancelled:
+                raise
+            return
+
+        for item, future in zip(chunk, futures):
+            if future.done():
+                continue
+            result = results.get(item)
+            if result is None:
+                future.set_exception(ValueError("Query không trả về kết quả"))
+                future.exception()
+            elif isinstance(result, Exception):
+                future.set_exception(result)
+                future.exception()
+            else:
+                future.set_result(result)
+
+        DatabaseBatchUtil._get_logger().debug(
+            f"[{batch_key}] Batch {len(chunk)} items, {len(results)} kết quả"
+        )
+
+    @staticmethod
+    def get_stats() -> Dict[str, int]:
+        """Số item đã probe qua batch và số query thực sự chạy"""
+        return dict(DatabaseBatchUtil._stats)
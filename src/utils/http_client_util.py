@@ -0,0 +1,234 @@
+"""
+HTTP Client Utility
+HTTP client asyncio (aiohttp) cho CheckAPI: mỗi host 1 connection pool keep-alive
+riêng, giới hạn connection theo host, timeout connect/read và gzip
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+from configs.logging_config import LoggerConfig
+from utils.circuit_breaker_util import CircuitBreakerUtil
+
+
+class HttpConnectionError(Exception):
+    """Không kết nối được tới server (từ chối kết nối, DNS, timeout khi connect)"""
+
+
+class CircuitOpenError(HttpConnectionError):
+    """Circuit breaker của host đang mở - probe bị chặn, không gửi request"""
+
+    def __init__(self, host: str, retry_after: float):
+        super().__init__(
+            f"Circuit breaker đang mở cho {host}, probe thử lại sau {retry_after:.0f}s"
+        )
+        self.host = host
+        self.retry_after = retry_after
+
+
+class HttpStatusError(Exception):
+    """Server trả HTTP status lỗi (>= 400)"""
+
+    def __init__(self, status: int, url: str):
+        super().__init__(f"HTTP {status} cho {url}")
+        self.status = status
+        self.url = url
+
+
+class HttpTimeoutError(Exception):
+    """Quá `read_timeout` khi chờ response"""
+
+
+class HttpClientUtil:
+    """
+    Registry ClientSession theo host (dùng chung toàn process)
+
+    Config: MONITOR_CONFIG.http trong common_config.json
+        {
+            "default": {"limit_per_host": 8, "connect_timeout": 5,
+                        "read_timeout": 10, "keepalive_timeout": 30},
+            "hosts": {"192.168.110.164:8000": {"limit_per_host": 16}}
+        }
+    Session được tạo lần đầu theo config hiện tại và tạo lại khi config của host
+    đổi (session cũ đóng sau khi các request đang chạy xong).
+
+    Sử dụng:
+        response = await HttpClientUtil.get_json(url)
+        async with HttpClientUtil.open(url) as response:
+            async for chunk in response.content.iter_chunked(65536):
+                ...
+    """
+
+    DEFAULT_CONFIG = {
+        "limit_per_host": 8,
+        "connect_timeout": 5,
+        "read_timeout": 10,
+        "keepalive_timeout": 30,
+    }
+
+    _logger = None
+    # {host: (fingerprint, ClientSession)}
+    _sessions: Dict[str, Tuple[Any, Any]] = {}
+
+    @staticmethod
+    def _get_logger():
+        """Lazy load logger"""
+        if HttpClientUtil._logger is None:
+            HttpClientUtil._logger = LoggerConfig.logger_config("HttpClientUtil")
+        return HttpClientUtil._logger
+
+    @staticmethod
+    def _import_aiohttp():
+        try:
+            import aiohttp
+        except ImportError:
+            raise ImportError("Thiếu thư viện aiohttp. Cài đặt: pip install aiohttp")
+        return aiohttp
+
+    @staticmethod
+    def get_host_config(host: str) -> dict:
+        """
+        Config của host (default + override trong MONITOR_CONFIG.http.hosts)
+
+        Args:
+            host: host[:port] viết thường
+        """
+        from utils.load_config_util import LoadConfigUtil
+
+        common_config = LoadConfigUtil.load_json_to_variable("common_config.json")
+        http_config = common_config.get("MONITOR_CONFIG", {}).get("http", {})
+        config = dict(HttpClientUtil.DEFAULT_CONFIG)
+        config.update(http_config.get("default", {}))
+        config.update(http_config.get("hosts", {}).get(host, {}))
+        return config
+
+    @staticmethod
+    def get_session(url: str):
+        """
+        Lấy (hoặc tạo) ClientSession của host trong URL
+
+        Args:
+            url: URL request
+
+        Returns:
+            aiohttp.ClientSession
+        """
+        aiohttp = HttpClientUtil._import_aiohttp()
+
+        host = urlsplit(url).netloc.lower()
+        config = HttpClientUtil.get_host_config(host)
+        fingerprint = tuple(sorted(config.items()))
+
+        cached = HttpClientUtil._sessions.get(host)
+        if cached is not None and cached[0] == fingerprint and not cached[1].closed:
+            return cached[1]
+
+        connector = aiohttp.TCPConnector(
+            limit=int(config["limit_per_host"]),
+            limit_per_host=int(config["limit_per_host"]),
+            keepalive_timeout=float(config["keepalive_timeout"]),
+        )
+        session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(
+                total=None,
+                connect=float(config["connect_timeout"]),
+                sock_read=float(config["read_timeout"]),
+            ),
+            headers={"Accept-Encoding": "gzip, deflate"},
+            raise_for_status=False,
+        )
+        HttpClientUtil._sessions[host] = (fingerprint, session)
+
+        if cached is not None and not cached[1].closed:
+            # Config đổi: đóng session cũ sau khi request đang chạy trên nó xong
+            asyncio.get_running_loop().call_later(
+                float(config["read_timeout"]) + float(config["connect_timeout"]),
+                lambda old=cached[1]: asyncio.ensure_future(old.close()),
+            )
+        HttpClientUtil._get_logger().info(
+            f"Tạo HTTP pool cho {host}: limit={config['limit_per_host']} "
+            f"connect_timeout={config['connect_timeout']}s read_timeout={config['read_timeout']}s"
+        )
+        return session
+
+    @staticmethod
+    @asynccontextmanager
+    async def open(url: str, method: str = "GET", headers: Optional[dict] = None):
+        """
+        Context manager: gửi request, trả về response để đọc body (stream)
+
+        Thoát context trước khi đọc hết body → connection bị đóng thay vì trả về pool.
+        Status < 400 (kể cả 304) được trả về cho caller xử lý.
+
+        Args:
+            url: URL request
+            method: HTTP method ("GET", "HEAD")
+            headers: Header thêm (vd: If-None-Match)
+
+        Raises:
+            CircuitOpenError: Circuit breaker của host đang mở
+            HttpConnectionError: Không kết nối được
+            HttpStatusError: HTTP status >= 400
+            HttpTimeoutError: Quá read_timeout
+        """
+        aiohttp = HttpClientUtil._import_aiohttp()
+        host = CircuitBreakerUtil.host_of(url)
+        if not CircuitBreakerUtil.allow(host):
+            raise CircuitOpenError(host, CircuitBreakerUtil.retry_after(host))
+        session = HttpClientUtil.get_session(url)
+
+        # Kết quả của probe với circuit breaker: host đã phản hồi / lỗi kết nối
+        recorded = False
+        try:
+            async with session.request(method, url, headers=headers) as response:
+                CircuitBreakerUtil.record_success(host)
+                recorded = True
+                if response.status >= 400:
+                    raise HttpStatusError(response.status, url)
+                yield response
+        except aiohttp.ConnectionTimeoutError as e:
+            # Host không nhận kết nối trong connect_timeout: tính là lỗi cho circuit breaker
+            CircuitBreakerUtil.record_failure(host)
+            recorded = True
+            raise HttpConnectionError(f"Timeout khi kết nối tới {url}") from e
+        except (aiohttp.SocketTimeoutError, asyncio.TimeoutError) as e:
+            # Đã kết nối nhưng chậm trả dữ liệu (read_timeout): host vẫn sống
+            raise HttpTimeoutError(f"Timeout đọc response từ {url}") from e
+        except (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError) as e:
+            if not recorded:
+                CircuitBreakerUtil.record_failure(host)
+                recorded = True
+            raise HttpConnectionError(str(e)) from e
+        finally:
+            if not recorded:
+                CircuitBreakerUtil.record_inconclusive(host)
+
+    @staticmethod
+    async def get_json(url: str) -> Any:
+        """
+        GET URL và parse JSON (gzip được giải nén tự động)
+
+        Args:
+            url: URL đã render theo symbol
+
+        Returns:
+            Response JSON
+
+        Raises:
+            HttpConnectionError, HttpStatusError, HttpTimeoutError: xem `open`
+        """
+        async with HttpClientUtil.open(url) as response:
+            # content_type=None: vẫn parse khi server không trả application/json
+            return await response.json(content_type=None)
+
+    @staticmethod
+    async def close_all() -> None:
+        """Đóng tất cả session (gọi khi checker dừng)"""
+        sessions = [session for _, session in HttpClientUtil._sessions.values()]
+        HttpClientUtil._sessions.clear()
+        for session in sessions:
+            if not session.closed:
+                await session.close()
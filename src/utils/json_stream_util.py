@@ -0,0 +1,653 @@
+"""
+JSON Stream Utility
+Parse response API theo từng chunk và chỉ giữ record tại record_pointer, dừng đọc
+body ngay khi đã có kết quả (thay cho parse toàn bộ payload rồi lấy 1 record)
+"""
+
+import asyncio
+import codecs
+import hashlib
+import json
+from collections import deque
+from email.utils import parsedate_to_datetime
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Optional
+
+
+# Dọn phần buffer đã parse khi vượt ngưỡng này (ký tự)
+_COMPACT_THRESHOLD = 1 << 16
+_CHUNK_SIZE = 1 << 16
+_WHITESPACE = " \t\r\n"
+_NUMBER_CHARS = "0123456789+-.eE"
+
+
+class PartialArray:
+    """
+    Mảng record chỉ giữ các phần tử cần thiết
+
+    Hỗ trợ `len()` và index (kể cả index âm) như list để CheckAPI dùng chung
+    logic kiểm tra record_pointer.
+
+    Attributes:
+        records: {index: record} đã giữ lại
+        length: Số record đã đọc (= độ dài mảng nếu complete)
+        complete: True nếu đã đọc hết mảng
+    """
+
+    __slots__ = ("records", "length", "complete")
+
+    def __init__(self, records: Dict[int, Any], length: int, complete: bool):
+        self.records = records
+        self.length = length
+        self.complete = complete
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __getitem__(self, index: int) -> Any:
+        if index < 0:
+            index += self.length
+        if index < 0 or index not in self.records:
+            raise IndexError(f"record index {index} ngoài phạm vi")
+        return self.records[index]
+
+
+class _NeedMore(Exception):
+    """Buffer chưa đủ dữ liệu để parse tiếp"""
+
+
+class StreamingRecordExtractor:
+    """
+    Parser JSON incremental cho các dạng response CheckAPI hỗ trợ:
+    `{code, message, data|result: [...]}`, `[...]`, và nested list `[[...]]`
+
+    Mỗi record được decode riêng (`json.JSONDecoder.raw_decode`) và bỏ đi nếu
+    không cần: record_pointer >= 0 → dừng ngay khi đọc tới record đó;
+    record_pointer < 0 → chỉ giữ |record_pointer| record cuối.
+
+    Sử dụng:
+        extractor = StreamingRecordExtractor(record_pointer=0, nested_list=False)
+        for chunk in chunks:
+            if extractor.feed(chunk):
+                break
+        data_array = extractor.finish()
+    """
+
+    def __init__(self, record_pointer: int, nested_list: bool):
+        self.record_pointer = record_pointer
+        self.nested_list = nested_list
+
+        self._decoder = json.JSONDecoder()
+        self._text_decoder = codecs.getincrementaldecoder("utf-8")()
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+
+        # Trạng thái parse: start → object | outer | array → done
+        self._state = "start"
+        self._wrapper = False
+        self._data_key: Optional[str] = None
+        self._code: Any = 200
+        self._code_seen = False
+        self._message = ""
+        self._outer_count = 0
+
+        self._count = 0
+        self._kept: Dict[int, Any] = {}
+        self._tail = deque(maxlen=-record_pointer) if record_pointer < 0 else None
+        self._array_done = False
+        self.done = False
+
+    # ------------------------------------------------------------------ buffer
+
+    def _skip_ws(self) -> str:
+        buf, pos = self._buf, self._pos
+        while pos < len(buf) and buf[pos] in _WHITESPACE:
+            pos += 1
+        self._pos = pos
+        if pos >= len(buf):
+            if self._eof:
+                raise ValueError("Response JSON bị cắt ngang")
+            raise _NeedMore()
+        return buf[pos]
+
+    def _value(self) -> Any:
+        """Decode trọn 1 JSON value tại vị trí hiện tại"""
+        self._skip_ws()
+        try:
+            value, end = self._decoder.raw_decode(self._buf, self._pos)
+        except json.JSONDecodeError:
+            if self._eof:
+                raise ValueError("Response không phải JSON hợp lệ")
+            raise _NeedMore()
+        if (
+            end >= len(self._buf)
+            and not self._eof
+            and self._buf[end - 1] in _NUMBER_CHARS
+        ):
+            # Số ở cuối buffer có thể còn chữ số ở chunk sau
+            raise _NeedMore()
+        self._pos = end
+        return value
+
+    # ------------------------------------------------------------------ parse
+
+    def _keep(self, record: Any) -> None:
+        index = self._count
+        self._count += 1
+        if self._tail is not None:
+            self._tail.append((index, record))
+        elif index == self.record_pointer:
+            self._kept[index] = record
+
+    def _can_stop(self) -> bool:
+        """Đã có record cần lấy và không cần đọc thêm `code` của wrapper"""
+        if self._wrapper and (not self._code_seen or self._code != 200):
+            # Chưa biết code, hoặc code lỗi (cần đọc tiếp `message`)
+            return False
+        if self._array_done:
+            return True
+        return self.record_pointer >= 0 and self._count > self.record_pointer
+
+    def _end_data(self) -> None:
+        """Hết mảng data: wrapper thì đọc tiếp các key còn lại"""
+        self._state = "object" if self._wrapper else "end"
+        if not self._wrapper:
+            self.done = True
+
+    def _object_member(self) -> None:
+        """Parse 1 cặp key/value của wrapper (rollback nếu thiếu dữ liệu)"""
+        start = self._pos
+        try:
+            key = self._value()
+            if self._skip_ws() != ":":
+                raise ValueError("Response không phải JSON hợp lệ")
+            self._pos += 1
+            if key in ("data", "result") and self._data_key is None:
+                if self._skip_ws() == "[":
+                    self._pos += 1
+                    self._data_key = key
+                    self._state = "outer" if self.nested_list else "array"
+                    return
+                value = self._value()
+                self._data_key = key
+                self._check_code()
+                raise TypeError(
+                    f"Response không phải list, là {type(value).__name__}"
+                )
+            value = self._value()
+        except _NeedMore:
+            self._pos = start
+            raise
+
+        if key == "code":
+            self._code = value
+            self._code_seen = True
+            if value == 200 and self._data_key is not None:
+                # Data đã đọc xong trước `code`
+                self.done = True
+        elif key == "message":
+            self._message = value or ""
+
+    def _step(self) -> None:
+        """Parse tiếp tới khi hết buffer (raise _NeedMore) hoặc xong"""
+        while not self.done:
+            if self._state == "start":
+                c = self._skip_ws()
+                if c == "{":
+                    self._pos += 1
+                    self._wrapper = True
+                    self._state = "object"
+                elif c == "[":
+                    self._pos += 1
+                    self._state = "outer" if self.nested_list else "array"
+                else:
+                    value = self._value()
+                    raise TypeError(
+                        f"Response không phải list, là {type(value).__name__}"
+                    )
+
+            elif self._state == "object":
+                c = self._skip_ws()
+                if c == ",":
+                    self._pos += 1
+                elif c == "}":
+                    self._pos += 1
+                    self.done = True
+                else:
+                    self._object_member()
+
+            elif self._state == "outer":
+                # Nested list: chỉ dùng list đầu tiên của mảng ngoài
+                c = self._skip_ws()
+                if c == "]":
+                    self._pos += 1
+                    self._end_data()
+                elif c != "[":
+                    self._value()
+                    raise TypeError(
+                        "Nested list expected nhưng phần tử đầu tiên không phải list"
+                    )
+                else:
+                    self._pos += 1
+                    self._outer_count += 1
+                    self._state = "array"
+
+            elif self._state == "outer_rest":
+                # Bỏ qua các phần tử còn lại của mảng ngoài
+                c = self._skip_ws()
+                if c == ",":
+                    self._pos += 1
+                elif c == "]":
+                    self._pos += 1
+                    self._end_data()
+                else:
+                    self._value()
+
+            elif self._state == "array":
+                c = self._skip_ws()
+                if c == ",":
+                    self._pos += 1
+                    continue
+                if c == "]":
+                    self._pos += 1
+                    self._array_done = True
+                    if self.nested_list:
+                        self._state = "outer_rest"
+                    else:
+                        self._end_data()
+                else:
+                    self._keep(self._value())
+                if self._can_stop():
+                    self.done = True
+
+            self._compact()
+
+    def _compact(self) -> None:
+        if self._pos > _COMPACT_THRESHOLD:
+            self._buf = self._buf[self._pos :]
+            self._pos = 0
+
+    def _check_code(self) -> None:
+        if self._code != 200:
+            if "No data available" in str(self._message):
+                raise ValueError("EMPTY_DATA")
+            error_details = f"Response code = {self._code}"
+            if self.nested_list:
+                error_details += " (không phải 200)"
+            if self._message:
+                error_details += f" - {self._message}"
+            raise ValueError(error_details)
+
+    # ------------------------------------------------------------------ API
+
+    def feed(self, chunk: bytes) -> bool:
+        """
+        Đưa thêm 1 chunk body
+
+        Args:
+            chunk: Bytes của body (đã giải nén)
+
+        Returns:
+            True nếu đã có kết quả (có thể dừng đọc body)
+        """
+        if self.done:
+            return True
+        self._buf += self._text_decoder.decode(chunk)
+        try:
+            self._step()
+        except _NeedMore:
+            pass
+        return self.done
+
+    def finish(self) -> PartialArray:
+        """
+        Kết thúc parse (hết body hoặc đã dừng sớm)
+
+        Returns:
+            PartialArray các record cần thiết
+
+        Raises:
+            ValueError: Response code != 200, EMPTY_DATA hoặc JSON lỗi
+            KeyError, TypeError: Response sai format
+        """
+        if not self.done:
+            self._eof = True
+            self._buf += self._text_decoder.decode(b"", final=True)
+            self._step()
+
+        self._check_code()
+        if self._wrapper and self._data_key is None:
+            raise KeyError("Response không có key 'data' hoặc 'result'")
+        if self.nested_list and self._outer_count == 0:
+            raise ValueError("EMPTY_DATA")
+
+        if self._tail is not None:
+            kept = dict(self._tail)
+        else:
+            kept = self._kept
+        return PartialArray(kept, self._count, self._array_done)
+
+
+def extract_records(body: bytes, record_pointer: int, nested_list: bool) -> PartialArray:
+    """
+    Parse trọn body (dùng trong process pool cho payload lớn)
+
+    Args:
+        body: Bytes của body
+        record_pointer: Index record cần lấy
+        nested_list: True nếu API trả [[...]]
+
+    Returns:
+        PartialArray
+    """
+    extractor = StreamingRecordExtractor(record_pointer, nested_list)
+    extractor.feed(body)
+    return extractor.finish()
+
+
+def extract_path(body: bytes, path) -> Any:
+    """
+    Parse trọn body và lấy giá trị theo ResponsePath (dùng được trong process pool)
+
+    Args:
+        body: Bytes của body
+        path: ResponsePath đã compile
+
+    Returns:
+        Giá trị tại path
+    """
+    return path.extract(json.loads(body))
+
+
+class _Validator:
+    """Validator của lần probe trước cho 1 URL (+ cách extract)"""
+
+    __slots__ = ("etag", "last_modified", "body_hash", "result")
+
+    def __init__(self):
+        self.etag: Optional[str] = None
+        self.last_modified: Optional[str] = None
+        self.body_hash: Optional[bytes] = None
+        # PartialArray (fetch_records) hoặc giá trị tại path (fetch_path_value)
+        self.result: Any = None
+
+
+class JsonStreamUtil:
+    """
+    Đọc response API theo stream và lấy record tại record_pointer
+
+    - Mặc định parse từng chunk ngay trên event loop và đóng connection khi đã
+      có kết quả (record_pointer >= 0 thường chỉ đọc vài KB đầu)
+    - `api.decode_in_process`: đọc body rồi parse trong process pool (payload lớn,
+      record_pointer âm phải đọc hết) để không chiếm CPU của event loop.
+      Số process: MONITOR_CONFIG.http.decode_workers (mặc định 2)
+    - `api.max_bytes`: dừng và báo lỗi khi body vượt quá giới hạn mà chưa có kết quả
+    - `api.conditional` (mặc định bật): nhớ ETag/Last-Modified của mỗi URL và gửi
+      If-None-Match/If-Modified-Since - 304 dùng lại kết quả lần trước. Khi phải
+      đọc hết body (record_pointer âm, decode_in_process), hash body trước khi
+      parse - body không đổi thì bỏ qua parse
+
+    - `api.path`: `fetch_path_value` phải đọc hết body rồi mới lấy giá trị theo
+      path, nhưng vẫn áp dụng `max_bytes`, `conditional` (304 + hash body) và
+      `decode_in_process` như trên
+
+    Sử dụng:
+        data_array = await JsonStreamUtil.fetch_records(url, api_cfg)
+        value = await JsonStreamUtil.fetch_path_value(url, api_cfg)
+        data_array = await JsonStreamUtil.fetch_header_record(url, "Last-Modified", "datetime")
+    """
+
+    DEFAULT_DECODE_WORKERS = 2
+
+    _pool: Optional[ProcessPoolExecutor] = None
+    # {(url, record_pointer, nested_list) | (url, "path", path): _Validator}
+    _validators: Dict[tuple, _Validator] = {}
+    _stats = {"requests": 0, "not_modified": 0, "hash_unchanged": 0, "parsed": 0}
+
+    @staticmethod
+    def get_pool() -> ProcessPoolExecutor:
+        if JsonStreamUtil._pool is None:
+            from utils.load_config_util import LoadConfigUtil
+
+            common_config = LoadConfigUtil.load_json_to_variable("common_config.json")
+            http_config = common_config.get("MONITOR_CONFIG", {}).get("http", {})
+            workers = int(
+                http_config.get("decode_workers", JsonStreamUtil.DEFAULT_DECODE_WORKERS)
+            )
+            JsonStreamUtil._pool = ProcessPoolExecutor(max_workers=max(1, workers))
+        return JsonStreamUtil._pool
+
+    @staticmethod
+    async def fetch_records(url: str, api_cfg) -> PartialArray:
+        """
+        GET URL và lấy record tại api_cfg.record_pointer
+
+        Args:
+            url: URL request
+            api_cfg: ApiSourceConfig (record_pointer, nested_list, max_bytes,
+                decode_in_process, conditional)
+
+        Returns:
+            PartialArray (có thể là kết quả lần trước nếu response không đổi)
+
+        Raises:
+            ValueError: Body vượt max_bytes, response code != 200, EMPTY_DATA
+            KeyError, TypeError: Response sai format
+            HttpConnectionError, HttpStatusError, HttpTimeoutError: lỗi HTTP
+        """
+        from utils.http_client_util import HttpClientUtil
+
+        record_pointer = api_cfg.record_pointer
+        nested_list = api_cfg.nested_list
+        max_bytes = api_cfg.max_bytes
+        # Phải đọc hết body → hash được trước khi parse
+        read_all = api_cfg.decode_in_process or record_pointer < 0
+
+        validator, headers = JsonStreamUtil._get_validator(
+            (url, record_pointer, nested_list), api_cfg.conditional
+        )
+
+        JsonStreamUtil._stats["requests"] += 1
+        extractor = None if read_all else StreamingRecordExtractor(
+            record_pointer, nested_list
+        )
+        hasher = hashlib.blake2b(digest_size=16) if validator is not None else None
+        body = bytearray()
+        received = 0
+
+        async with HttpClientUtil.open(url, headers=headers) as response:
+            if response.status == 304 and validator is not None:
+                JsonStreamUtil._stats["not_modified"] += 1
+                return validator.result
+
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+
+            async for chunk in response.content.iter_chunked(_CHUNK_SIZE):
+                received += len(chunk)
+                if extractor is not None:
+                    if extractor.feed(chunk):
+                        break
+                else:
+                    body += chunk
+                    if hasher is not None:
+                        hasher.update(chunk)
+                if max_bytes is not None and received > max_bytes:
+                    raise ValueError(
+                        f"Response vượt quá giới hạn {max_bytes} bytes (api.max_bytes)"
+                    )
+
+        body_hash = None
+        if extractor is not None:
+            result = extractor.finish()
+            JsonStreamUtil._stats["parsed"] += 1
+        else:
+            body_hash = hasher.digest() if hasher is not None else None
+            if (
+                body_hash is not None
+                and validator.result is not None
+                and body_hash == validator.body_hash
+            ):
+                JsonStreamUtil._stats["hash_unchanged"] += 1
+                result = validator.result
+            elif api_cfg.decode_in_process:
+                loop = asyncio.get_running_loop()
+                result = await loop.run_in_executor(
+                    JsonStreamUtil.get_pool(),
+                    extract_records,
+                    bytes(body),
+                    record_pointer,
+                    nested_list,
+                )
+                JsonStreamUtil._stats["parsed"] += 1
+            else:
+                result = extract_records(bytes(body), record_pointer, nested_list)
+                JsonStreamUtil._stats["parsed"] += 1
+
+        if validator is not None:
+            # Chỉ lưu khi parse thành công (response lỗi không được dùng lại)
+            validator.etag = etag
+            validator.last_modified = last_modified
+            validator.body_hash = body_hash
+            validator.result = result
+        return result
+
+    @staticmethod
+    def _get_validator(key: tuple, conditional: bool):
+        """
+        Validator của lần probe trước + header conditional cần gửi
+
+        Returns:
+            (_Validator | None nếu tắt conditional, dict header)
+        """
+        headers = {}
+        if not conditional:
+            return None, headers
+        validator = JsonStreamUtil._validators.get(key)
+        if validator is None:
+            validator = JsonStreamUtil._validators[key] = _Validator()
+        if validator.result is not None:
+            if validator.etag:
+                headers["If-None-Match"] = validator.etag
+            if validator.last_modified:
+                headers["If-Modified-Since"] = validator.last_modified
+        return validator, headers
+
+    @staticmethod
+    async def fetch_path_value(url: str, api_cfg) -> Any:
+        """
+        GET URL và lấy giá trị theo api_cfg.path
+
+        Args:
+            url: URL request
+            api_cfg: ApiSourceConfig (path, max_bytes, decode_in_process, conditional)
+
+        Returns:
+            Giá trị tại path (có thể là kết quả lần trước nếu response không đổi)
+
+        Raises:
+            ValueError: Body vượt max_bytes, response code != 200, EMPTY_DATA
+            KeyError, IndexError, TypeError: Response sai format
+            HttpConnectionError, HttpStatusError, HttpTimeoutError: lỗi HTTP
+        """
+        from utils.http_client_util import HttpClientUtil
+
+        path = api_cfg.path
+        max_bytes = api_cfg.max_bytes
+        validator, headers = JsonStreamUtil._get_validator(
+            (url, "path", path.expr), api_cfg.conditional
+        )
+
+        JsonStreamUtil._stats["requests"] += 1
+        hasher = hashlib.blake2b(digest_size=16) if validator is not None else None
+        body = bytearray()
+
+        async with HttpClientUtil.open(url, headers=headers) as response:
+            if response.status == 304 and validator is not None:
+                JsonStreamUtil._stats["not_modified"] += 1
+                return validator.result
+
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+
+            async for chunk in response.content.iter_chunked(_CHUNK_SIZE):
+                body += chunk
+                if hasher is not None:
+                    hasher.update(chunk)
+                if max_bytes is not None and len(body) > max_bytes:
+                    raise ValueError(
+                        f"Response vượt quá giới hạn {max_bytes} bytes (api.max_bytes)"
+                    )
+
+        body_hash = hasher.digest() if hasher is not None else None
+        if (
+            body_hash is not None
+            and validator.result is not None
+            and body_hash == validator.body_hash
+        ):
+            JsonStreamUtil._stats["hash_unchanged"] += 1
+            return validator.result
+
+        if api_cfg.decode_in_process:
+            result = await asyncio.get_running_loop().run_in_executor(
+                JsonStreamUtil.get_pool(), extract_path, bytes(body), path
+            )
+        else:
+            result = extract_path(bytes(body), path)
+        JsonStreamUtil._stats["parsed"] += 1
+
+        if validator is not None:
+            validator.etag = etag
+            validator.last_modified = last_modified
+            validator.body_hash = body_hash
+            validator.result = result
+        return result
+
+    @staticmethod
+    async def fetch_header_record(url: str, header: str, column: str) -> PartialArray:
+        """
+        HEAD URL và dùng header (vd: Last-Modified, X-Data-Updated) làm timestamp
+
+        Args:
+            url: URL request
+            header: Tên header chứa thời điểm cập nhật dữ liệu
+            column: column_to_check - key của record trả về
+
+        Returns:
+            PartialArray 1 record {column: timestamp}
+
+        Raises:
+            KeyError: Response không có header
+        """
+        from utils.http_client_util import HttpClientUtil
+
+        JsonStreamUtil._stats["requests"] += 1
+        async with HttpClientUtil.open(url, method="HEAD") as response:
+            value = response.headers.get(header)
+
+        if not value:
+            raise KeyError(f"Response không có header '{header}'")
+
+        try:
+            # HTTP-date (RFC 7231) → "YYYY-MM-DD HH:MM:SS" theo giờ trong header (GMT)
+            parsed = parsedate_to_datetime(value)
+            value = parsed.strftime("%Y-%m-%d %H:%M:%S")
+        except (TypeError, ValueError):
+            pass  # Giữ nguyên (ISO, timestamp...) cho ConvertDatetimeUtil
+
+        return PartialArray({0: {column: value}}, 1, True)
+
+    @staticmethod
+    def get_stats() -> Dict[str, int]:
+        """
+        Số request: requests, not_modified (304), hash_unchanged (body không đổi,
+        bỏ qua parse), parsed (có parse)
+        """
+        return dict(JsonStreamUtil._stats)
+
+    @staticmethod
+    def shutdown() -> None:
+        if JsonStreamUtil._pool is not None:
+            JsonStreamUtil._pool.shutdown(wait=False, cancel_futures=True)
+            JsonStreamUtil._pool = None
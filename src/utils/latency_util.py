@@ -0,0 +1,332 @@
+"""
+Latency Utility
+Theo dõi phân bố latency của từng endpoint API, timeout thích ứng theo percentile
+cao và hedged request cho nguồn quan trọng
+"""
+
+import asyncio
+import math
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+from urllib.parse import urlsplit
+
+from configs.logging_config import LoggerConfig
+from utils.http_client_util import HttpConnectionError, HttpTimeoutError
+
+
+class LatencyTracker:
+    """
+    Cửa sổ `window` mẫu latency gần nhất của 1 endpoint
+
+    Attributes:
+        samples: Latency (giây) của các probe thành công (probe timeout được ghi
+                 bằng giá trị timeout để phân bố tự nâng lên với endpoint chậm)
+    """
+
+    def __init__(self, window: int):
+        self.samples = deque(maxlen=max(1, int(window)))
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.timeouts = 0
+
+    def record(self, seconds: float) -> None:
+        """Ghi 1 mẫu latency"""
+        self.samples.append(seconds)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """
+        Percentile q (0-100) theo nearest-rank
+
+        Returns:
+            Latency (giây), None nếu chưa có mẫu
+        """
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        rank = max(1, math.ceil(q / 100 * len(ordered)))
+        return ordered[min(rank, len(ordered)) - 1]
+
+
+class LatencyUtil:
+    """
+    Timeout thích ứng + hedged request cho API probe (dùng chung toàn process)
+
+    Config: MONITOR_CONFIG.latency trong common_config.json
+        {
+            "enable": true, "window": 200, "min_samples": 20,
+            "percentile": 99, "multiplier": 2, "floor": 2, "ceiling": 30,
+            "hedge": {"enable": false, "percentile": 95, "priorities": ["critical"]}
+        }
+    - Phân bố theo endpoint (host + path), chỉ ghi mẫu của request thật gửi đi
+    - Timeout của 1 request = clamp(p`percentile` × `multiplier`, `floor`, `ceiling`);
+      khi endpoint chưa đủ `min_samples` mẫu chỉ dùng timeout của HttpClientUtil
+    - Hedge: với nguồn có priority trong `hedge.priorities`, probe chưa xong sau
+      p`hedge.percentile` thì gửi thêm 1 request (không qua single-flight), lấy
+      kết quả về trước và hủy request còn lại
+
+    Sử dụng:
+        key = LatencyUtil.endpoint_key(url)
+        fetch = lambda: LatencyUtil.measure(key, lambda: request(url))
+        result = await LatencyUtil.call(
+            key, lambda: SingleFlightUtil.do_async(url, fetch), hedge_fetch=fetch
+        )
+    """
+
+    DEFAULT_CONFIG = {
+        "enable": True,
+        "window": 200,
+        "min_samples": 20,
+        "percentile": 99,
+        "multiplier": 2,
+        "floor": 2,
+        "ceiling": 30,
+    }
+    DEFAULT_HEDGE_CONFIG = {
+        "enable": False,
+        "percentile": 95,
+        "priorities": ["critical"],
+    }
+
+    _logger = None
+    _trackers: Dict[Hashable, LatencyTracker] = {}
+
+    @staticmethod
+    def _get_logger():
+        """Lazy load logger"""
+        if LatencyUtil._logger is None:
+            LatencyUtil._logger = LoggerConfig.logger_config("LatencyUtil")
+        return LatencyUtil._logger
+
+    @staticmethod
+    def get_config() -> dict:
+        """MONITOR_CONFIG.latency (đã merge default, `hedge` là dict riêng)"""
+        from utils.load_config_util import LoadConfigUtil
+
+        common_config = LoadConfigUtil.load_json_to_variable("common_config.json")
+        latency_config = common_config.get("MONITOR_CONFIG", {}).get("latency", {})
+        config = dict(LatencyUtil.DEFAULT_CONFIG)
+        config.update(latency_config)
+        config["hedge"] = dict(LatencyUtil.DEFAULT_HEDGE_CONFIG)
+        config["hedge"].update(latency_config.get("hedge", {}))
+        return config
+
+    @staticmethod
+    def should_hedge(priority: str) -> bool:
+        """
+        Nguồn có priority này có được hedge không
+
+        Args:
+            priority: check.priority của nguồn ("critical", "normal", "low")
+        """
+        config = LatencyUtil.get_config()
+        hedge = config["hedge"]
+        return bool(config["enable"] and hedge["enable"]) and priority in hedge["priorities"]
+
+    @staticmethod
+    def _get(key: Hashable, window: int) -> LatencyTracker:
+        tracker = LatencyUtil._trackers.get(key)
+        if tracker is None or tracker.samples.maxlen != max(1, int(window)):
+            tracker = LatencyTracker(window)
+            LatencyUtil._trackers[key] = tracker
+        return tracker
+
+    @staticmethod
+    def get_timeout(key: Hashable) -> Optional[float]:
+        """
+        Timeout hiện tại của endpoint
+
+        Args:
+            key: Định danh endpoint
+
+        Returns:
+            Số giây, None nếu chưa đủ mẫu / tắt
+        """
+        config = LatencyUtil.get_config()
+        tracker = LatencyUtil._trackers.get(key)
+        if not config["enable"] or tracker is None:
+            return None
+        return LatencyUtil._timeout(tracker, config)
+
+    @staticmethod
+    def _timeout(tracker: LatencyTracker, config: dict) -> Optional[float]:
+        if len(tracker.samples) < int(config["min_samples"]):
+            return None
+        high = tracker.percentile(float(config["percentile"]))
+        return min(
+            float(config["ceiling"]),
+            max(float(config["floor"]), high * float(config["multiplier"])),
+        )
+
+    @staticmethod
+    def endpoint_key(url: str) -> str:
+        """
+        Key phân bố latency của URL: host + path (bỏ query), nên các nguồn/symbol
+        cùng endpoint dùng chung 1 phân bố
+
+        Args:
+            url: URL request
+
+        Returns:
+            "host[:port]/path"
+        """
+        parts = urlsplit(url)
+        return f"{parts.netloc.lower()}{parts.path or '/'}"
+
+    @staticmethod
+    async def measure(key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Gửi request thật tới endpoint với timeout thích ứng và ghi mẫu latency
+
+        Chỉ gọi ở chỗ thực sự gửi request (trong flight của SingleFlightUtil và
+        request hedge): caller chờ chung flight hoặc trúng micro-TTL không ghi
+        mẫu. Timeout theo endpoint nên giống nhau với mọi caller của flight.
+
+        Args:
+            key: Định danh endpoint (xem `endpoint_key`)
+            fetch: Hàm async gửi request
+
+        Returns:
+            Kết quả của `fetch`
+
+        Raises:
+            HttpTimeoutError: Quá timeout thích ứng
+            Exception của `fetch`
+        """
+        config = LatencyUtil.get_config()
+        if not config["enable"]:
+            return await fetch()
+
+        tracker = LatencyUtil._get(key, config["window"])
+        timeout = LatencyUtil._timeout(tracker, config)
+        started = time.monotonic()
+        try:
+            result = await asyncio.wait_for(fetch(), timeout)
+        except asyncio.TimeoutError:
+            if timeout is None:
+                raise
+            tracker.timeouts += 1
+            tracker.record(timeout)
+            raise HttpTimeoutError(
+                f"Timeout sau {timeout:.1f}s (p{config['percentile']} × "
+                f"{config['multiplier']} của {key})"
+            )
+        except HttpTimeoutError:
+            # Timeout của HttpClientUtil: endpoint chậm nhưng còn sống
+            tracker.timeouts += 1
+            tracker.record(time.monotonic() - started)
+            raise
+        tracker.record(time.monotonic() - started)
+        return result
+
+    @staticmethod
+    async def call(
+        key: Hashable,
+        fetch: Callable[[], Awaitable[Any]],
+        hedge_fetch: Optional[Callable[[], Awaitable[Any]]] = None,
+    ) -> Any:
+        """
+        Chờ probe, gửi thêm request hedge nếu chưa xong sau p`hedge.percentile`
+
+        Timeout và mẫu latency nằm ở `measure` bên trong `fetch`/`hedge_fetch`.
+        Hedge về trước thì `fetch` bị cancel, nên request dùng chung giữa nhiều
+        caller phải đi qua SingleFlightUtil.do_async (chỉ hủy phần chờ của caller).
+
+        Args:
+            key: Định danh endpoint (xem `endpoint_key`)
+            fetch: Hàm async thực hiện probe
+            hedge_fetch: Hàm async gửi request hedge (None = không hedge)
+
+        Returns:
+            Kết quả của probe về trước
+
+        Raises:
+            Exception của `fetch` (khi cả 2 request đều lỗi: exception của request đầu)
+        """
+        config = LatencyUtil.get_config()
+        tracker = LatencyUtil._trackers.get(key)
+        if (
+            hedge_fetch is None
+            or not config["enable"]
+            or tracker is None
+            or LatencyUtil._timeout(tracker, config) is None
+        ):
+            return await fetch()
+
+        hedge_delay = tracker.percentile(float(config["hedge"]["percentile"]))
+        return await LatencyUtil._hedged(tracker, fetch, hedge_fetch, hedge_delay)
+
+    @staticmethod
+    async def _hedged(
+        tracker: LatencyTracker,
+        fetch: Callable[[], Awaitable[Any]],
+        hedge_fetch: Callable[[], Awaitable[Any]],
+        hedge_delay: float,
+    ) -> Any:
+        """Request đầu + request hedge sau `hedge_delay`, lấy kết quả thành công về trước"""
+        first = asyncio.ensure_future(fetch())
+        pending = {first}
+        hedge = None
+        error = None
+        try:
+            while True:
+                done, pending = await asyncio.wait(
+                    pending,
+                    timeout=hedge_delay if hedge is None else None,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                for task in done:
+                    if task.cancelled():
+                        # Không phải cancel của caller (caller bị cancel thì wait raise):
+                        # coi như request lỗi, không để CancelledError lọt ra
+                        task_error = HttpConnectionError("Request bị hủy")
+                    elif task.exception() is None:
+                        if task is hedge:
+                            tracker.hedge_wins += 1
+                        return task.result()
+                    else:
+                        task_error = task.exception()
+                    if error is None or task is first:
+                        error = task_error
+                if not pending:
+                    # Hedge không phải retry: request đầu lỗi trước hạn hedge thì trả lỗi
+                    raise error
+                if hedge is None:
+                    hedge = asyncio.ensure_future(hedge_fetch())
+                    pending.add(hedge)
+                    tracker.hedged += 1
+        finally:
+            for task in pending:
+                task.cancel()
+
+    @staticmethod
+    def get_stats() -> Dict[Hashable, Dict[str, Any]]:
+        """p50/p95/p99, timeout hiện tại và số lần hedge/timeout của từng endpoint"""
+        config = LatencyUtil.get_config()
+        stats = {}
+        for key, tracker in LatencyUtil._trackers.items():
+            if not tracker.samples:
+                continue
+            stats[key] = {
+                "samples": len(tracker.samples),
+                "p50": round(tracker.percentile(50), 3),
+                "p95": round(tracker.percentile(95), 3),
+                "p99": round(tracker.percentile(99), 3),
+                "timeout": LatencyUtil._timeout(tracker, config),
+                "timeouts": tracker.timeouts,
+                "hedged": tracker.hedged,
+                "hedge_wins": tracker.hedge_wins,
+            }
+        return stats
+
+    @staticmethod
+    def log_stats() -> None:
+        """Log latency các endpoint đã có mẫu"""
+        for key, stats in LatencyUtil.get_stats().items():
+            timeout = stats["timeout"]
+            LatencyUtil._get_logger().info(
+                f"Latency {key}: p50={stats['p50']}s p95={stats['p95']}s p99={stats['p99']}s "
+                f"timeout={'%.1fs' % timeout if timeout is not None else 'mặc định'} "
+                f"timeouts={stats['timeouts']} hedged={stats['hedged']} "
+                f"hedge_wins={stats['hedge_wins']}"
+            )
@@ -1,14 +1,92 @@
-import glob
 import json
 import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
 from configs.logging_config import LoggerConfig
 
 
+class FrozenDict(dict):
+    """Dict chỉ đọc - dùng cho config snapshot để tránh bị sửa giữa các task"""
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("Config snapshot là immutable, không được sửa")
+
+    __setitem__ = __delitem__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+    __ior__ = _readonly
+
+    def __reduce__(self):
+        # Cho phép pickle (multiprocessing) mà không đi qua __setitem__
+        return (FrozenDict, (dict(self),))
+
+    def __copy__(self):
+        # Copy trả về dict thường để caller có thể sửa bản copy
+        return dict(self)
+
+    def __deepcopy__(self, memo):
+        return LoadConfigUtil.thaw(self)
+
+
+class FrozenList(list):
+    """List chỉ đọc - dùng cho config snapshot"""
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("Config snapshot là immutable, không được sửa")
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _readonly
+    append = extend = insert = pop = remove = clear = sort = reverse = _readonly
+
+    def __reduce__(self):
+        return (FrozenList, (list(self),))
+
+    def __copy__(self):
+        return list(self)
+
+    def __deepcopy__(self, memo):
+        return LoadConfigUtil.thaw(self)
+
+
+@dataclass(frozen=True)
+class ConfigSnapshot:
+    """
+    Snapshot immutable của 1 file config
+
+    Attributes:
+        filename: Tên file (vd: "data_sources_config.json")
+        path: Đường dẫn tuyệt đối đã resolve
+        version: Số version, tăng mỗi lần file được reload
+        data: Nội dung file (FrozenDict/FrozenList)
+        file_key: (mtime_ns, size, inode) tại thời điểm load
+    """
+
+    filename: str
+    path: str
+    version: int
+    data: Any
+    file_key: Tuple[int, int, int]
+
+
 class LoadConfigUtil:
-    """Utility để load config từ file JSON"""
+    """
+    Utility để load config từ file JSON
+
+    Config store dùng chung toàn process:
+    - Resolve đường dẫn file 1 lần (ưu tiên `configs/` trong project root)
+    - Chỉ reload khi mtime, size hoặc inode của file thay đổi
+    - Trả về snapshot immutable kèm version
+    """
 
     _logger = None
 
+    _lock = threading.RLock()
+    _paths: Dict[str, Path] = {}
+    _snapshots: Dict[str, ConfigSnapshot] = {}
+    _last_errors: Dict[str, str] = {}
+    _project_root: Optional[Path] = None
+
     @staticmethod
     def _get_logger():
         """Lazy load logger"""
@@ -16,44 +94,201 @@ class LoadConfigUtil:
             LoadConfigUtil._logger = LoggerConfig.logger_config("LoadConfigUtil")
         return LoadConfigUtil._logger
 
+    @staticmethod
+    def freeze(value):
+        """
+        Chuyển dict/list lồng nhau thành FrozenDict/FrozenList
+
+        Args:
+            value: Giá trị parse từ JSON
+
+        Returns:
+            Giá trị immutable tương ứng
+        """
+        if isinstance(value, dict):
+            return FrozenDict(
+                (key, LoadConfigUtil.freeze(item)) for key, item in value.items()
+            )
+        if isinstance(value, list):
+            return FrozenList(LoadConfigUtil.freeze(item) for item in value)
+        return value
+
+    @staticmethod
+    def thaw(value):
+        """
+        Tạo bản copy có thể sửa của một snapshot (dict/list thường)
+
+        Args:
+            value: Giá trị trong snapshot
+
+        Returns:
+            Bản copy mutable
+        """
+        if isinstance(value, dict):
+            return {key: LoadConfigUtil.thaw(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [LoadConfigUtil.thaw(item) for item in value]
+        return value
+
+    @staticmethod
+    def _get_project_root() -> Path:
+        """Tìm project root theo marker requirements.txt (giống src/main.py)"""
+        if LoadConfigUtil._project_root is None:
+            current_path = Path(__file__).resolve()
+            root = current_path.parent
+            for parent in current_path.parents:
+                if (parent / "requirements.txt").exists():
+                    root = parent
+                    break
+            LoadConfigUtil._project_root = root
+        return LoadConfigUtil._project_root
+
+    @staticmethod
+    def resolve_config_path(filename) -> Path:
+        """
+        Resolve đường dẫn file config (kết quả được cache)
+
+        Thứ tự tìm: `<root>/configs/<filename>`, `<root>/<filename>`, cuối cùng
+        mới quét cây thư mục project root (chỉ 1 lần, không quét từ CWD).
+
+        Args:
+            filename: Tên file JSON
+
+        Returns:
+            Path tuyệt đối
+
+        Raises:
+            FileNotFoundError: Nếu không tìm thấy file
+        """
+        with LoadConfigUtil._lock:
+            cached = LoadConfigUtil._paths.get(filename)
+            if cached is not None:
+                return cached
+
+            root = LoadConfigUtil._get_project_root()
+            candidates = [root / "configs" / filename, root / filename]
+            path = next((p for p in candidates if p.is_file()), None)
+
+            if path is None:
+                path = next(
+                    (
+                        p
+                        for p in sorted(root.rglob(filename))
+                        if p.is_file() and ".venv" not in p.parts
+                    ),
+                    None,
+                )
+
+            if path is None:
+                raise FileNotFoundError(f"Không tìm thấy file: {filename}")
+
+            LoadConfigUtil._paths[filename] = path
+            LoadConfigUtil._get_logger().info(
+                f"Đã resolve config {filename} -> {path}"
+            )
+            return path
+
+    @staticmethod
+    def get_snapshot(filename) -> ConfigSnapshot:
+        """
+        Lấy snapshot hiện tại của file config, reload nếu file đã thay đổi
+
+        Nếu file tạm thời không đọc được (đang ghi dở, bị xóa/rename) và đã có
+        snapshot trước đó thì tiếp tục dùng snapshot cũ.
+
+        Args:
+            filename: Tên file JSON
+
+        Returns:
+            ConfigSnapshot
+        """
+        with LoadConfigUtil._lock:
+            current = LoadConfigUtil._snapshots.get(filename)
+
+            try:
+                path = LoadConfigUtil.resolve_config_path(filename)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    # File bị di chuyển - resolve lại 1 lần
+                    LoadConfigUtil._paths.pop(filename, None)
+                    path = LoadConfigUtil.resolve_config_path(filename)
+                    stat = os.stat(path)
+
+                file_key = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+                if (
+                    current is not None
+                    and current.file_key == file_key
+                    and current.path == str(path)
+                ):
+                    return current
+
+                with open(file=path, mode="r", encoding="utf-8") as f:
+                    data = json.load(f)
+
+            except (OSError, ValueError) as e:
+                if current is None:
+                    raise
+                # Chỉ log 1 lần cho mỗi lỗi để tránh spam log từ các task
+                if LoadConfigUtil._last_errors.get(filename) != str(e):
+                    LoadConfigUtil._last_errors[filename] = str(e)
+                    LoadConfigUtil._get_logger().error(
+                        f"Không reload được {filename}, dùng snapshot version "
+                        f"{current.version}: {e}"
+                    )
+                return current
+
+            version = current.version + 1 if current else 1
+            snapshot = ConfigSnapshot(
+                filename=filename,
+                path=str(path),
+                version=version,
+                data=LoadConfigUtil.freeze(data),
+                file_key=file_key,
+            )
+            LoadConfigUtil._snapshots[filename] = snapshot
+            LoadConfigUtil._last_errors.pop(filename, None)
+
+            LoadConfigUtil._get_logger().info(
+                f"Đã load config: {filename} (version {version})"
+            )
+            return snapshot
+
+    @staticmethod
+    def get_version(filename) -> int:
+        """
+        Lấy version hiện tại của file config
+
+        Args:
+            filename: Tên file JSON
+
+        Returns:
+            Version (tăng mỗi lần file thay đổi)
+        """
+        return LoadConfigUtil.get_snapshot(filename).version
+
     @staticmethod
     def load_json_to_variable(filename, config_type=None):
         """
-        Tìm và load file JSON, trả về config theo type hoặc toàn bộ file
+        Load file JSON từ config store, trả về config theo type hoặc toàn bộ file
 
         Args:
             filename: Tên file JSON (vd: "api_config.json", "database_config.json")
             config_type: (Optional) Loại config muốn lấy. Nếu None, trả về toàn bộ file
 
         Returns:
-            Dict config theo type yêu cầu hoặc toàn bộ config
+            Dict config (immutable) theo type yêu cầu hoặc toàn bộ config
         """
-        # Tìm file
-        files = glob.glob(f"**/{filename}", recursive=True)
-        if not files:
-            raise FileNotFoundError(f"Không tìm thấy file: {filename}")
-
-        file_path = files[0]
-
-        # Luôn load từ file
-        with open(file=file_path, mode="r", encoding="utf-8") as f:
-            data = json.load(f)
+        data = LoadConfigUtil.get_snapshot(filename).data
 
         # Nếu có config_type, lấy theo type
         if config_type:
             if config_type not in data:
                 raise KeyError(f"Không tìm thấy '{config_type}' trong file {filename}")
-            result = data[config_type]
-        else:
-            # Không có config_type, trả về toàn bộ
-            result = data
-
-        # Log load
-        logger = LoadConfigUtil._get_logger()
-        config_desc = f" [{config_type}]" if config_type else ""
-        logger.info(f"Đã load config: {filename}{config_desc}")
+            return data[config_type]
 
-        return result
+        # Không có config_type, trả về toàn bộ
+        return data
 
     @staticmethod
     def get_all_configs(filename):
@@ -64,13 +299,6 @@ class LoadConfigUtil:
             filename: Tên file JSON
 
         Returns:
-            Dict chứa tất cả config
+            Dict (immutable) chứa tất cả config
         """
-        files = glob.glob(f"**/{filename}", recursive=True)
-        if not files:
-            raise FileNotFoundError(f"Không tìm thấy file: {filename}")
-
-        file_path = files[0]
-
-        with open(file=file_path, mode="r", encoding="utf-8") as f:
-            return json.load(f)
+        return LoadConfigUtil.get_snapshot(filename).data
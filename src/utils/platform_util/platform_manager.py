@@ -36,12 +36,27 @@ class PlatformManager:
         # "sms": SMSNotifier,
     }
 
+    # Khi chạy nhiều worker process: alert được chuyển về coordinator qua sink
+    # (callable nhận dict tham số send_alert) thay vì gửi trực tiếp
+    _alert_sink = None
+
+    @staticmethod
+    def set_alert_sink(sink) -> None:
+        """
+        Đặt sink nhận alert cho toàn process (None = gửi trực tiếp)
+
+        Args:
+            sink: Callable(dict) - vd: multiprocessing.Queue.put
+        """
+        PlatformManager._alert_sink = sink
+
     def __init__(self):
         """
         Initialize Platform Manager
         """
         self.logger = LoggerConfig.logger_config("PlatformManager")
         self.notifiers: Dict[str, BasePlatformNotifier] = {}
+        self._config_version: Optional[int] = None
         self._load_notifiers()
 
     def _load_platform_config(self) -> Dict[str, Any]:
@@ -53,8 +68,9 @@ class PlatformManager:
         """
         from utils.load_config_util import LoadConfigUtil
 
-        config = LoadConfigUtil.load_json_to_variable("common_config.json")
-        return config.get("PLATFORM_CONFIG", {})
+        snapshot = LoadConfigUtil.get_snapshot("common_config.json")
+        self._config_version = snapshot.version
+        return snapshot.data.get("PLATFORM_CONFIG", {})
 
     def _create_notifier(
         self, platform_name: str, config: Dict[str, Any]
@@ -166,9 +182,38 @@ class PlatformManager:
         Returns:
             Dict {platform_name: success_status}
         """
-        # Reload config mỗi lần gọi để đảm bảo up-to-date
-        # (Low overhead vì LoadConfigUtil có caching)
-        self.reload_config()
+        if PlatformManager._alert_sink is not None:
+            PlatformManager._alert_sink(
+                {
+                    "api_name": api_name,
+                    "symbol": symbol,
+                    "overdue_seconds": overdue_seconds,
+                    "allow_delay": allow_delay,
+                    "check_frequency": check_frequency,
+                    "alert_frequency": alert_frequency,
+                    "alert_level": alert_level,
+                    "error_message": error_message,
+                    "error_type": error_type,
+                    "source_info": source_info,
+                    "status_message": status_message,
+                }
+            )
+            return {"coordinator": True}
+
+        # Chạy cluster nhiều node: mỗi alert chỉ 1 node gửi (record dùng chung)
+        from utils.cluster_util import ClusterUtil
+
+        if ClusterUtil.is_active():
+            alert_key = f"{api_name}|{symbol}|{alert_level}|{error_type}"
+            if not ClusterUtil.claim_alert(alert_key, alert_frequency):
+                self.logger.debug(f"Alert {alert_key} đã được node khác gửi, bỏ qua")
+                return {}
+
+        # Chỉ tạo lại notifiers khi common_config.json đổi version
+        from utils.load_config_util import LoadConfigUtil
+
+        if LoadConfigUtil.get_version("common_config.json") != self._config_version:
+            self.reload_config()
 
         results = {}
         primary_platforms = self.get_primary_platforms()
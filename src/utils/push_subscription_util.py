@@ -0,0 +1,333 @@
+"""
+Push Subscription Utility
+Nhận timestamp của các symbol qua Server-Sent Events / WebSocket (`api.stream_url`):
+mỗi nguồn 1 subscription dài hạn, CheckAPI đọc giá trị mới nhất thay vì polling
+"""
+
+import asyncio
+import codecs
+import json
+import re
+from typing import Any, Dict, Hashable, List, Optional
+
+from configs.logging_config import LoggerConfig
+
+
+_LINE_RE = re.compile(r"\r\n|\r|\n")
+
+
+class SseParser:
+    """
+    Parser incremental cho text/event-stream
+
+    Chỉ dùng field `data` (các dòng `data:` của 1 event được nối bằng "\\n");
+    comment (`:heartbeat`) và các field khác được bỏ qua.
+    """
+
+    def __init__(self):
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._buffer = ""
+        self._data: List[str] = []
+
+    def feed(self, chunk: bytes) -> List[str]:
+        """
+        Nạp thêm bytes
+
+        Args:
+            chunk: Bytes nhận được từ stream
+
+        Returns:
+            Data của các event đã hoàn chỉnh
+        """
+        text = self._buffer + self._decoder.decode(chunk)
+        # "\r" cuối chunk có thể là nửa đầu của "\r\n": giữ lại chờ chunk sau
+        held = ""
+        if text.endswith("\r"):
+            text, held = text[:-1], "\r"
+        lines = _LINE_RE.split(text)
+        self._buffer = lines.pop() + held
+
+        events = []
+        for line in lines:
+            if line == "":
+                if self._data:
+                    events.append("\n".join(self._data))
+                    self._data = []
+            elif line.startswith(":"):
+                continue
+            else:
+                field, _, value = line.partition(":")
+                if field == "data":
+                    self._data.append(value[1:] if value.startswith(" ") else value)
+        return events
+
+
+class _Subscription:
+    """Subscription của 1 nguồn"""
+
+    __slots__ = ("name", "config", "task", "live", "values", "events")
+
+    def __init__(self, name: str, config):
+        self.name = name
+        self.config = config
+        self.task: Optional[asyncio.Task] = None
+        # True khi đang kết nối; False → CheckAPI polling như bình thường
+        self.live = False
+        # {symbol | None: giá trị column mới nhất}
+        self.values: Dict[Optional[str], Any] = {}
+        self.events = 0
+
+
+class PushSubscriptionUtil:
+    """
+    Registry subscription theo nguồn (dùng chung toàn process, chạy trên event loop)
+
+    - Subscription được mở lần đầu CheckAPI kiểm tra 1 item của nguồn, mở lại
+      khi `api.stream_url`/... đổi, dừng khi nguồn bị xóa khỏi config (`prune`)
+    - Mỗi lần kết nối dùng ClientSession riêng, không chiếm connection của pool
+      polling (HttpClientUtil)
+    - Mỗi event là JSON: 1 record, mảng record hoặc `{data|result: [...]}`;
+      record có `symbol_key` + `column` cập nhật giá trị mới nhất của symbol
+    - Mất kết nối (lỗi, server đóng, không có byte nào trong `idle_timeout`
+      giây) → xóa các giá trị đã nhận, CheckAPI quay về polling; kết nối lại
+      với backoff 1s → 60s
+
+    Sử dụng:
+        value = PushSubscriptionUtil.get_value(api_name, api_cfg.push, symbol)
+        if value is None:
+            ...polling...
+    """
+
+    RECONNECT_MIN = 1.0
+    RECONNECT_MAX = 60.0
+
+    _logger = None
+    _subscriptions: Dict[Hashable, _Subscription] = {}
+
+    @staticmethod
+    def _get_logger():
+        """Lazy load logger"""
+        if PushSubscriptionUtil._logger is None:
+            PushSubscriptionUtil._logger = LoggerConfig.logger_config(
+                "PushSubscriptionUtil"
+            )
+        return PushSubscriptionUtil._logger
+
+    @staticmethod
+    def get_value(name: str, push_cfg, symbol: Optional[str] = None) -> Optional[Any]:
+        """
+        Giá trị mới nhất của symbol nhận qua push (mở subscription nếu chưa có)
+
+        Args:
+            name: Tên nguồn
+            push_cfg: ApiPushConfig đã compile
+            symbol: Symbol của item (None nếu nguồn không có symbol)
+
+        Returns:
+            Giá trị column, None nếu stream đang mất kết nối hoặc symbol chưa có event
+        """
+        subscription = PushSubscriptionUtil._subscriptions.get(name)
+        if subscription is None or subscription.config != push_cfg:
+            if subscription is not None:
+                subscription.task.cancel()
+            subscription = _Subscription(name, push_cfg)
+            subscription.task = asyncio.ensure_future(
+                PushSubscriptionUtil._run(subscription)
+            )
+            PushSubscriptionUtil._subscriptions[name] = subscription
+
+        if not subscription.live:
+            return None
+        return subscription.values.get(symbol)
+
+    @staticmethod
+    async def _run(subscription: _Subscription) -> None:
+        """Giữ subscription: kết nối, nhận event, kết nối lại khi mất"""
+        logger = PushSubscriptionUtil._get_logger()
+        config = subscription.config
+        backoff = PushSubscriptionUtil.RECONNECT_MIN
+
+        while PushSubscriptionUtil._subscriptions.get(subscription.name) is subscription:
+            try:
+                if config.type == "websocket":
+                    await PushSubscriptionUtil._consume_websocket(subscription)
+                else:
+                    await PushSubscriptionUtil._consume_sse(subscription)
+                reason = "server đóng stream"
+            except asyncio.CancelledError:
+                subscription.live = False
+                raise
+            except Exception as e:
+                reason = str(e) or type(e).__name__
+
+            if subscription.live:
+                backoff = PushSubscriptionUtil.RECONNECT_MIN
+            subscription.live = False
+            # Event bị lỡ trong lúc mất kết nối: giá trị cũ không còn đáng tin
+            subscription.values.clear()
+            logger.warning(
+                f"[{subscription.name}] Mất push stream {config.url} ({reason}), "
+                f"chuyển sang polling, kết nối lại sau {backoff:g}s"
+            )
+            await asyncio.sleep(backoff)
+            backoff = min(PushSubscriptionUtil.RECONNECT_MAX, backoff * 2)
+
+    @staticmethod
+    def prune(sources: Dict[str, Any]) -> None:
+        """
+        Dừng subscription của nguồn đã bị xóa/tắt hoặc bỏ `api.stream_url`
+        (gọi mỗi lần reconcile)
+
+        Args:
+            sources: {api_name: SourceConfig} đang enable
+        """
+        for name, subscription in list(PushSubscriptionUtil._subscriptions.items()):
+            source = sources.get(name)
+            if (
+                source is not None
+                and source.api is not None
+                and source.api.push == subscription.config
+            ):
+                continue
+            PushSubscriptionUtil._subscriptions.pop(name, None)
+            subscription.task.cancel()
+            PushSubscriptionUtil._get_logger().info(
+                f"[{name}] Dừng push stream {subscription.config.url} (nguồn không còn trong config)"
+            )
+
+    @staticmethod
+    def _mark_live(subscription: _Subscription) -> None:
+        subscription.live = True
+        PushSubscriptionUtil._get_logger().info(
+            f"[{subscription.name}] Đã kết nối push stream {subscription.config.url} "
+            f"({subscription.config.type})"
+        )
+
+    @staticmethod
+    def _new_session(subscription: _Subscription):
+        """
+        ClientSession riêng của 1 lần kết nối subscription
+
+        Không dùng pool polling của HttpClientUtil (giới hạn `limit_per_host`
+        connection/host): stream dài hạn sẽ chiếm vĩnh viễn slot polling của host,
+        kể cả polling fallback khi stream mất.
+        """
+        try:
+            import aiohttp
+        except ImportError:
+            raise ImportError("Thiếu thư viện aiohttp. Cài đặt: pip install aiohttp")
+        from utils.http_client_util import HttpClientUtil
+
+        host_config = HttpClientUtil.get_host_config(
+            PushSubscriptionUtil._host_of(subscription.config.url)
+        )
+        return aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=1),
+            timeout=aiohttp.ClientTimeout(
+                total=None,
+                connect=float(host_config["connect_timeout"]),
+                sock_read=subscription.config.idle_timeout,
+            ),
+        )
+
+    @staticmethod
+    async def _consume_sse(subscription: _Subscription) -> None:
+        """Đọc Server-Sent Events tới khi stream đóng hoặc lỗi"""
+        from utils.http_client_util import HttpStatusError
+
+        config = subscription.config
+        headers = {"Accept": "text/event-stream", "Cache-Control": "no-cache"}
+
+        async with PushSubscriptionUtil._new_session(subscription) as session:
+            async with session.get(config.url, headers=headers) as response:
+                if response.status >= 400:
+                    raise HttpStatusError(response.status, config.url)
+                PushSubscriptionUtil._mark_live(subscription)
+                parser = SseParser()
+                async for chunk in response.content.iter_any():
+                    for data in parser.feed(chunk):
+                        PushSubscriptionUtil._apply(subscription, data)
+
+    @staticmethod
+    async def _consume_websocket(subscription: _Subscription) -> None:
+        """Đọc message WebSocket tới khi socket đóng hoặc lỗi"""
+        import aiohttp
+
+        config = subscription.config
+        async with PushSubscriptionUtil._new_session(subscription) as session:
+            async with session.ws_connect(
+                config.url,
+                heartbeat=max(1.0, config.idle_timeout / 2),
+                receive_timeout=config.idle_timeout,
+            ) as ws:
+                PushSubscriptionUtil._mark_live(subscription)
+                async for message in ws:
+                    if message.type == aiohttp.WSMsgType.TEXT:
+                        PushSubscriptionUtil._apply(subscription, message.data)
+                    elif message.type == aiohttp.WSMsgType.BINARY:
+                        PushSubscriptionUtil._apply(
+                            subscription, message.data.decode("utf-8", errors="replace")
+                        )
+                    elif message.type == aiohttp.WSMsgType.ERROR:
+                        raise ws.exception() or ConnectionError("WebSocket error")
+
+    @staticmethod
+    def _host_of(url: str) -> str:
+        from urllib.parse import urlsplit
+
+        return urlsplit(url).netloc.lower()
+
+    @staticmethod
+    def _apply(subscription: _Subscription, data: str) -> None:
+        """Cập nhật giá trị mới nhất của các symbol trong 1 event"""
+        try:
+            payload = json.loads(data)
+        except json.JSONDecodeError:
+            PushSubscriptionUtil._get_logger().debug(
+                f"[{subscription.name}] Bỏ qua event không phải JSON: {data[:200]}"
+            )
+            return
+
+        if isinstance(payload, dict):
+            inner = payload.get("data", payload.get("result"))
+            records = inner if isinstance(inner, list) else [payload]
+        elif isinstance(payload, list):
+            records = payload
+        else:
+            return
+
+        config = subscription.config
+        for record in records:
+            if not isinstance(record, dict):
+                continue
+            value = record.get(config.column)
+            if value is None:
+                continue
+            symbol = record.get(config.symbol_key)
+            subscription.values[str(symbol) if symbol is not None else None] = value
+            subscription.events += 1
+
+    @staticmethod
+    def get_stats() -> Dict[Hashable, Dict[str, Any]]:
+        """Trạng thái các subscription: live, số symbol đã có giá trị, số event"""
+        return {
+            name: {
+                "live": subscription.live,
+                "symbols": len(subscription.values),
+                "events": subscription.events,
+            }
+            for name, subscription in PushSubscriptionUtil._subscriptions.items()
+        }
+
+    @staticmethod
+    async def close_all() -> None:
+        """Hủy tất cả subscription (gọi khi checker dừng)"""
+        subscriptions = list(PushSubscriptionUtil._subscriptions.values())
+        PushSubscriptionUtil._subscriptions.clear()
+        for subscription in subscriptions:
+            subscription.task.cancel()
+        for subscription in subscriptions:
+            try:
+                await subscription.task
+            except (asyncio.CancelledError, Exception):
+                pass
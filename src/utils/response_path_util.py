@@ -0,0 +1,146 @@
+"""
+Response Path Utility
+Path language cho response API (vd: `data[0][-1].Date`), compile 1 lần mỗi config
+version thành accessor
+"""
+
+import re
+from typing import Any, Tuple, Union
+
+
+# `.key`, `key` (đầu path), `[0]`, `[-1]`, `["key có dấu chấm"]`
+_TOKEN_RE = re.compile(
+    r"""
+    \.?(?P<key>[A-Za-z_$][\w$-]*)
+    | \[\s*(?P<index>-?\d+)\s*\]
+    | \[\s*(?P<quote>["'])(?P<qkey>.*?)(?P=quote)\s*\]
+    """,
+    re.VERBOSE,
+)
+
+
+class ResponsePath:
+    """
+    Accessor đã compile cho 1 path
+
+    Mỗi bước là key của object (`.Date`, `["Date"]`) hoặc index của mảng (`[0]`,
+    `[-1]`). Phân loại lỗi giống CheckAPI:
+    - Mảng rỗng → ValueError("EMPTY_DATA") (chưa có dữ liệu)
+    - Thiếu key → KeyError; index vượt độ dài → IndexError; sai kiểu → TypeError
+      (response sai format)
+    - Response là object có `code` != 200 → ValueError("Response code = ...")
+      (`message` chứa "No data available" → EMPTY_DATA)
+
+    Sử dụng:
+        path = ResponsePath.compile("data[0][-1].Date")
+        value = path.extract(response)
+    """
+
+    __slots__ = ("expr", "steps", "check_code")
+
+    def __init__(
+        self, expr: str, steps: Tuple[Union[str, int], ...], check_code: bool = True
+    ):
+        self.expr = expr
+        self.steps = steps
+        self.check_code = check_code
+
+    @staticmethod
+    def compile(expr: str, check_code: bool = True) -> "ResponsePath":
+        """
+        Compile path
+
+        Args:
+            expr: Path (vd: `data[0][-1].Date`, `$.result[0].datetime`)
+            check_code: Kiểm tra `code` của wrapper trước khi đi theo path
+
+        Returns:
+            ResponsePath
+
+        Raises:
+            ValueError: Path sai cú pháp
+        """
+        text = expr.strip()
+        if text.startswith("$"):
+            text = text[1:]
+        if not text:
+            raise ValueError("Path rỗng")
+
+        steps = []
+        pos = 0
+        while pos < len(text):
+            match = _TOKEN_RE.match(text, pos)
+            if match is None or (match.group("key") and pos > 0 and text[pos] != "."):
+                raise ValueError(f"Path '{expr}' sai cú pháp tại vị trí {pos}")
+            if match.group("key") is not None:
+                steps.append(match.group("key"))
+            elif match.group("index") is not None:
+                steps.append(int(match.group("index")))
+            else:
+                steps.append(match.group("qkey"))
+            pos = match.end()
+
+        return ResponsePath(expr, tuple(steps), check_code)
+
+    @staticmethod
+    def _check_wrapper_code(response: dict) -> None:
+        code = response.get("code", 200)
+        if code != 200:
+            message = response.get("message", "")
+            if "No data available" in str(message):
+                raise ValueError("EMPTY_DATA")
+            error_details = f"Response code = {code}"
+            if message:
+                error_details += f" - {message}"
+            raise ValueError(error_details)
+
+    def extract(self, response: Any) -> Any:
+        """
+        Lấy giá trị theo path
+
+        Args:
+            response: Response JSON hoặc mảng record
+
+        Returns:
+            Giá trị tại path
+
+        Raises:
+            ValueError, KeyError, IndexError, TypeError: xem docstring của class
+        """
+        if self.check_code and isinstance(response, dict):
+            self._check_wrapper_code(response)
+
+        current = response
+        for position, step in enumerate(self.steps):
+            if type(step) is int:
+                if not isinstance(current, list):
+                    raise TypeError(
+                        f"{self._where(position)} không phải list, là {type(current).__name__}"
+                    )
+                if not current:
+                    raise ValueError("EMPTY_DATA")
+                if step >= len(current) or step < -len(current):
+                    raise IndexError(
+                        f"Index {step} tại {self._where(position)} vượt quá độ dài mảng {len(current)}"
+                    )
+                current = current[step]
+            else:
+                if not isinstance(current, dict):
+                    raise TypeError(
+                        f"{self._where(position)} không phải dict, là {type(current).__name__}"
+                    )
+                if step not in current:
+                    raise KeyError(f"{self._where(position)} không có key '{step}'")
+                current = current[step]
+        return current
+
+    def _where(self, position: int) -> str:
+        """Mô tả vị trí (phần path đã đi qua) cho message lỗi"""
+        prefix = "".join(
+            f"[{step}]" if type(step) is int else f".{step}"
+            for step in self.steps[:position]
+        )
+        return f"Response{prefix}" if prefix else "Response"
+
+    def __repr__(self) -> str:
+        return f"ResponsePath({self.expr!r})"
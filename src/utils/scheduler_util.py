@@ -0,0 +1,410 @@
+"""
+Scheduler Utility
+Scheduler trung tâm: heap theo thời điểm đến hạn + worker pool giới hạn
+"""
+
+import asyncio
+import heapq
+import itertools
+import random
+import time
+import zlib
+from collections import Counter
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+from configs.logging_config import LoggerConfig
+from utils.bulkhead_util import BulkheadUtil
+from utils.latency_util import LatencyUtil
+
+
+class ScheduledItem:
+    """
+    1 item được lập lịch (vd: 1 cặp source/symbol của 1 checker)
+
+    Attributes:
+        key: Định danh unique trong scheduler
+        handler: Hàm async chạy 1 lần check, trả về số giây tới lần chạy kế tiếp
+        next_due: Thời điểm (monotonic) đến hạn kế tiếp
+        generation: Tăng mỗi lần item được lập lịch lại (để bỏ entry cũ trong heap)
+        running: Item đang được worker xử lý
+        last_delay: Delay gần nhất handler trả về (dùng khi handler lỗi)
+        priority: Priority rank (0 = critical) - item rank nhỏ được worker lấy trước
+        phase: Vị trí cố định trong chu kỳ [0, 1) (None = không căn pha)
+        period: Chu kỳ bình thường của item (giây) - chỉ delay bằng period mới được căn pha
+        jitter: Số giây ngẫu nhiên tối đa cộng thêm mỗi lần lập lịch
+    """
+
+    __slots__ = (
+        "key",
+        "handler",
+        "next_due",
+        "generation",
+        "running",
+        "last_delay",
+        "priority",
+        "phase",
+        "period",
+        "jitter",
+    )
+
+    def __init__(
+        self,
+        key: Hashable,
+        handler: Callable[[], Awaitable[Optional[float]]],
+        priority: int = 1,
+        phase: Optional[float] = None,
+        period: Optional[float] = None,
+        jitter: float = 0.0,
+    ):
+        self.key = key
+        self.handler = handler
+        self.next_due = 0.0
+        self.generation = 0
+        self.running = False
+        self.last_delay = None
+        self.priority = priority
+        self.phase = phase
+        self.period = period
+        self.jitter = jitter
+
+
+class CheckScheduler:
+    """
+    Scheduler dùng chung cho tất cả checker
+
+    - 1 heap (next_due, seq, key, generation) thay cho 1 coroutine `while True` mỗi item
+    - Dispatcher chỉ ngủ tới item đến hạn sớm nhất
+    - Worker pool cố định (`max_workers`) chạy các item đến hạn; khi hàng đợi
+      dồn, item priority cao (rank nhỏ) được chạy trước
+    - Căn pha: mỗi item chạy tại offset cố định trong chu kỳ (hash của tên) + jitter,
+      tránh tất cả item cùng tần suất bắn request cùng 1 thời điểm
+    - Metrics: số item, queue depth (đến hạn nhưng chưa có worker), dispatch lag,
+      tỉ lệ peak/mean số lần dispatch mỗi giây
+
+    Sử dụng:
+        scheduler = CheckScheduler()
+        scheduler.add(("api", "cmc-BTC"), handler, delay=0)
+        scheduler.remove(("api", "cmc-BTC"))
+        await scheduler.run()
+    """
+
+    DEFAULT_MAX_WORKERS = 32
+    DEFAULT_RETRY_DELAY = 10
+    STATS_LOG_INTERVAL = 60
+
+    def __init__(self, max_workers: Optional[int] = None):
+        """
+        Args:
+            max_workers: Số worker tối đa (mặc định MONITOR_CONFIG.scheduler.max_workers hoặc 32)
+        """
+        self.logger = LoggerConfig.logger_config("CheckScheduler")
+
+        if max_workers is None:
+            max_workers = self._get_scheduler_config().get(
+                "max_workers", self.DEFAULT_MAX_WORKERS
+            )
+        self.max_workers = max(1, int(max_workers))
+        self.phase_spread = bool(
+            self._get_scheduler_config().get("phase_spread", True)
+        )
+
+        self._items: Dict[Hashable, ScheduledItem] = {}
+        self._heap: List[Tuple[float, int, Hashable, int]] = []
+        self._seq = itertools.count()
+        self._ready: Optional[asyncio.PriorityQueue] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._runner: Optional[asyncio.Task] = None
+        # True khi run() đang dừng: chỉ lúc này CancelledError trong worker là của worker
+        self._stopping = False
+
+        # Metrics
+        self._in_flight = 0
+        self._dispatched = 0
+        self._lag_total = 0.0
+        self._lag_max = 0.0
+        self._lag_count = 0
+        self._rate_buckets: Counter = Counter()
+        self._window_start = time.monotonic()
+
+    @staticmethod
+    def _get_scheduler_config() -> Dict[str, Any]:
+        """MONITOR_CONFIG.scheduler trong common_config.json"""
+        from utils.load_config_util import LoadConfigUtil
+
+        common_config = LoadConfigUtil.load_json_to_variable("common_config.json")
+        return common_config.get("MONITOR_CONFIG", {}).get("scheduler", {})
+
+    def _push(self, item: ScheduledItem, due: float) -> None:
+        item.generation += 1
+        item.next_due = due
+        heapq.heappush(self._heap, (due, next(self._seq), item.key, item.generation))
+        # Đánh thức dispatcher nếu item mới đến hạn sớm hơn
+        if self._wakeup is not None and self._heap[0][2] == item.key:
+            self._wakeup.set()
+
+    @staticmethod
+    def phase_of(name: str) -> float:
+        """
+        Offset cố định trong chu kỳ, tính từ hash của tên (ổn định giữa các lần chạy)
+
+        Args:
+            name: Tên hiển thị của item (vd: "cmc-BTC")
+
+        Returns:
+            Giá trị trong [0, 1)
+        """
+        return zlib.crc32(name.encode("utf-8")) / 2**32
+
+    @staticmethod
+    def phase_delay(phase: float, period: float, jitter: float = 0.0) -> float:
+        """
+        Số giây tới mốc kế tiếp của item trên lưới `k * period + phase * period`
+
+        Lưới tính theo wall-clock nên các item cùng period luôn lệch pha nhau
+        (kể cả sau restart), và giữ đúng chu kỳ bất kể thời gian chạy handler.
+
+        Args:
+            phase: Offset trong [0, 1)
+            period: Chu kỳ (giây)
+            jitter: Số giây ngẫu nhiên tối đa cộng thêm
+
+        Returns:
+            Số giây chờ, trong (0, period + jitter]
+        """
+        if period <= 0:
+            return 0.0
+        elapsed = (time.time() - phase * period) % period
+        delay = period - elapsed
+        if jitter > 0:
+            delay += random.uniform(0, jitter)
+        return delay
+
+    def add(
+        self,
+        key: Hashable,
+        handler: Callable[[], Awaitable[Optional[float]]],
+        delay: float = 0.0,
+        priority: int = 1,
+        phase: Optional[float] = None,
+        period: Optional[float] = None,
+        jitter: float = 0.0,
+    ) -> None:
+        """
+        Thêm (hoặc thay thế) 1 item
+
+        Args:
+            key: Định danh unique
+            handler: Hàm async chạy 1 lần check, trả về số giây tới lần chạy kế tiếp
+            delay: Số giây tới lần chạy đầu tiên
+            priority: Priority rank (0 = critical, xem PRIORITY_RANKS)
+            phase: Offset trong chu kỳ (xem `phase_of`); None = chạy đúng theo delay trả về
+            period: Chu kỳ bình thường; delay trả về khác period (vd: ngủ tới lúc
+                lịch mở lại) được giữ nguyên, không căn pha
+            jitter: Số giây ngẫu nhiên tối đa cộng thêm mỗi lần lập lịch
+        """
+        self.remove(key)
+        item = ScheduledItem(
+            key, handler, priority=priority, phase=phase, period=period, jitter=jitter
+        )
+        self._items[key] = item
+        self._push(item, time.monotonic() + max(0.0, delay))
+
+    def remove(self, key: Hashable) -> bool:
+        """
+        Xóa item (entry trong heap bị bỏ qua khi tới hạn)
+
+        Returns:
+            True nếu item tồn tại
+        """
+        item = self._items.pop(key, None)
+        if item is None:
+            return False
+        item.generation += 1
+        return True
+
+    def reschedule(self, key: Hashable, delay: float) -> bool:
+        """
+        Đổi thời điểm chạy kế tiếp của item (bỏ qua nếu item đang chạy)
+
+        Returns:
+            True nếu đã lập lịch lại
+        """
+        item = self._items.get(key)
+        if item is None or item.running:
+            return False
+        self._push(item, time.monotonic() + max(0.0, delay))
+        return True
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._items
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get_next_due(self, key: Hashable) -> Optional[float]:
+        """Số giây còn lại tới lần chạy kế tiếp (None nếu không có item)"""
+        item = self._items.get(key)
+        if item is None:
+            return None
+        return max(0.0, item.next_due - time.monotonic())
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Lấy metrics hiện tại
+
+        Returns:
+            Dict: items, queue_depth, in_flight, dispatched,
+            dispatch_lag_avg, dispatch_lag_max (giây), rate_mean, rate_peak
+            (lần dispatch/giây) và peak_to_mean - reset sau mỗi lần đọc
+        """
+        lag_avg = self._lag_total / self._lag_count if self._lag_count else 0.0
+
+        now = time.monotonic()
+        window = max(1.0, now - self._window_start)
+        rate_mean = sum(self._rate_buckets.values()) / window
+        rate_peak = max(self._rate_buckets.values(), default=0)
+        stats = {
+            "items": len(self._items),
+            "queue_depth": self._ready.qsize() if self._ready is not None else 0,
+            "in_flight": self._in_flight,
+            "dispatched": self._dispatched,
+            "dispatch_lag_avg": round(lag_avg, 3),
+            "dispatch_lag_max": round(self._lag_max, 3),
+            "rate_mean": round(rate_mean, 3),
+            "rate_peak": rate_peak,
+            "peak_to_mean": round(rate_peak / rate_mean, 2) if rate_mean else 0.0,
+        }
+        self._lag_total = 0.0
+        self._lag_max = 0.0
+        self._lag_count = 0
+        self._rate_buckets.clear()
+        self._window_start = now
+        return stats
+
+    async def _dispatch(self) -> None:
+        """Lấy item đến hạn từ heap và đẩy vào hàng đợi cho worker"""
+        while True:
+            now = time.monotonic()
+            while self._heap and self._heap[0][0] <= now:
+                due, _, key, generation = heapq.heappop(self._heap)
+                item = self._items.get(key)
+                if item is None or item.generation != generation or item.running:
+                    continue  # Entry cũ (đã remove hoặc đã lập lịch lại)
+                item.running = True
+                self._ready.put_nowait((item.priority, due, next(self._seq), item))
+
+            timeout = self._heap[0][0] - now if self._heap else None
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _worker(self) -> None:
+        """Worker: chạy handler của item rồi lập lịch lại theo delay trả về"""
+        while True:
+            _, due, _, item = await self._ready.get()
+
+            now = time.monotonic()
+            lag = max(0.0, now - due)
+            self._rate_buckets[int(now)] += 1
+            self._lag_total += lag
+            self._lag_count += 1
+            self._lag_max = max(self._lag_max, lag)
+            self._dispatched += 1
+            self._in_flight += 1
+
+            delay = None
+            try:
+                delay = await item.handler()
+            except asyncio.CancelledError:
+                if self._stopping:
+                    raise
+                # CancelledError lọt ra từ handler (vd: future dùng chung bị hủy),
+                # không phải worker bị dừng: coi như lỗi của item, lập lịch lại
+                self.logger.error(
+                    f"Lỗi khi chạy item {item.key}: handler bị cancel ngoài ý muốn"
+                )
+            except Exception as e:
+                self.logger.error(f"Lỗi khi chạy item {item.key}: {e}", exc_info=True)
+            finally:
+                self._in_flight -= 1
+                item.running = False
+
+            if delay is None:
+                delay = (
+                    item.last_delay
+                    if item.last_delay is not None
+                    else self.DEFAULT_RETRY_DELAY
+                )
+            item.last_delay = delay
+
+            # Item có thể đã bị remove/thay thế trong lúc chạy
+            if self._items.get(item.key) is item:
+                # Chỉ căn pha/jitter cho chu kỳ bình thường; delay khác
+                # (vd: ngủ tới lúc lịch mở lại) chạy đúng thời điểm
+                if delay == item.period:
+                    if item.phase is not None:
+                        delay = self.phase_delay(item.phase, delay, item.jitter)
+                    elif item.jitter > 0:
+                        delay += random.uniform(0, item.jitter)
+                self._push(item, time.monotonic() + max(0.0, delay))
+
+    async def _log_stats(self) -> None:
+        """Log metrics định kỳ"""
+        while True:
+            await asyncio.sleep(self.STATS_LOG_INTERVAL)
+            stats = self.get_stats()
+            self.logger.info(
+                f"Scheduler: items={stats['items']} queue_depth={stats['queue_depth']} "
+                f"in_flight={stats['in_flight']}/{self.max_workers} "
+                f"dispatch_lag avg={stats['dispatch_lag_avg']}s max={stats['dispatch_lag_max']}s "
+                f"rate mean={stats['rate_mean']}/s peak={stats['rate_peak']}/s "
+                f"peak_to_mean={stats['peak_to_mean']}"
+            )
+            BulkheadUtil.log_stats()
+            LatencyUtil.log_stats()
+
+    async def run(self) -> None:
+        """Chạy dispatcher + worker pool (không bao giờ return trừ khi bị cancel)"""
+        self._ready = asyncio.PriorityQueue()
+        self._wakeup = asyncio.Event()
+
+        self._stopping = False
+
+        # Item được add trước khi run: dispatcher sẽ thấy trong heap
+        factories = [self._dispatch, self._log_stats]
+        factories += [self._worker] * self.max_workers
+        tasks = {asyncio.create_task(factory()): factory for factory in factories}
+
+        self.logger.info(f"Scheduler đã chạy với {self.max_workers} workers")
+        try:
+            # Giám sát: task nào dừng (lỗi ngoài ý muốn) thì khởi động lại, 1 task
+            # chết không kéo theo cả scheduler
+            while True:
+                done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    factory = tasks.pop(task)
+                    if task.cancelled():
+                        reason = "bị cancel"
+                    else:
+                        reason = repr(task.exception()) if task.exception() else "kết thúc"
+                    self.logger.error(
+                        f"Task scheduler {factory.__name__} dừng ({reason}), khởi động lại"
+                    )
+                    tasks[asyncio.create_task(factory())] = factory
+        finally:
+            self._stopping = True
+            for task in tasks:
+                task.cancel()
+
+    def ensure_started(self) -> asyncio.Task:
+        """
+        Start scheduler trên event loop hiện tại nếu chưa chạy
+
+        Returns:
+            asyncio.Task của scheduler
+        """
+        if self._runner is None or self._runner.done():
+            self._runner = asyncio.create_task(self.run())
+        return self._runner
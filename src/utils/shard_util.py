@@ -0,0 +1,81 @@
+"""
+Shard Utility
+Chia item (source/symbol) cho nhiều worker process bằng consistent hashing
+"""
+
+import bisect
+import hashlib
+from typing import Hashable, Iterable, List, Tuple
+
+
+class ConsistentHashRing:
+    """
+    Consistent hash ring với virtual nodes
+
+    Thêm/bớt item chỉ ảnh hưởng đúng item đó (không xáo trộn các item khác);
+    thêm/bớt node chỉ di chuyển ~1/N số item.
+
+    Sử dụng:
+        ring = ConsistentHashRing(range(4))
+        ring.get_node("cmc-BTC")  # → 0..3
+    """
+
+    DEFAULT_VNODES = 128
+
+    def __init__(self, nodes: Iterable[Hashable], vnodes: int = DEFAULT_VNODES):
+        """
+        Args:
+            nodes: Danh sách node (vd: index của worker)
+            vnodes: Số virtual node cho mỗi node
+        """
+        self.nodes = list(nodes)
+        if not self.nodes:
+            raise ValueError("ConsistentHashRing cần ít nhất 1 node")
+
+        ring: List[Tuple[int, Hashable]] = []
+        for node in self.nodes:
+            for replica in range(vnodes):
+                ring.append((self._hash(f"{node}#{replica}"), node))
+        ring.sort()
+        self._hashes = [point for point, _ in ring]
+        self._owners = [node for _, node in ring]
+
+    @staticmethod
+    def _hash(value: str) -> int:
+        """Hash ổn định giữa các process (không dùng hash() có random seed)"""
+        return int.from_bytes(hashlib.md5(value.encode("utf-8")).digest()[:8], "big")
+
+    def get_node(self, key: str) -> Hashable:
+        """
+        Node sở hữu key
+
+        Args:
+            key: Display name của item
+
+        Returns:
+            Node tương ứng
+        """
+        index = bisect.bisect(self._hashes, self._hash(key)) % len(self._hashes)
+        return self._owners[index]
+
+
+class ShardFilter:
+    """
+    Bộ lọc item thuộc về 1 worker
+
+    Attributes:
+        worker_index: Index của worker hiện tại (0..worker_count-1)
+        worker_count: Tổng số worker
+    """
+
+    def __init__(self, worker_index: int, worker_count: int):
+        self.worker_index = worker_index
+        self.worker_count = worker_count
+        self.ring = ConsistentHashRing(range(worker_count))
+
+    def owns(self, display_name: str) -> bool:
+        """True nếu item thuộc worker hiện tại"""
+        return self.ring.get_node(display_name) == self.worker_index
+
+    def __repr__(self) -> str:
+        return f"ShardFilter({self.worker_index}/{self.worker_count})"
@@ -0,0 +1,227 @@
+"""
+Single Flight Utility
+Gộp các lời gọi backend giống nhau (cùng key) đang chạy đồng thời thành 1 lần gọi,
+và giữ kết quả trong 1 micro-TTL sau khi xong
+"""
+
+import asyncio
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+
+class _Call:
+    """1 lời gọi đang chạy (hoặc vừa xong, còn trong TTL)"""
+
+    __slots__ = ("event", "result", "error", "done_at")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+        self.done_at: Optional[float] = None
+
+
+class SingleFlightUtil:
+    """
+    Single-flight dùng chung toàn process (thread-safe)
+
+    - Caller đầu tiên của 1 key chạy hàm, các caller cùng key trong lúc đó chờ
+      và nhận chung kết quả (hoặc exception)
+    - Kết quả thành công được dùng lại trong `ttl` giây sau khi xong
+      (MONITOR_CONFIG.single_flight.ttl, mặc định 1 giây; 0 = chỉ gộp lúc đang chạy)
+    - Exception không được cache
+
+    Sử dụng:
+        key = ("api", SingleFlightUtil.normalize_url(url))
+        response = SingleFlightUtil.do(key, lambda: fetch(url))
+        response = await SingleFlightUtil.do_async(key, lambda: fetch_async(url))
+    """
+
+    DEFAULT_TTL = 1.0
+    SWEEP_INTERVAL = 60
+
+    _lock = threading.Lock()
+    _calls: Dict[Hashable, _Call] = {}
+    # Lời gọi async: {key: [asyncio.Task, done_at | None]} - chỉ dùng trong event loop
+    _async_calls: Dict[Hashable, list] = {}
+    _async_last_sweep = 0.0
+    _last_sweep = 0.0
+    _stats = {"calls": 0, "executed": 0, "shared": 0, "cached": 0}
+
+    @staticmethod
+    def get_ttl() -> float:
+        """MONITOR_CONFIG.single_flight.ttl trong common_config.json"""
+        from utils.load_config_util import LoadConfigUtil
+
+        common_config = LoadConfigUtil.load_json_to_variable("common_config.json")
+        single_flight = common_config.get("MONITOR_CONFIG", {}).get("single_flight", {})
+        return float(single_flight.get("ttl", SingleFlightUtil.DEFAULT_TTL))
+
+    @staticmethod
+    def normalize_url(url: str) -> str:
+        """
+        Chuẩn hóa URL làm key: scheme/host viết thường, query sort theo tên, bỏ fragment
+
+        Args:
+            url: URL gốc
+
+        Returns:
+            URL đã chuẩn hóa
+        """
+        parts = urlsplit(url.strip())
+        query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+        return urlunsplit(
+            (parts.scheme.lower(), parts.netloc.lower(), parts.path or "/", query, "")
+        )
+
+    @staticmethod
+    def _sweep(now: float, ttl: float) -> None:
+        """Xóa các kết quả đã hết TTL (gọi khi đang giữ lock)"""
+        if now - SingleFlightUtil._last_sweep < SingleFlightUtil.SWEEP_INTERVAL:
+            return
+        SingleFlightUtil._last_sweep = now
+        expired = [
+            key
+            for key, call in SingleFlightUtil._calls.items()
+            if call.done_at is not None and now - call.done_at > ttl
+        ]
+        for key in expired:
+            del SingleFlightUtil._calls[key]
+
+    @staticmethod
+    def do(key: Hashable, fn: Callable[[], Any], ttl: Optional[float] = None) -> Any:
+        """
+        Chạy `fn` 1 lần cho mỗi key đang in-flight
+
+        Args:
+            key: Key đã chuẩn hóa của request (vd: URL, profile + collection + filter)
+            fn: Hàm thực hiện request
+            ttl: Số giây dùng lại kết quả sau khi xong (mặc định theo config)
+
+        Returns:
+            Kết quả của `fn` (dùng chung giữa các caller - không được sửa)
+
+        Raises:
+            Exception mà `fn` raise (tất cả caller đang chờ đều nhận)
+        """
+        if ttl is None:
+            ttl = SingleFlightUtil.get_ttl()
+
+        with SingleFlightUtil._lock:
+            SingleFlightUtil._stats["calls"] += 1
+            now = time.monotonic()
+            SingleFlightUtil._sweep(now, ttl)
+
+            call = SingleFlightUtil._calls.get(key)
+            if call is not None and call.done_at is not None:
+                if call.error is None and now - call.done_at <= ttl:
+                    SingleFlightUtil._stats["cached"] += 1
+                    return call.result
+                call = None
+
+            leader = call is None
+            if leader:
+                call = _Call()
+                SingleFlightUtil._calls[key] = call
+                SingleFlightUtil._stats["executed"] += 1
+            else:
+                SingleFlightUtil._stats["shared"] += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with SingleFlightUtil._lock:
+                call.done_at = time.monotonic()
+                if (call.error is not None or ttl <= 0) and SingleFlightUtil._calls.get(
+                    key
+                ) is call:
+                    del SingleFlightUtil._calls[key]
+            call.event.set()
+
+        return call.result
+
+    @staticmethod
+    async def do_async(
+        key: Hashable, fn: Callable[[], Awaitable[Any]], ttl: Optional[float] = None
+    ) -> Any:
+        """
+        Bản asyncio của `do`: chạy coroutine `fn()` 1 lần cho mỗi key đang in-flight
+
+        Args:
+            key: Key đã chuẩn hóa của request
+            fn: Hàm trả về coroutine thực hiện request
+            ttl: Số giây dùng lại kết quả sau khi xong (mặc định theo config)
+
+        Returns:
+            Kết quả của `fn` (dùng chung giữa các caller - không được sửa)
+
+        Raises:
+            Exception mà `fn` raise (tất cả caller đang chờ đều nhận); caller bị
+            cancel chỉ nhận CancelledError của riêng mình, request vẫn chạy tiếp
+            cho các caller khác
+        """
+        if ttl is None:
+            ttl = SingleFlightUtil.get_ttl()
+
+        calls = SingleFlightUtil._async_calls
+        now = time.monotonic()
+        with SingleFlightUtil._lock:
+            SingleFlightUtil._stats["calls"] += 1
+            if now - SingleFlightUtil._async_last_sweep >= SingleFlightUtil.SWEEP_INTERVAL:
+                SingleFlightUtil._async_last_sweep = now
+                for stale_key in [
+                    k for k, (_, done_at) in calls.items()
+                    if done_at is not None and now - done_at > ttl
+                ]:
+                    del calls[stale_key]
+
+        entry = calls.get(key)
+        if entry is not None:
+            future, done_at = entry
+            if done_at is None:
+                SingleFlightUtil._stats["shared"] += 1
+                return await asyncio.shield(future)
+            if now - done_at <= ttl:
+                SingleFlightUtil._stats["cached"] += 1
+                return future.result()
+
+        # Request chạy trong task riêng của flight: caller nào (kể cả caller
+        # đầu tiên) bị cancel/timeout chỉ dừng phần chờ của mình, không hủy
+        # request và không đẩy CancelledError sang các caller khác
+        task = asyncio.ensure_future(fn())
+        entry = [task, None]
+        calls[key] = entry
+        SingleFlightUtil._stats["executed"] += 1
+
+        def on_done(done_task: asyncio.Future) -> None:
+            if done_task.cancelled() or done_task.exception() is not None:
+                # Exception không được cache
+                if calls.get(key) is entry:
+                    del calls[key]
+                return
+            entry[1] = time.monotonic()
+            if ttl <= 0 and calls.get(key) is entry:
+                del calls[key]
+
+        task.add_done_callback(on_done)
+        return await asyncio.shield(task)
+
+    @staticmethod
+    def get_stats() -> Dict[str, int]:
+        """
+        Số lần gọi: calls (tổng), executed (thực sự gọi backend),
+        shared (chờ chung in-flight), cached (dùng lại trong TTL)
+        """
+        with SingleFlightUtil._lock:
+            return dict(SingleFlightUtil._stats)
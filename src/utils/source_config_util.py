@@ -0,0 +1,600 @@
+"""
+Source Config Utility
+Compile data_sources_config.json thành model typed, build 1 lần cho mỗi config version
+"""
+
+import threading
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Any, Dict, FrozenSet, Optional, Tuple
+
+from configs.logging_config import LoggerConfig
+from utils.load_config_util import LoadConfigUtil
+from utils.response_path_util import ResponsePath
+
+
+SOURCES_CONFIG_FILE = "data_sources_config.json"
+DEFAULT_USER_CONNECT = "duc_le_connect"
+
+# Priority class của nguồn (check.priority): rank nhỏ hơn được ưu tiên hơn
+PRIORITY_RANKS = {"critical": 0, "normal": 1, "low": 2}
+DEFAULT_PRIORITY = "normal"
+
+
+def parse_time_of_day(time_str: str) -> int:
+    """
+    Parse "HH:MM:SS" thành số giây trong ngày
+
+    Args:
+        time_str: String format "HH:MM:SS"
+
+    Returns:
+        Số giây tính từ 00:00:00
+
+    Raises:
+        ValueError: Nếu sai format
+    """
+    parsed = datetime.strptime(time_str.strip(), "%H:%M:%S")
+    return parsed.hour * 3600 + parsed.minute * 60 + parsed.second
+
+
+def parse_holiday(holiday_str: str) -> date:
+    """
+    Parse holiday string ("Y-m-d" hoặc "Y-m-d H:M:S") thành date
+
+    Raises:
+        ValueError: Nếu sai format
+    """
+    if " " in holiday_str:
+        return datetime.strptime(holiday_str, "%Y-%m-%d %H:%M:%S").date()
+    return datetime.strptime(holiday_str, "%Y-%m-%d").date()
+
+
+@dataclass(frozen=True, slots=True)
+class ApiBatchConfig:
+    """Phần `api.batch`: gộp nhiều symbol vào 1 request"""
+
+    url: str
+    separator: str
+    size: int
+    symbol_key: str
+    window: float
+
+    def url_for(self, symbols: Tuple[str, ...]) -> str:
+        """URL batch cho 1 chunk symbol (`{symbols}` hoặc `{symbol}` = danh sách đã nối)"""
+        joined = self.separator.join(symbols)
+        return self.url.format(symbols=joined, symbol=joined)
+
+
+@dataclass(frozen=True, slots=True)
+class ApiPushConfig:
+    """Phần `api.stream_url`: nhận timestamp qua SSE/WebSocket thay vì polling"""
+
+    url: str
+    type: str
+    symbol_key: str
+    column: str
+    idle_timeout: float
+
+
+@dataclass(frozen=True, slots=True)
+class ApiSourceConfig:
+    """Phần `api` của 1 nguồn dữ liệu"""
+
+    enable: bool
+    url: Optional[str]
+    record_pointer: int
+    column_to_check: str
+    nested_list: bool
+    raw: Any
+    batch: Optional[ApiBatchConfig] = None
+    streaming: bool = True
+    max_bytes: Optional[int] = None
+    decode_in_process: bool = False
+    conditional: bool = True
+    head_header: Optional[str] = None
+    path: Optional[ResponsePath] = None
+    push: Optional[ApiPushConfig] = None
+    _urls: Dict[Optional[str], Optional[str]] = field(
+        default_factory=dict, repr=False, compare=False
+    )
+
+    def url_for(self, symbol: Optional[str] = None) -> Optional[str]:
+        """URL đã render cho symbol (memo theo symbol)"""
+        if symbol is None or self.url is None:
+            return self.url
+        url = self._urls.get(symbol)
+        if url is None:
+            url = self.url.format(symbol=symbol)
+            self._urls[symbol] = url
+        return url
+
+
+@dataclass(frozen=True, slots=True)
+class DatabaseBatchConfig:
+    """Phần `database.batch`: gộp các symbol của nguồn vào 1 query GROUP BY / $group"""
+
+    size: int
+    window: float
+
+
+@dataclass(frozen=True, slots=True)
+class DatabaseSourceConfig:
+    """Phần `database` của 1 nguồn dữ liệu"""
+
+    enable: bool
+    type: Optional[str]
+    database: Optional[str]
+    collection_name: Optional[str]
+    table: Optional[str]
+    record_pointer: int
+    column_to_check: str
+    user_connect: str
+    raw: Any
+    batch: Optional[DatabaseBatchConfig] = None
+
+
+@dataclass(frozen=True, slots=True)
+class DiskSourceConfig:
+    """Phần `disk` của 1 nguồn dữ liệu"""
+
+    enable: bool
+    file_path: Optional[str]
+    file_type: str
+    record_pointer: int
+    column_to_check: str
+    raw: Any
+    _paths: Dict[Optional[str], Optional[str]] = field(
+        default_factory=dict, repr=False, compare=False
+    )
+
+    def path_for(self, symbol: Optional[str] = None) -> Optional[str]:
+        """File path đã render cho symbol (memo theo symbol)"""
+        if symbol is None or self.file_path is None:
+            return self.file_path
+        path = self._paths.get(symbol)
+        if path is None:
+            path = self.file_path.format(symbol=symbol)
+            self._paths[symbol] = path
+        return path
+
+
+@dataclass(frozen=True, slots=True)
+class SymbolsConfig:
+    """Phần `symbols` của 1 nguồn dữ liệu"""
+
+    auto_sync: Optional[bool]
+    values: Optional[Tuple[str, ...]]
+    column: Optional[str]
+
+
+@dataclass(frozen=True, slots=True)
+class CheckConfig:
+    """Phần `check` của 1 nguồn dữ liệu"""
+
+    timezone_offset: int
+    allow_delay: int
+    check_frequency: int
+    alert_frequency: int
+    max_stale_seconds: Optional[int]
+    jitter: float = 0.0
+    deadline_polling: bool = False
+    priority: str = DEFAULT_PRIORITY
+
+    @property
+    def priority_rank(self) -> int:
+        """Rank của priority class (0 = critical)"""
+        return PRIORITY_RANKS[self.priority]
+
+
+@dataclass(frozen=True, slots=True)
+class ScheduleConfig:
+    """
+    Phần `schedule` đã parse sẵn
+
+    Attributes:
+        valid_days: frozenset các weekday hợp lệ (None = mọi ngày)
+        time_ranges: Tuple (start_sec, end_sec) theo giây trong ngày
+            (None = 24h, () = không khoảng nào hợp lệ)
+        holidays: frozenset các ngày lễ
+        raw: Schedule gốc; `legacy=True` nếu là format cũ mà model không compile
+    """
+
+    valid_days: Optional[FrozenSet[int]]
+    time_ranges: Optional[Tuple[Tuple[int, int], ...]]
+    holidays: FrozenSet[date]
+    raw: Any
+    legacy: bool = False
+
+    def is_holiday(self, day: date) -> bool:
+        """Kiểm tra ngày có phải ngày lễ không"""
+        return day in self.holidays
+
+
+@dataclass(frozen=True, slots=True)
+class SourceConfig:
+    """Toàn bộ config của 1 nguồn dữ liệu (source → api/database/disk/check/schedule)"""
+
+    name: str
+    api: Optional[ApiSourceConfig]
+    database: Optional[DatabaseSourceConfig]
+    disk: Optional[DiskSourceConfig]
+    symbols: SymbolsConfig
+    check: CheckConfig
+    schedule: ScheduleConfig
+    raw: Any
+
+
+@dataclass(frozen=True, slots=True)
+class CompiledSourcesConfig:
+    """Kết quả compile của 1 version data_sources_config.json"""
+
+    version: int
+    sources: Dict[str, SourceConfig]
+    api_sources: Dict[str, SourceConfig]
+    database_sources: Dict[str, SourceConfig]
+    disk_sources: Dict[str, SourceConfig]
+
+
+class SourceConfigUtil:
+    """Compile và cache model typed của data_sources_config.json theo version"""
+
+    logger = LoggerConfig.logger_config("SourceConfigUtil")
+
+    _lock = threading.Lock()
+    _compiled: Optional[CompiledSourcesConfig] = None
+
+    @staticmethod
+    def get_compiled() -> CompiledSourcesConfig:
+        """
+        Lấy model đã compile cho version config hiện tại
+
+        Chỉ compile lại khi LoadConfigUtil trả về version mới.
+
+        Returns:
+            CompiledSourcesConfig
+        """
+        snapshot = LoadConfigUtil.get_snapshot(SOURCES_CONFIG_FILE)
+        compiled = SourceConfigUtil._compiled
+        if compiled is not None and compiled.version == snapshot.version:
+            return compiled
+
+        with SourceConfigUtil._lock:
+            compiled = SourceConfigUtil._compiled
+            if compiled is None or compiled.version != snapshot.version:
+                compiled = SourceConfigUtil.compile(snapshot.data, snapshot.version)
+                SourceConfigUtil._compiled = compiled
+        return compiled
+
+    @staticmethod
+    def get_source(name: str) -> Optional[SourceConfig]:
+        """Lấy config đã compile của 1 nguồn (None nếu không còn trong config)"""
+        return SourceConfigUtil.get_compiled().sources.get(name)
+
+    @staticmethod
+    def compile(data, version: int) -> CompiledSourcesConfig:
+        """
+        Compile toàn bộ config
+
+        Nguồn nào lỗi thì log và bỏ qua, không ảnh hưởng các nguồn khác.
+
+        Args:
+            data: Nội dung data_sources_config.json
+            version: Version của snapshot
+
+        Returns:
+            CompiledSourcesConfig
+        """
+        sources = {}
+        for name, raw in data.items():
+            try:
+                sources[name] = SourceConfigUtil.compile_source(name, raw)
+            except Exception as e:
+                SourceConfigUtil.logger.error(f"Config '{name}' không hợp lệ, bỏ qua: {e}")
+
+        SourceConfigUtil.logger.info(
+            f"Đã compile {len(sources)} nguồn dữ liệu (config version {version})"
+        )
+        return CompiledSourcesConfig(
+            version=version,
+            sources=sources,
+            api_sources={k: v for k, v in sources.items() if v.api and v.api.enable},
+            database_sources={
+                k: v for k, v in sources.items() if v.database and v.database.enable
+            },
+            disk_sources={k: v for k, v in sources.items() if v.disk and v.disk.enable},
+        )
+
+    @staticmethod
+    def compile_source(name: str, raw) -> SourceConfig:
+        """
+        Compile config của 1 nguồn
+
+        Args:
+            name: Tên nguồn
+            raw: Dict config gốc
+
+        Returns:
+            SourceConfig
+        """
+        symbols_cfg = raw.get("symbols") or {}
+        values = symbols_cfg.get("values")
+        symbols = SymbolsConfig(
+            auto_sync=symbols_cfg.get("auto_sync"),
+            values=tuple(values) if isinstance(values, list) else None,
+            column=symbols_cfg.get("column"),
+        )
+
+        check_cfg = raw.get("check") or {}
+        priority = str(check_cfg.get("priority") or DEFAULT_PRIORITY).lower()
+        if priority not in PRIORITY_RANKS:
+            SourceConfigUtil.logger.warning(
+                f"[{name}] check.priority '{priority}' không hợp lệ "
+                f"({', '.join(PRIORITY_RANKS)}), dùng '{DEFAULT_PRIORITY}'"
+            )
+            priority = DEFAULT_PRIORITY
+        check = CheckConfig(
+            timezone_offset=check_cfg.get("timezone_offset", 7),
+            allow_delay=check_cfg.get("allow_delay", 60),
+            check_frequency=check_cfg.get("check_frequency", 10),
+            alert_frequency=check_cfg.get("alert_frequency", 60),
+            max_stale_seconds=check_cfg.get("max_stale_seconds"),
+            jitter=max(0.0, float(check_cfg.get("jitter") or 0)),
+            deadline_polling=bool(check_cfg.get("deadline_polling", False)),
+            priority=priority,
+        )
+
+        api = None
+        api_cfg = raw.get("api")
+        if api_cfg:
+            batch = SourceConfigUtil.compile_api_batch(name, api_cfg, symbols)
+            api = ApiSourceConfig(
+                enable=bool(api_cfg.get("enable", False)),
+                url=api_cfg.get("url"),
+                record_pointer=api_cfg.get("record_pointer", 0),
+                column_to_check=api_cfg.get("column_to_check", "datetime"),
+                nested_list=bool(api_cfg.get("nested_list", False)),
+                raw=api_cfg,
+                batch=batch,
+                streaming=bool(api_cfg.get("streaming", True)),
+                max_bytes=int(api_cfg["max_bytes"]) if api_cfg.get("max_bytes") else None,
+                decode_in_process=bool(api_cfg.get("decode_in_process", False)),
+                conditional=bool(api_cfg.get("conditional", True)),
+                head_header=api_cfg.get("head_header") or None,
+                path=SourceConfigUtil.compile_api_path(name, api_cfg),
+                push=SourceConfigUtil.compile_api_push(name, api_cfg, symbols),
+            )
+
+        database = None
+        db_cfg = raw.get("database")
+        if db_cfg:
+            database = DatabaseSourceConfig(
+                enable=bool(db_cfg.get("enable", False)),
+                type=db_cfg.get("type"),
+                database=db_cfg.get("database"),
+                collection_name=db_cfg.get("collection_name"),
+                table=db_cfg.get("table") or db_cfg.get("table_name"),
+                record_pointer=db_cfg.get("record_pointer", 0),
+                column_to_check=db_cfg.get("column_to_check", "datetime"),
+                user_connect=db_cfg.get("user_connect", DEFAULT_USER_CONNECT),
+                raw=db_cfg,
+                batch=SourceConfigUtil.compile_database_batch(name, db_cfg, symbols),
+            )
+
+        disk = None
+        disk_cfg = raw.get("disk")
+        if disk_cfg:
+            disk = DiskSourceConfig(
+                enable=bool(disk_cfg.get("enable", False)),
+                file_path=disk_cfg.get("file_path"),
+                file_type=disk_cfg.get("file_type", "mtime"),
+                record_pointer=disk_cfg.get("record_pointer", 0),
+                column_to_check=disk_cfg.get("column_to_check", "datetime"),
+                raw=disk_cfg,
+            )
+
+        # Render sẵn URL/file path cho các symbol tĩnh
+        if symbols.values:
+            for symbol in symbols.values:
+                if api and api.enable and api.url:
+                    api.url_for(symbol)
+                if disk and disk.enable and disk.file_path:
+                    disk.path_for(symbol)
+
+        return SourceConfig(
+            name=name,
+            api=api,
+            database=database,
+            disk=disk,
+            symbols=symbols,
+            check=check,
+            schedule=SourceConfigUtil.compile_schedule(name, raw.get("schedule")),
+            raw=raw,
+        )
+
+    @staticmethod
+    def compile_api_batch(
+        name: str, api_cfg, symbols: SymbolsConfig
+    ) -> Optional[ApiBatchConfig]:
+        """
+        Compile `api.batch`
+
+        Args:
+            name: Tên nguồn
+            api_cfg: Dict config `api`
+            symbols: SymbolsConfig đã compile
+
+        Returns:
+            ApiBatchConfig, hoặc None nếu không bật batch / config không hợp lệ
+        """
+        batch_cfg = api_cfg.get("batch") or {}
+        if not batch_cfg.get("enable", False):
+            return None
+
+        url = batch_cfg.get("url") or api_cfg.get("url")
+        if not url or ("{symbols}" not in url and "{symbol}" not in url):
+            SourceConfigUtil.logger.warning(
+                f"[{name}] api.batch cần URL chứa {{symbols}} hoặc {{symbol}}, bỏ qua batch"
+            )
+            return None
+
+        return ApiBatchConfig(
+            url=url,
+            separator=str(batch_cfg.get("separator", ",")),
+            size=max(1, int(batch_cfg.get("size", 50))),
+            symbol_key=batch_cfg.get("symbol_key") or symbols.column or "symbol",
+            window=max(0.0, float(batch_cfg.get("window", 0.5))),
+        )
+
+    @staticmethod
+    def compile_database_batch(
+        name: str, db_cfg, symbols: SymbolsConfig
+    ) -> Optional[DatabaseBatchConfig]:
+        """
+        Compile `database.batch`
+
+        Args:
+            name: Tên nguồn
+            db_cfg: Dict config `database`
+            symbols: SymbolsConfig đã compile
+
+        Returns:
+            DatabaseBatchConfig, hoặc None nếu không bật batch / nguồn không có symbols.column
+        """
+        batch_cfg = db_cfg.get("batch") or {}
+        if not batch_cfg.get("enable", False):
+            return None
+
+        if not symbols.column:
+            SourceConfigUtil.logger.warning(
+                f"[{name}] database.batch cần symbols.column, bỏ qua batch"
+            )
+            return None
+
+        return DatabaseBatchConfig(
+            size=max(1, int(batch_cfg.get("size", 500))),
+            window=max(0.0, float(batch_cfg.get("window", 0.5))),
+        )
+
+    @staticmethod
+    def compile_api_path(name: str, api_cfg) -> Optional[ResponsePath]:
+        """
+        Compile `api.path` (vd: `data[0][-1].Date`)
+
+        Args:
+            name: Tên nguồn
+            api_cfg: Dict config `api`
+
+        Returns:
+            ResponsePath, hoặc None nếu không khai báo / path không hợp lệ
+        """
+        expr = api_cfg.get("path")
+        if not expr:
+            return None
+        try:
+            return ResponsePath.compile(str(expr))
+        except ValueError as e:
+            SourceConfigUtil.logger.warning(
+                f"[{name}] api.path không hợp lệ: {e}, dùng record_pointer/column_to_check"
+            )
+            return None
+
+    @staticmethod
+    def compile_api_push(
+        name: str, api_cfg, symbols: SymbolsConfig
+    ) -> Optional[ApiPushConfig]:
+        """
+        Compile `api.stream_url` và các tham số đi kèm
+
+        Args:
+            name: Tên nguồn
+            api_cfg: Dict config `api`
+            symbols: SymbolsConfig đã compile
+
+        Returns:
+            ApiPushConfig, hoặc None nếu không khai báo / config không hợp lệ
+        """
+        url = api_cfg.get("stream_url")
+        if not url:
+            return None
+
+        default_type = "websocket" if url.startswith(("ws://", "wss://")) else "sse"
+        stream_type = str(api_cfg.get("stream_type") or default_type).lower()
+        if stream_type not in ("sse", "websocket"):
+            SourceConfigUtil.logger.warning(
+                f"[{name}] api.stream_type '{stream_type}' không hợp lệ "
+                f"(sse, websocket), bỏ qua push stream"
+            )
+            return None
+
+        return ApiPushConfig(
+            url=url,
+            type=stream_type,
+            symbol_key=api_cfg.get("stream_symbol_key") or symbols.column or "symbol",
+            column=api_cfg.get("stream_column")
+            or api_cfg.get("column_to_check", "datetime"),
+            idle_timeout=max(1.0, float(api_cfg.get("stream_idle_timeout", 60))),
+        )
+
+    @staticmethod
+    def compile_schedule(name: str, schedule) -> ScheduleConfig:
+        """
+        Parse schedule: valid_days → frozenset, time_ranges → giây trong ngày,
+        holidays → set date
+
+        Format cũ (list nhiều schedule, {"period": {...}}) được giữ nguyên ở
+        `raw` với `legacy=True` để TimeValidator xử lý như trước.
+        """
+        if not schedule:
+            return ScheduleConfig(None, None, frozenset(), schedule)
+
+        if not isinstance(schedule, dict) or not (
+            "valid_days" in schedule
+            or "time_ranges" in schedule
+            or "days" in schedule
+            or "hours" in schedule
+        ):
+            return ScheduleConfig(None, None, frozenset(), schedule, legacy=True)
+
+        holidays = set()
+        for holiday_str in schedule.get("holidays") or []:
+            try:
+                holidays.add(parse_holiday(holiday_str))
+            except (ValueError, TypeError):
+                SourceConfigUtil.logger.warning(
+                    f"[{name}] Invalid holiday format: {holiday_str}"
+                )
+
+        days = (
+            schedule.get("valid_days")
+            if "valid_days" in schedule
+            else schedule.get("days")
+        )
+        valid_days = frozenset(days) if days else None
+
+        hours = (
+            schedule.get("time_ranges")
+            if "time_ranges" in schedule
+            else schedule.get("hours")
+        )
+        time_ranges = None
+        if hours is not None:
+            hour_list = hours if isinstance(hours, list) else [hours]
+            parsed = []
+            for hour_range in hour_list:
+                if not hour_range or "-" not in hour_range:
+                    # Giống TimeValidator._check_time_range: khoảng rỗng = cả ngày
+                    parsed.append((0, 86400))
+                    continue
+                try:
+                    start_str, end_str = hour_range.split("-", 1)
+                    parsed.append(
+                        (parse_time_of_day(start_str), parse_time_of_day(end_str))
+                    )
+                except (ValueError, AttributeError) as e:
+                    SourceConfigUtil.logger.warning(
+                        f"[{name}] Invalid schedule time range '{hour_range}': {e}"
+                    )
+            time_ranges = tuple(parsed)
+
+        return ScheduleConfig(valid_days, time_ranges, frozenset(holidays), schedule)
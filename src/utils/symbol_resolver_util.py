@@ -11,7 +11,7 @@ class SymbolResolverUtil:
 
     logger = LoggerConfig.logger_config("SymbolResolverUtil")
 
-    # Singleton DatabaseConfig instance - reuse across all queries
+    # DatabaseManager dùng chung pool connection với các checker
     _db_connector = None
 
     @staticmethod
@@ -25,7 +25,9 @@ class SymbolResolverUtil:
     def get_symbols_from_database(api_name):
         """
         Lấy danh sách symbols từ database config nếu có cùng tên
-        Luôn query từ database, không dùng cache
+        Luôn query từ database, không dùng cache. Các lời gọi cùng profile +
+        collection/table + column (vd: từ checker API và checker database cùng lúc)
+        được gộp qua SingleFlightUtil (trong DatabaseManager.get_distinct_symbols).
 
         Args:
             api_name: Tên API config (vd: "cmc", "etf_candlestick")
@@ -64,141 +66,58 @@ class SymbolResolverUtil:
             database = db_cfg.get("database")
 
             if db_type == "mongodb":
+                collection_key = "collection_name"
                 collection_name = db_cfg.get("collection_name")
-                symbols = SymbolResolverUtil._get_symbols_from_mongodb(
-                    database, collection_name, symbol_column
-                )
             elif db_type == "postgresql":
-                table_name = db_cfg.get("table") or db_cfg.get("table_name")
-                symbols = SymbolResolverUtil._get_symbols_from_postgresql(
-                    database, table_name, symbol_column
-                )
+                collection_key = "table"
+                collection_name = db_cfg.get("table") or db_cfg.get("table_name")
             else:
                 return None
 
-            return symbols
-
-        except Exception as e:
-            SymbolResolverUtil.logger.error(
-                f"Lỗi khi resolve symbols từ database cho {api_name}: {e}"
-            )
-            return None
-
-    @staticmethod
-    def _get_symbols_from_mongodb(database, collection_name, symbol_column):
-        """
-        Query MongoDB để lấy distinct symbols
-
-        Args:
-            database: Tên database
-            collection_name: Tên collection
-            symbol_column: Tên column chứa symbol
-
-        Returns:
-            list: Danh sách symbols
-        """
-        try:
-            # Reuse DatabaseConfig singleton instance
-            db_connector = SymbolResolverUtil._get_db_connector()
-
-            # Build config cho MongoDB connection
-            db_config = {
+            # Cùng profile + database với checker → dùng chung pool connection
+            resolver_config = {
                 "database": {
-                    "type": "mongodb",
+                    "type": db_type,
+                    "user_connect": db_cfg.get("user_connect", "duc_le_connect"),
                     "database": database,
-                    "collection_name": collection_name,
-                }
+                    collection_key: collection_name,
+                },
+                "symbols": {"column": symbol_column},
             }
-
-            # Kết nối MongoDB (reuse existing connection nếu có)
-            connector = db_connector.connect(f"resolver_{database}", db_config)
-            if connector is None:
-                SymbolResolverUtil.logger.error(
-                    f"Không thể kết nối MongoDB: {database}"
-                )
-                return []
-
-            # Lấy database object từ connector
-            db = connector.connection
-            if db is None:
-                SymbolResolverUtil.logger.error(
-                    f"Connector không có database connection: {database}"
-                )
-                return []
-
-            # Lấy collection và query distinct symbols
-            collection = db[collection_name]
-            symbols = collection.distinct(symbol_column)
-
-            # KHÔNG đóng connection - để reuse cho lần sau
-            # Connection sẽ được quản lý bởi DatabaseConfig singleton
-
-            # Filter None/empty values và sort
-            symbols = [s for s in symbols if s]
-
-            return sorted(symbols) if symbols else []
+            return SymbolResolverUtil._get_distinct_symbols(
+                f"resolver_{database}", resolver_config
+            )
 
         except Exception as e:
             SymbolResolverUtil.logger.error(
-                f"Lỗi khi query MongoDB ({database}.{collection_name}): {e}"
+                f"Lỗi khi resolve symbols từ database cho {api_name}: {e}"
             )
-            return []
+            return None
 
     @staticmethod
-    def _get_symbols_from_postgresql(database, table_name, symbol_column):
+    def _get_distinct_symbols(db_name, db_config):
         """
-        Query PostgreSQL để lấy distinct symbols
+        Query distinct symbols qua DatabaseManager (pool dùng chung, gộp các lời
+        gọi trùng qua SingleFlightUtil)
 
         Args:
-            database: Tên database
-            table_name: Tên table
-            symbol_column: Tên column chứa symbol
+            db_name: Tên hiển thị trong log
+            db_config: Config dạng data_sources_config.json (database + symbols.column)
 
         Returns:
-            list: Danh sách symbols
+            list: Danh sách symbols (đã bỏ giá trị rỗng)
         """
+        db_cfg = db_config["database"]
         try:
-            db_connector = SymbolResolverUtil._get_db_connector()
-
-            # Build config cho PostgreSQL connection
-            db_config = {
-                "database": {
-                    "type": "postgresql",
-                    "database": database,
-                    "table": table_name,
-                }
-            }
-
-            # Kết nối PostgreSQL (reuse existing connection nếu có)
-            connector = db_connector.connect(f"resolver_{database}", db_config)
-            if connector is None:
-                SymbolResolverUtil.logger.error(
-                    f"Không thể kết nối PostgreSQL: {database}"
-                )
-                return []
-
-            # Lấy connection object từ connector
-            conn = connector.connection
-            if conn is None:
-                SymbolResolverUtil.logger.error(
-                    f"Connector không có database connection: {database}"
-                )
-                return []
-
-            # Query distinct symbols
-            query = f"SELECT DISTINCT {symbol_column} FROM {table_name} ORDER BY {symbol_column}"
-            cursor = conn.cursor()
-            cursor.execute(query)
-
-            symbols = [row[0] for row in cursor.fetchall()]
-
-            cursor.close()
-
-            return symbols
+            symbols = SymbolResolverUtil._get_db_connector().get_distinct_symbols(
+                db_name, db_config
+            )
+            return [s for s in symbols if s]
 
         except Exception as e:
             SymbolResolverUtil.logger.error(
-                f"Lỗi khi query PostgreSQL ({database}.{table_name}): {e}"
+                f"Lỗi khi query {db_cfg['type']} ({db_cfg['database']}."
+                f"{db_cfg.get('collection_name') or db_cfg.get('table')}): {e}"
             )
             return []
 
@@ -0,0 +1,274 @@
+"""
+Task Reconciler Utility
+Thêm/xóa/lập lịch lại item trong CheckScheduler theo diff giữa các version config
+thay vì quét lại toàn bộ
+"""
+
+import asyncio
+import functools
+import time
+from typing import Callable, Dict, Optional, Set, Tuple
+
+from utils.load_config_util import LoadConfigUtil
+from utils.source_config_util import SourceConfigUtil
+
+
+def get_monitor_config() -> dict:
+    """
+    Lấy MONITOR_CONFIG từ common_config.json (dict rỗng nếu chưa cấu hình)
+
+    Returns:
+        Dict tham số vận hành (reconcile_interval, symbol_refresh_interval, ...)
+    """
+    return LoadConfigUtil.load_json_to_variable("common_config.json").get(
+        "MONITOR_CONFIG", {}
+    )
+
+
+class TaskReconciler:
+    """
+    Đồng bộ tập item trong scheduler với config đã compile
+
+    - Config không đổi version → không làm gì (chỉ refresh symbols auto_sync theo chu kỳ)
+    - Nguồn mới → thêm item; nguồn bị xóa → xóa item
+    - Nguồn đổi config → thay item của nguồn đó (check lại ngay với config mới)
+    - Tập symbols đổi → chỉ thêm/xóa các symbol thay đổi
+    - Mỗi nguồn chỉ resolve symbols 1 lần cho mỗi lần reconcile
+
+    Sử dụng:
+        reconciler = TaskReconciler(
+            load_sources=self._load_config,
+            check_func=self.check_data_api,
+            resolve_symbols=SymbolResolverUtil.resolve_api_symbols,
+            logger=self.logger_api,
+            scheduler=self.scheduler,
+            kind="api",
+        )
+        await reconciler.run()
+    """
+
+    def __init__(
+        self,
+        load_sources: Callable[[], Dict],
+        check_func: Callable,
+        resolve_symbols: Callable,
+        logger,
+        scheduler,
+        kind: str,
+        shard=None,
+        phase_key: Optional[Callable] = None,
+    ):
+        """
+        Args:
+            load_sources: Hàm trả về {source_name: SourceConfig} đang enable
+            check_func: Hàm async (source_name, SourceConfig, symbol) chạy 1 lần check,
+                trả về số giây tới lần check kế tiếp
+            resolve_symbols: Hàm (source_name, raw_config) → list symbols | None
+            logger: Logger của checker
+            scheduler: CheckScheduler dùng chung
+            kind: Loại checker ("api", "database", "disk") - prefix key trong scheduler
+            shard: ShardFilter (--workers) hoặc ClusterShardFilter (cluster),
+                None = chạy tất cả item
+            phase_key: Hàm (source_name, SourceConfig, symbol) → key tính pha trong chu kỳ
+                (mặc định display name; các item cùng key đến hạn cùng lúc)
+        """
+        self.load_sources = load_sources
+        self.check_func = check_func
+        self.resolve_symbols = resolve_symbols
+        self.logger = logger
+        self.scheduler = scheduler
+        self.kind = kind
+        self.shard = shard
+        self.phase_key = phase_key
+
+        # {display_name: (source_name, symbol)}
+        self.items: Dict[str, Tuple[str, Optional[str]]] = {}
+        # {source_name: SourceConfig} của lần reconcile trước
+        self._sources: Dict = {}
+        # {source_name: (symbols | None, monotonic time lúc resolve)}
+        self._symbols: Dict[str, Tuple[Optional[Tuple[str, ...]], float]] = {}
+        self._version: Optional[int] = None
+        self._shard_version = getattr(shard, "version", None)
+
+    @staticmethod
+    def display_name(source_name: str, symbol: Optional[str]) -> str:
+        """Tên hiển thị của 1 item (source hoặc source-symbol)"""
+        return f"{source_name}-{symbol}" if symbol else source_name
+
+    @staticmethod
+    def _fingerprint(source) -> dict:
+        """Config của nguồn trừ phần symbols (đổi symbols không cần restart toàn bộ)"""
+        return {key: value for key, value in source.raw.items() if key != "symbols"}
+
+    def _resolve(self, source_name: str, source) -> Optional[Tuple[str, ...]]:
+        """Resolve symbols 1 lần và lưu lại thời điểm resolve"""
+        symbols = self.resolve_symbols(source_name, source.raw)
+        resolved = tuple(symbols) if symbols is not None else None
+        self._symbols[source_name] = (resolved, time.monotonic())
+        return resolved
+
+    def _expected_items(self, source_name: str, symbols) -> Dict[str, Optional[str]]:
+        """{display_name: symbol} cần chạy cho 1 nguồn (chỉ item thuộc shard này)"""
+        if symbols is None:
+            expected = {source_name: None}
+        else:
+            expected = {
+                self.display_name(source_name, symbol): symbol for symbol in symbols
+            }
+        if self.shard is not None:
+            expected = {
+                name: symbol
+                for name, symbol in expected.items()
+                if self.shard.owns(name)
+            }
+        return expected
+
+    def _items_of(self, source_name: str) -> Set[str]:
+        return {
+            name
+            for name, (owner, _) in self.items.items()
+            if owner == source_name
+        }
+
+    def _key(self, display_name: str) -> Tuple[str, str]:
+        return (self.kind, display_name)
+
+    def _start(self, source_name: str, source, symbol: Optional[str]) -> None:
+        display_name = self.display_name(source_name, symbol)
+        handler = functools.partial(self.check_func, source_name, source, symbol)
+        check_cfg = source.check
+
+        if self.scheduler.phase_spread:
+            # Lần đầu chạy tại mốc pha của item thay vì tất cả cùng lúc
+            phase_key = (
+                self.phase_key(source_name, source, symbol)
+                if self.phase_key is not None
+                else display_name
+            )
+            phase = self.scheduler.phase_of(phase_key)
+            delay = self.scheduler.phase_delay(
+                phase, check_cfg.check_frequency, check_cfg.jitter
+            )
+        else:
+            phase, delay = None, 0.0
+
+        self.scheduler.add(
+            self._key(display_name),
+            handler,
+            delay=delay,
+            priority=check_cfg.priority_rank,
+            phase=phase,
+            period=check_cfg.check_frequency,
+            jitter=check_cfg.jitter,
+        )
+        self.items[display_name] = (source_name, symbol)
+        self.logger.info(f"Đã lập lịch check cho {display_name}")
+
+    def _cancel(self, display_name: str) -> None:
+        self.items.pop(display_name)
+        self.scheduler.remove(self._key(display_name))
+        self.logger.info(f"Đã dừng check cho {display_name}")
+
+    def _sync_source(self, source_name: str, source, symbols, restart: bool) -> None:
+        """Đưa item của 1 nguồn về đúng tập symbols"""
+        expected = self._expected_items(source_name, symbols)
+        current = self._items_of(source_name)
+
+        for display_name in current:
+            if restart or display_name not in expected:
+                self._cancel(display_name)
+
+        for display_name, symbol in expected.items():
+            if display_name not in self.items:
+                self._start(source_name, source, symbol)
+
+    def reconcile(self) -> None:
+        """
+        Chạy 1 lần reconcile
+
+        Chi phí khi config không đổi: 1 lần stat file config + kiểm tra hạn refresh.
+        """
+        sources = self.load_sources()
+        version = SourceConfigUtil.get_compiled().version
+        refresh_interval = get_monitor_config().get("symbol_refresh_interval", 300)
+        now = time.monotonic()
+
+        config_changed = version != self._version
+        # Cluster: tập shard node đang giữ lease đã đổi → đồng bộ lại item
+        shard_version = getattr(self.shard, "version", None)
+        shard_changed = shard_version != self._shard_version
+
+        if config_changed:
+            removed = set(self._sources) - set(sources)
+            for source_name in removed:
+                for display_name in self._items_of(source_name):
+                    self._cancel(display_name)
+                self._symbols.pop(source_name, None)
+
+        for source_name, source in sources.items():
+            previous = self._sources.get(source_name)
+            is_new = previous is None
+            changed = (
+                not is_new
+                and config_changed
+                and self._fingerprint(previous) != self._fingerprint(source)
+            )
+            symbols_changed = (
+                not is_new and config_changed and previous.symbols != source.symbols
+            )
+            resolved = self._symbols.get(source_name)
+            # auto_sync: refresh theo chu kỳ, hoặc mỗi lần nếu lần trước chưa có symbol
+            refresh_due = (
+                source.symbols.auto_sync is True
+                and resolved is not None
+                and (not resolved[0] or now - resolved[1] >= refresh_interval)
+            )
+
+            if not (is_new or changed or symbols_changed or refresh_due):
+                if shard_changed and resolved is not None and resolved[0] != ():
+                    self._sync_source(source_name, source, resolved[0], restart=False)
+                continue
+
+            if changed:
+                self.logger.info(f"Config của {source_name} đã thay đổi, lập lịch lại...")
+
+            symbols = self._resolve(source_name, source)
+
+            if (
+                refresh_due
+                and not (is_new or changed or symbols_changed)
+                and not symbols
+                and resolved[0]
+            ):
+                # Refresh lỗi/trả rỗng: giữ nguyên tập symbols đang chạy
+                self.logger.warning(
+                    f"[{source_name}] Refresh symbols không có kết quả, giữ {len(resolved[0])} symbols cũ"
+                )
+                self._symbols[source_name] = (resolved[0], now)
+                continue
+
+            if symbols is not None and len(symbols) == 0:
+                # Empty list: skip nguồn này (đã có warning trong resolver)
+                for display_name in self._items_of(source_name):
+                    self._cancel(display_name)
+                continue
+
+            self._sync_source(source_name, source, symbols, restart=changed)
+
+        self._sources = dict(sources)
+        self._version = version
+        self._shard_version = shard_version
+
+    async def run(self) -> None:
+        """Vòng lặp reconcile theo MONITOR_CONFIG.reconcile_interval (mặc định 10 giây)"""
+        try:
+            while True:
+                try:
+                    self.reconcile()
+                except Exception as e:
+                    self.logger.error(f"Lỗi reconcile task: {e}", exc_info=True)
+
+                await asyncio.sleep(get_monitor_config().get("reconcile_interval", 10))
+        finally:
+            for display_name in list(self.items):
+                self._cancel(display_name)